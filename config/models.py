@@ -2,9 +2,26 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import List, Literal, Union, Optional, Dict
+from typing import List, Literal, Union, Optional, Dict, Tuple, get_args
 
 BlendMode = Literal["sum", "mean", "max", "weighted"]
+RankBy = Literal["variance", "mean", "max", "l2"]
+Precision = Literal["fp32", "bf16", "int8"]
+InferenceBackendName = Literal["eager", "torchscript", "compile"]
+ResizeMode = Literal["stretch", "keep_aspect"]
+Interpolation = Literal["nearest", "linear", "cubic", "lanczos"]
+
+# Erlaubte Werte für die Config-Validierung; core importiert sie von hier,
+# damit das Validieren einer Config weder torch noch OpenCV lädt
+SUPPORTED_MODELS: List[str] = ["resnet18", "resnet34", "resnet50", "mobilenet_v3_small", "efficientnet_b0"]
+RANK_CRITERIA: Tuple[str, ...] = get_args(RankBy)
+DEFAULT_RANK_BY = "variance"
+DEFAULT_TOP_K = 3
+INTERPOLATIONS: Tuple[str, ...] = get_args(Interpolation)  # Hochskalieren der Map auf Anzeigegröße
+DEFAULT_INTERPOLATION = "linear"
+BUILTIN_COLORMAPS: List[str] = ["viridis", "magma", "inferno", "plasma", "jet", "red", "green", "blue"]
+COLORMAP_ALIASES: Dict[str, str] = {"r": "red", "g": "green", "b": "blue"}
+DEFAULT_COLORMAP = "viridis"
 
 
 @dataclass
@@ -28,6 +45,10 @@ class VizPreset:
     overlay: bool = False
     alpha: float = 0.6
     cmap: str = "viridis"
+    # nur für blend_mode "weighted": ein Gewicht je Channel der Liste bzw. je
+    # Top-K-Rang (stärkster Channel zuerst); None = gleichgewichtet (1/N)
+    weights: Optional[List[float]] = None
+    rank_by: RankBy = "variance"             # Kriterium für Top-K: variance, mean, max, l2 (Energie)
 
 
 @dataclass
@@ -45,8 +66,29 @@ class LayerUIConfig:
 @dataclass
 class ModelConfig:
     name: str = "resnet18"
-    weights: str = "imagenet"
+    weights: str = "imagenet"             # Name im lokalen Weight-Store oder Pfad zu einer .pt-Datei
     layer_mappings: List[ModelLayerMapping] = field(default_factory=list)
+    precision: Precision = "fp32"          # fp32 | bf16 (CPU-Autocast) | int8 (PTQ)
+    calibration_dir: Optional[str] = None  # Snapshot-Ordner für int8-Kalibrierung (None = Default)
+    backend: InferenceBackendName = "eager"  # eager | torchscript (frozen) | compile (torch.compile)
+    artifact_dir: Optional[str] = None     # Ablage kompilierter Artefakte (None = Default)
+    input_size: int = 224                  # Eingabegröße (quadratisch bzw. kürzere Seite)
+    resize_mode: ResizeMode = "stretch"    # stretch (quadratisch) | keep_aspect (Seitenverhältnis bleibt)
+
+
+@dataclass
+class LiveConfig:
+    """Einstellungen für den Kino-Live-Modus."""
+    scene_gate: bool = True                # Inferenz überspringen, solange sich die Szene kaum ändert
+    scene_change_threshold: float = 3.0    # mittlere Grauwert-Differenz (0–255) ab der neu gerechnet wird
+    max_stale_s: float = 2.0               # spätestens nach dieser Zeit wird trotzdem neu gerechnet
+    gate_size: int = 32                    # Kantenlänge des verkleinerten Vergleichsbilds
+    temporal_smoothing: bool = True        # Heatmap und Normalisierungsbereich über Frames glätten
+    heatmap_alpha: float = 0.5             # EMA-Gewicht des neuen Frames für die Heatmap (1 = keine Glättung)
+    range_alpha: float = 0.2               # EMA-Gewicht des neuen Frames für min/max der Normalisierung
+    rerank_every: int = 15                 # Top-K-Channels spätestens nach so vielen Frames neu bestimmen
+    rerank_drift: float = 0.3              # sofort neu bestimmen, wenn ihre Varianz relativ so stark fällt
+    display_interpolation: Interpolation = DEFAULT_INTERPOLATION  # Hochskalieren der Map auf Anzeigegröße: nearest/linear/cubic/lanczos
 
 
 @dataclass
@@ -85,3 +127,6 @@ class ExhibitConfig:
     ui: ExhibitUIConfig
     viz_presets: List[VizPreset] = field(default_factory=list)
     version: str = "1.0"
+    live: LiveConfig = field(default_factory=LiveConfig)
+    # Eigene Colormaps: Name → Hex-Farbstopps von niedriger zu hoher Aktivierung
+    colormaps: Dict[str, List[str]] = field(default_factory=dict)
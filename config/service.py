@@ -3,16 +3,25 @@ from __future__ import annotations
 
 import json
 import logging
+import math
+import re
 import shutil
 import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from .models import (
+    BUILTIN_COLORMAPS,
+    COLORMAP_ALIASES,
+    DEFAULT_TOP_K,
+    INTERPOLATIONS,
+    RANK_CRITERIA,
+    SUPPORTED_MODELS,
     ExhibitConfig,
     ExhibitUIConfig,
     ModelConfig,
     ModelLayerMapping,
+    LiveConfig,
     LayerUIConfig,
     VizPreset,
     ModelLayerContent,
@@ -23,11 +32,19 @@ from .migrations import migrate_config
 logger = logging.getLogger(__name__)
 
 MAX_FAVORITES_PER_MODEL_LAYER = 3
+SUPPORTED_PRECISIONS = ["fp32", "bf16", "int8"]
+SUPPORTED_BACKENDS = ["eager", "torchscript", "compile"]
+SUPPORTED_RESIZE_MODES = ["stretch", "keep_aspect"]
+MIN_INPUT_SIZE = 32
+INPUT_SIZE_MULTIPLE = 32  # Gesamt-Stride der Backbones
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 CONFIG_PATH = BASE_DIR / "config" / "exhibit_config.json"
 LOCK_PATH = BASE_DIR / "config" / "exhibit_config.json.lock"
 BACKUP_PATH = BASE_DIR / "config" / "exhibit_config.json.backup"
+DEFAULT_CALIBRATION_DIR = BASE_DIR / "data" / "calibration"
+DEFAULT_ARTIFACT_DIR = BASE_DIR / "data" / "artifacts"
+WEIGHTS_DIR = BASE_DIR / "weights"
 
 
 class FileLock:
@@ -89,7 +106,24 @@ def _default_config_dict() -> Dict[str, Any]:
             "name": "resnet18",
             "weights": "imagenet",
             "layer_mappings": [],
+            "precision": "fp32",
+            "backend": "eager",
+            "input_size": 224,
+            "resize_mode": "stretch",
         },
+        "live": {
+            "scene_gate": True,
+            "scene_change_threshold": 3.0,
+            "max_stale_s": 2.0,
+            "gate_size": 32,
+            "temporal_smoothing": True,
+            "heatmap_alpha": 0.5,
+            "range_alpha": 0.2,
+            "rerank_every": 15,
+            "rerank_drift": 0.3,
+            "display_interpolation": "linear",
+        },
+        "colormaps": {},
         "ui": {
             "title": "Wie ein neuronales Netz sieht",
             "language": "de",
@@ -127,6 +161,54 @@ def _default_config_dict() -> Dict[str, Any]:
     }
 
 
+def input_size_error(input_size: Any) -> Optional[str]:
+    """
+    Prüft eine Eingabegröße (Modell-Config oder Favorit); None wenn gültig,
+    sonst die Fehlermeldung.
+    """
+    if isinstance(input_size, bool) or not isinstance(input_size, int):
+        return f"input_size muss eine ganze Zahl sein (ist {input_size!r})"
+    if input_size < MIN_INPUT_SIZE:
+        return f"input_size muss mindestens {MIN_INPUT_SIZE} sein (ist {input_size})"
+    if input_size % INPUT_SIZE_MULTIPLE:
+        return f"input_size muss ein Vielfaches von {INPUT_SIZE_MULTIPLE} sein (ist {input_size})"
+    return None
+
+
+_HEX_COLOR = re.compile(r"^#?([0-9a-fA-F]{6})$")
+
+
+def parse_hex_color(value: str) -> Tuple[int, int, int]:
+    """"#rrggbb" (oder "rrggbb") → (r, g, b); ValueError bei ungültigem Wert."""
+    match = _HEX_COLOR.match(str(value).strip())
+    if match is None:
+        raise ValueError(f"Ungültige Farbe '{value}' (erwartet: #rrggbb)")
+    hex_str = match.group(1)
+    return int(hex_str[0:2], 16), int(hex_str[2:4], 16), int(hex_str[4:6], 16)
+
+
+def parse_colormap_stops(stops: Sequence[str]) -> List[Tuple[int, int, int]]:
+    """Farbstopps einer eigenen Colormap → RGB-Tupel; ValueError bei ungültigen Stopps."""
+    if len(stops) < 2:
+        raise ValueError("Eine eigene Colormap braucht mindestens zwei Farbstopps")
+    return [parse_hex_color(s) for s in stops]
+
+
+def validate_custom_colormaps(custom: Dict[str, List[str]]) -> List[str]:
+    """Fehlermeldungen für eigene Colormaps aus der Config (leer = ok)."""
+    errors = []
+    for name, stops in custom.items():
+        key = name.lower()
+        if key in BUILTIN_COLORMAPS or key in COLORMAP_ALIASES:
+            errors.append(f"Eigene Colormap '{name}' kollidiert mit einer eingebauten Colormap")
+            continue
+        try:
+            parse_colormap_stops(stops)
+        except ValueError as e:
+            errors.append(f"Eigene Colormap '{name}': {e}")
+    return errors
+
+
 def validate_config(cfg: ExhibitConfig) -> List[str]:
     """
     Validiert eine ExhibitConfig und gibt eine Liste von Fehlermeldungen zurück.
@@ -146,16 +228,102 @@ def validate_config(cfg: ExhibitConfig) -> List[str]:
                 f"Layer '{layer.id}' referenziert nicht existierenden viz_preset_id '{layer.viz_preset_id}'"
             )
 
-    # Prüfen: model.name ist unterstützt (aktuell nur resnet18)
-    supported_models = ["resnet18"]
-    if cfg.model.name not in supported_models:
+    # Prüfen: model.name ist in der Backbone-Registry
+    if cfg.model.name not in SUPPORTED_MODELS:
+        errors.append(
+            f"Modell '{cfg.model.name}' wird nicht unterstützt. Unterstützte Modelle: {SUPPORTED_MODELS}"
+        )
+
+    # Prüfen: model.precision ist unterstützt
+    if cfg.model.precision not in SUPPORTED_PRECISIONS:
+        errors.append(
+            f"Precision '{cfg.model.precision}' wird nicht unterstützt. Unterstützt: {SUPPORTED_PRECISIONS}"
+        )
+
+    # Prüfen: model.backend ist unterstützt
+    if cfg.model.backend not in SUPPORTED_BACKENDS:
         errors.append(
-            f"Modell '{cfg.model.name}' wird nicht unterstützt. Unterstützte Modelle: {supported_models}"
+            f"Backend '{cfg.model.backend}' wird nicht unterstützt. Unterstützt: {SUPPORTED_BACKENDS}"
         )
 
+    # Prüfen: Eingabegröße und Resize-Modus
+    size_error = input_size_error(cfg.model.input_size)
+    if size_error:
+        errors.append(f"model.{size_error}")
+    if cfg.model.resize_mode not in SUPPORTED_RESIZE_MODES:
+        errors.append(
+            f"Resize-Modus '{cfg.model.resize_mode}' wird nicht unterstützt. Unterstützt: {SUPPORTED_RESIZE_MODES}"
+        )
+
+    # Prüfen: Live-Einstellungen sind plausibel
+    if cfg.live.scene_change_threshold < 0:
+        errors.append("live.scene_change_threshold darf nicht negativ sein")
+    if cfg.live.max_stale_s <= 0:
+        errors.append("live.max_stale_s muss größer als 0 sein")
+    if cfg.live.gate_size < 4:
+        errors.append("live.gate_size muss mindestens 4 sein")
+    if not 0 < cfg.live.heatmap_alpha <= 1:
+        errors.append("live.heatmap_alpha muss im Bereich (0, 1] liegen")
+    if not 0 < cfg.live.range_alpha <= 1:
+        errors.append("live.range_alpha muss im Bereich (0, 1] liegen")
+    if cfg.live.rerank_every < 1:
+        errors.append("live.rerank_every muss mindestens 1 sein")
+    if not 0 < cfg.live.rerank_drift <= 1:
+        errors.append("live.rerank_drift muss im Bereich (0, 1] liegen")
+    if cfg.live.display_interpolation not in INTERPOLATIONS:
+        errors.append(
+            f"live.display_interpolation '{cfg.live.display_interpolation}' ungültig "
+            f"(erlaubt: {', '.join(INTERPOLATIONS)})"
+        )
+
+    # Prüfen: eigene Colormaps und von Presets genutzte Colormaps
+    errors.extend(validate_custom_colormaps(cfg.colormaps))
+    known_cmaps = set(BUILTIN_COLORMAPS) | set(COLORMAP_ALIASES) | {n.lower() for n in cfg.colormaps}
+    for preset in cfg.viz_presets:
+        if preset.cmap.lower() not in known_cmaps:
+            errors.append(f"VizPreset '{preset.id}' nutzt unbekannte Colormap '{preset.cmap}'")
+
+    # Prüfen: Ranking-Kriterium und Blend-Gewichte der Presets
+    for preset in cfg.viz_presets:
+        if preset.rank_by not in RANK_CRITERIA:
+            errors.append(
+                f"VizPreset '{preset.id}' nutzt unbekanntes Ranking '{preset.rank_by}' "
+                f"(erlaubt: {', '.join(RANK_CRITERIA)})"
+            )
+        if preset.weights is None:
+            continue
+        if preset.channels == "topk":
+            expected = preset.k if preset.k is not None else DEFAULT_TOP_K
+        else:
+            expected = len(preset.channels)
+        if len(preset.weights) != expected:
+            errors.append(
+                f"VizPreset '{preset.id}': {len(preset.weights)} Gewichte für {expected} Channels"
+            )
+        if not all(isinstance(w, (int, float)) and math.isfinite(w) for w in preset.weights):
+            errors.append(f"VizPreset '{preset.id}': Gewichte müssen endliche Zahlen sein")
+
     return errors
 
 
+def _resolve_project_path(path_str: str | None, default: Path) -> Path:
+    """Löst einen optionalen Pfad aus der Config auf (relative Pfade ab Projekt-Root)."""
+    if not path_str:
+        return default
+    path = Path(path_str)
+    return path if path.is_absolute() else BASE_DIR / path
+
+
+def resolve_calibration_dir(model_cfg: ModelConfig) -> Path:
+    """Ordner mit Snapshots für die int8-Kalibrierung."""
+    return _resolve_project_path(model_cfg.calibration_dir, DEFAULT_CALIBRATION_DIR)
+
+
+def resolve_artifact_dir(model_cfg: ModelConfig) -> Path:
+    """Ordner für kompilierte Inferenz-Artefakte (TorchScript, torch.compile-Cache)."""
+    return _resolve_project_path(model_cfg.artifact_dir, DEFAULT_ARTIFACT_DIR)
+
+
 def load_config() -> ExhibitConfig:
     """Läd exhibit_config.json, legt Default an, falls nicht vorhanden."""
     if not CONFIG_PATH.exists():
@@ -276,7 +444,13 @@ def _from_dict(d: Dict[str, Any]) -> ExhibitConfig:
     model_cfg = ModelConfig(
         name=model_raw["name"],
         weights=model_raw["weights"],
-        layer_mappings=mappings
+        layer_mappings=mappings,
+        precision=model_raw.get("precision", "fp32"),
+        calibration_dir=model_raw.get("calibration_dir"),
+        backend=model_raw.get("backend", "eager"),
+        artifact_dir=model_raw.get("artifact_dir"),
+        input_size=int(model_raw.get("input_size", 224)),
+        resize_mode=model_raw.get("resize_mode", "stretch"),
     )
 
     ui_raw: Dict[str, Any] = d["ui"]
@@ -330,12 +504,34 @@ def _from_dict(d: Dict[str, Any]) -> ExhibitConfig:
     presets_raw: List[Dict[str, Any]] = d.get("viz_presets", [])
     presets = [VizPreset(**p) for p in presets_raw]
 
+    # Live-Einstellungen (optional in JSON, fehlende Felder = Defaults)
+    live_raw: Dict[str, Any] = d.get("live") or {}
+    live_defaults = LiveConfig()
+    live_cfg = LiveConfig(
+        scene_gate=bool(live_raw.get("scene_gate", live_defaults.scene_gate)),
+        scene_change_threshold=float(live_raw.get("scene_change_threshold", live_defaults.scene_change_threshold)),
+        max_stale_s=float(live_raw.get("max_stale_s", live_defaults.max_stale_s)),
+        gate_size=int(live_raw.get("gate_size", live_defaults.gate_size)),
+        temporal_smoothing=bool(live_raw.get("temporal_smoothing", live_defaults.temporal_smoothing)),
+        heatmap_alpha=float(live_raw.get("heatmap_alpha", live_defaults.heatmap_alpha)),
+        range_alpha=float(live_raw.get("range_alpha", live_defaults.range_alpha)),
+        rerank_every=int(live_raw.get("rerank_every", live_defaults.rerank_every)),
+        rerank_drift=float(live_raw.get("rerank_drift", live_defaults.rerank_drift)),
+        display_interpolation=str(live_raw.get("display_interpolation", live_defaults.display_interpolation)),
+    )
+
+    # Eigene Colormaps (optional in JSON)
+    colormaps_raw: Dict[str, Any] = d.get("colormaps") or {}
+    colormaps = {str(name): [str(c) for c in stops] for name, stops in colormaps_raw.items()}
+
     return ExhibitConfig(
         exhibit_id=d["exhibit_id"],
         model=model_cfg,
         ui=ui_cfg,
         viz_presets=presets,
-        version=d.get("version", "1.0")
+        version=d.get("version", "1.0"),
+        live=live_cfg,
+        colormaps=colormaps,
     )
 
 
@@ -355,7 +551,26 @@ def _to_dict(cfg: ExhibitConfig) -> Dict[str, Any]:
                 }
                 for m in cfg.model.layer_mappings
             ],
+            "precision": cfg.model.precision,
+            "calibration_dir": cfg.model.calibration_dir,
+            "backend": cfg.model.backend,
+            "artifact_dir": cfg.model.artifact_dir,
+            "input_size": cfg.model.input_size,
+            "resize_mode": cfg.model.resize_mode,
+        },
+        "live": {
+            "scene_gate": cfg.live.scene_gate,
+            "scene_change_threshold": cfg.live.scene_change_threshold,
+            "max_stale_s": cfg.live.max_stale_s,
+            "gate_size": cfg.live.gate_size,
+            "temporal_smoothing": cfg.live.temporal_smoothing,
+            "heatmap_alpha": cfg.live.heatmap_alpha,
+            "range_alpha": cfg.live.range_alpha,
+            "rerank_every": cfg.live.rerank_every,
+            "rerank_drift": cfg.live.rerank_drift,
+            "display_interpolation": cfg.live.display_interpolation,
         },
+        "colormaps": cfg.colormaps,
         "ui": {
             "title": cfg.ui.title,
             "language": cfg.ui.language,
@@ -400,6 +615,8 @@ def _to_dict(cfg: ExhibitConfig) -> Dict[str, Any]:
                 "overlay": p.overlay,
                 "alpha": p.alpha,
                 "cmap": p.cmap,
+                "weights": p.weights,
+                "rank_by": p.rank_by,
             }
             for p in cfg.viz_presets
         ],
@@ -484,3 +701,19 @@ def set_selected_kivy_favorites(cfg: ExhibitConfig, model_layer_id: str, favorit
     filtered = [n for n in deduped if n in existing_names]
     cfg.ui.kivy_favorites[model_layer_id] = filtered[:MAX_FAVORITES_PER_MODEL_LAYER]
 
+
+def get_required_model_layers(cfg: ExhibitConfig) -> List[str]:
+    """Minimale Menge an Modell-Layern, die der Kivy-View tatsächlich anzeigt.
+
+    Berücksichtigt nur Modell-Layer mit mindestens einem ausgewählten
+    Kino-Favoriten (ui.kivy_favorites); maßgeblich ist das model_layer_id
+    im Preset des Favoriten. Reihenfolge wie in der Config, ohne Dubletten.
+    Eine leere Liste bedeutet: keine Favoriten ausgewählt.
+    """
+    required: List[str] = []
+    for model_layer_id in cfg.ui.kivy_favorites:
+        for fav in get_selected_kivy_favorites(cfg, model_layer_id):
+            layer_id = (fav.get("preset") or {}).get("model_layer_id", model_layer_id)
+            if layer_id not in required:
+                required.append(layer_id)
+    return required
@@ -0,0 +1,132 @@
+# core/backbones.py
+"""
+Registry der unterstützten torchvision-Backbones.
+
+Pro Architektur wird beschrieben:
+- ``stages``: Top-Level-Module in Forward-Reihenfolge (Grundlage für den
+  Early-Exit der ModelEngine; verschachtelte Namen wie "features.3" erlaubt)
+- ``default_layers``: standardmäßig gehookte Layer (fünf Stufen von früh
+  nach tief, jeweils am Ende einer Auflösungsstufe)
+- ``layer_labels``: Anzeigenamen dieser Layer; daraus entstehen die
+  Default-UI-Mappings ``stage_0`` … ``stage_4``, sodass UI-Layer
+  unabhängig vom gewählten Modell bleiben
+- ``quantizable``: Name in ``torchvision.models.quantization`` (für int8)
+
+torchvision wird erst beim Bauen eines Modells importiert; die Registry
+selbst ist reine Beschreibung und kann auch von Config/UI geladen werden.
+"""
+
+from __future__ import annotations
+
+import importlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.models import SUPPORTED_MODELS, ModelLayerMapping
+
+UI_STAGE_PREFIX = "stage_"
+
+
+@dataclass(frozen=True)
+class BackboneSpec:
+    name: str                                   # torchvision-Builder, z.B. "resnet18"
+    display_name: str                           # Anzeige im Admin
+    stages: Tuple[str, ...]
+    default_layers: Tuple[str, ...]
+    layer_labels: Dict[str, str] = field(default_factory=dict)
+    imagenet_weights: str = "IMAGENET1K_V1"     # torchvision-Gewichte hinter dem Alias "imagenet"
+    quantizable: Optional[str] = None           # Builder in torchvision.models.quantization
+
+    def builder(self) -> Callable:
+        """torchvision-Builder (Import erst bei Bedarf)."""
+        models = importlib.import_module("torchvision.models")
+        return getattr(models, self.name)
+
+    def quantizable_builder(self) -> Optional[Callable]:
+        """Quantisierbare Variante für int8, falls torchvision eine anbietet."""
+        if self.quantizable is None:
+            return None
+        qmodels = importlib.import_module("torchvision.models.quantization")
+        return getattr(qmodels, self.quantizable)
+
+    def default_layer_mappings(self) -> List[ModelLayerMapping]:
+        """Default-UI-Mappings stage_0 … stage_n → default_layers."""
+        return [
+            ModelLayerMapping(
+                ui_layer_id=f"{UI_STAGE_PREFIX}{i}",
+                model_layer_id=layer_id,
+                display_name=self.layer_labels.get(layer_id, layer_id),
+            )
+            for i, layer_id in enumerate(self.default_layers)
+        ]
+
+
+_RESNET_STAGES = ("conv1", "bn1", "relu", "maxpool", "layer1", "layer2", "layer3", "layer4")
+_RESNET_LAYERS = ("conv1", "layer1", "layer2", "layer3", "layer4")
+_RESNET_LABELS = {
+    "conv1": "Erste Faltung – Kanten & Farben",
+    "layer1": "Stufe 1 – einfache Muster",
+    "layer2": "Stufe 2 – Texturen",
+    "layer3": "Stufe 3 – Objektteile",
+    "layer4": "Stufe 4 – ganze Objekte",
+}
+
+
+def _resnet(name: str, display_name: str, **kwargs) -> BackboneSpec:
+    return BackboneSpec(
+        name=name,
+        display_name=display_name,
+        stages=_RESNET_STAGES,
+        default_layers=_RESNET_LAYERS,
+        layer_labels=_RESNET_LABELS,
+        **kwargs,
+    )
+
+
+BACKBONES: Dict[str, BackboneSpec] = {
+    spec.name: spec
+    for spec in (
+        _resnet("resnet18", "ResNet-18", quantizable="resnet18"),
+        _resnet("resnet34", "ResNet-34"),
+        _resnet("resnet50", "ResNet-50", imagenet_weights="IMAGENET1K_V2", quantizable="resnet50"),
+        BackboneSpec(
+            name="mobilenet_v3_small",
+            display_name="MobileNetV3-Small (schnell)",
+            stages=tuple(f"features.{i}" for i in range(13)),
+            # Stride 2, 4, 8, 16, 32
+            default_layers=("features.0", "features.1", "features.3", "features.8", "features.12"),
+            layer_labels={
+                "features.0": "Erste Faltung – Kanten & Farben",
+                "features.1": "Stufe 1 – einfache Muster",
+                "features.3": "Stufe 2 – Texturen",
+                "features.8": "Stufe 3 – Objektteile",
+                "features.12": "Stufe 4 – ganze Objekte",
+            },
+        ),
+        BackboneSpec(
+            name="efficientnet_b0",
+            display_name="EfficientNet-B0",
+            stages=tuple(f"features.{i}" for i in range(9)),
+            # Stride 2, 4, 8, 16, 32
+            default_layers=("features.0", "features.2", "features.3", "features.5", "features.8"),
+            layer_labels={
+                "features.0": "Erste Faltung – Kanten & Farben",
+                "features.2": "Stufe 1 – einfache Muster",
+                "features.3": "Stufe 2 – Texturen",
+                "features.5": "Stufe 3 – Objektteile",
+                "features.8": "Stufe 4 – ganze Objekte",
+            },
+        ),
+    )
+}
+
+if list(BACKBONES) != SUPPORTED_MODELS:
+    raise RuntimeError("BACKBONES weicht von config.models.SUPPORTED_MODELS ab")
+
+
+def get_backbone(name: str) -> BackboneSpec:
+    """Spezifikation eines Backbones; ValueError bei unbekanntem Namen."""
+    spec = BACKBONES.get(name)
+    if spec is None:
+        raise ValueError(f"Unbekanntes Modell: {name}. Unterstützte Modelle: {SUPPORTED_MODELS}")
+    return spec
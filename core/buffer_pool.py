@@ -0,0 +1,128 @@
+# core/buffer_pool.py
+"""
+Wiederverwendbare NumPy-Puffer für den Live-Modus.
+
+Im Dauerbetrieb (Kiosk, 12 h am Tag) erzeugt jedes Frame sonst mehrere
+neue Arrays (Kamerabild, Resize, Normalisierung, Colormap, Overlay). Der
+Allocator-Churn zeigt sich als Latenzspitzen und langsam wachsender RSS.
+Der Pool hält Arrays fester Shape und gibt sie Frame für Frame wieder aus.
+
+Zwei Nutzungsarten:
+- ``scratch(name, shape, dtype)``: benannter Zwischenpuffer für genau einen
+  Nutzer/Thread, gültig bis zum nächsten Aufruf mit demselben Namen
+  (z.B. Resize-Zwischenbild innerhalb eines Aufrufs).
+- ``acquire(shape, dtype)`` / ``release(buf)``: Puffer, die zwischen
+  Threads weitergereicht werden (Kamera → Compute → UI). Ein Puffer wird
+  erst wiederverwendet, nachdem er explizit zurückgegeben wurde; so kann
+  ein langsamer Konsument nie ein Bild verlieren, das er noch liest.
+
+Funktionen mit ``out=``-Parameter folgen der OpenCV-Konvention: passt
+``out`` nicht (Shape/dtype), wird ein neues Array angelegt – es zählt
+immer der Rückgabewert.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from typing import DefaultDict, Dict, List, Tuple
+
+import numpy as np
+
+BufferKey = Tuple[Tuple[int, ...], np.dtype]
+
+MAX_FREE_PER_KEY = 8  # Obergrenze freier Puffer je Shape (z.B. nach Auflösungswechsel)
+
+
+def _key(shape: Tuple[int, ...], dtype) -> BufferKey:
+    return tuple(int(s) for s in shape), np.dtype(dtype)
+
+
+def fits(buf: np.ndarray | None, shape: Tuple[int, ...], dtype=np.uint8) -> bool:
+    """True, wenn ``buf`` als ``out`` für ein Ergebnis (shape, dtype) taugt."""
+    return (
+        buf is not None
+        and buf.shape == tuple(shape)
+        and buf.dtype == np.dtype(dtype)
+        and buf.flags.c_contiguous
+    )
+
+
+class BufferPool:
+    """Thread-sicherer Pool wiederverwendbarer Arrays, gruppiert nach (Shape, dtype)."""
+
+    def __init__(self, max_free_per_key: int = MAX_FREE_PER_KEY):
+        self.max_free_per_key = max_free_per_key
+        self._lock = threading.Lock()
+        self._free: DefaultDict[BufferKey, List[np.ndarray]] = defaultdict(list)
+        self._scratch: Dict[str, np.ndarray] = {}
+
+        # Metriken: bleibt ``allocations`` im Betrieb konstant, gibt es keinen Churn
+        self.allocations = 0
+        self.reuses = 0
+
+    # -------------------------
+    # Zwischenpuffer
+    # -------------------------
+
+    def scratch(self, name: str, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """Benannter Zwischenpuffer; wird nur bei geänderter Shape/dtype neu angelegt."""
+        buf = self._scratch.get(name)
+        if fits(buf, shape, dtype):
+            self.reuses += 1
+            return buf
+        buf = np.empty(shape, dtype=dtype)
+        self._scratch[name] = buf
+        self.allocations += 1
+        return buf
+
+    # -------------------------
+    # Weitergereichte Puffer
+    # -------------------------
+
+    def acquire(self, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """Freien Puffer holen (oder neu anlegen). Inhalt ist undefiniert."""
+        key = _key(shape, dtype)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                self.reuses += 1
+                return free.pop()
+            self.allocations += 1
+        return np.empty(key[0], dtype=key[1])
+
+    def release(self, buf: np.ndarray | None) -> None:
+        """Gibt einen mit ``acquire`` geholten Puffer zurück (None wird ignoriert)."""
+        if buf is None or buf.base is not None:
+            # Views gehören nicht dem Pool
+            return
+        key = _key(buf.shape, buf.dtype)
+        with self._lock:
+            free = self._free[key]
+            if len(free) < self.max_free_per_key and not any(b is buf for b in free):
+                free.append(buf)
+
+    def clear(self) -> None:
+        """Verwirft alle freien Puffer und Zwischenpuffer (z.B. beim Stoppen des Live-Modus)."""
+        with self._lock:
+            self._free.clear()
+            self._scratch.clear()
+
+
+if __name__ == "__main__":
+    # Mini-Selbsttest
+    pool = BufferPool()
+    a = pool.acquire((480, 640, 3))
+    b = pool.acquire((480, 640, 3))
+    assert a is not b
+    pool.release(a)
+    assert pool.acquire((480, 640, 3)) is a  # zurückgegebener Puffer wird wiederverwendet
+    pool.release(a)
+    pool.release(a)  # doppeltes Zurückgeben darf den Puffer nicht zweimal ausgeben
+    assert pool.acquire((480, 640, 3)) is a
+    assert pool.acquire((480, 640, 3)) is not a
+
+    s1 = pool.scratch("resize", (224, 224, 3))
+    assert pool.scratch("resize", (224, 224, 3)) is s1
+    assert pool.scratch("resize", (160, 160, 3)) is not s1
+    print(f"Allokationen: {pool.allocations}, wiederverwendet: {pool.reuses}")
@@ -28,15 +28,23 @@ class CameraStream:
         if not self._cap or not self._cap.isOpened():
             raise RuntimeError(f"Kamera {cam_id} konnte nicht geöffnet werden")
 
+        # BGR-Rohbild wird von Frame zu Frame wiederverwendet
+        self._bgr: np.ndarray | None = None
+
         # Optionale Auflösung setzen
         if width is not None:
             self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         if height is not None:
             self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
 
-    def read(self) -> tuple[np.ndarray | None, str]:
+    def read(self, out: np.ndarray | None = None) -> tuple[np.ndarray | None, str]:
         """Liest ein einzelnes Frame aus dem offenen Stream.
 
+        Args:
+            out: optionaler Zielpuffer (H, W, 3) uint8 für das RGB-Bild. Passt
+                die Shape nicht, wird ein neues Array angelegt – maßgeblich
+                ist immer das zurückgegebene Array.
+
         Returns:
             (RGB-Array oder None, Fehlermeldung oder "").
         """
@@ -44,7 +52,7 @@ class CameraStream:
             return None, f"Kamera {self.cam_id} ist nicht geöffnet"
 
         try:
-            ok, frame = self._cap.read()
+            ok, frame = self._cap.read(self._bgr)
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler beim Lesen vom Kamera-Stream {self.cam_id}: {e}")
             return None, f"Fehler beim Lesen vom Kamera-Stream: {e}"
@@ -52,9 +60,12 @@ class CameraStream:
         if not ok or frame is None:
             logger.error(f"Kamera {self.cam_id} liefert kein Bild (Stream)")
             return None, f"Kamera {self.cam_id} liefert kein Bild"
+        self._bgr = frame
 
         try:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if out is not None and out.shape != frame.shape:
+                out = None
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=out)
             return rgb_frame, ""
         except Exception as e:  # noqa: BLE001
             logger.error(f"Fehler bei Farbkonvertierung im Stream: {e}")
@@ -0,0 +1,120 @@
+# core/colormaps.py
+"""
+Vorberechnete Colormap-Lookup-Tabellen (256 × 3, uint8, RGB).
+
+Jede Colormap wird einmalig als Tabelle aufgebaut und danach per
+``np.take`` angewendet – ein Codepfad für alle Modi:
+- OpenCV-Colormaps (viridis, magma, …): OpenCV liefert BGR, die Tabellen
+  werden deshalb einmal nach RGB gedreht
+- Einkanal-Modi "red"/"green"/"blue" (Kurzform "r"/"g"/"b")
+- eigene Verläufe aus der Config, z.B. Hausfarben der Ausstellung:
+  ``"colormaps": {"museum": ["#0b1d3a", "#f2a900", "#ffffff"]}``
+  (Farbstopps gleichmäßig verteilt, von niedriger zu hoher Aktivierung)
+
+Alle Bilder im Projekt sind RGB; die Tabellen liegen daher ebenfalls in
+RGB-Reihenfolge vor.
+"""
+
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import Dict, List, Sequence
+
+import cv2
+import numpy as np
+
+from config.models import BUILTIN_COLORMAPS, COLORMAP_ALIASES, DEFAULT_COLORMAP  # noqa: F401
+from config.service import parse_colormap_stops, validate_custom_colormaps  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+LUT_SIZE = 256
+
+OPENCV_COLORMAPS: Dict[str, int] = {
+    "viridis": cv2.COLORMAP_VIRIDIS,
+    "magma": cv2.COLORMAP_MAGMA,
+    "inferno": cv2.COLORMAP_INFERNO,
+    "plasma": cv2.COLORMAP_PLASMA,
+    "jet": cv2.COLORMAP_JET,
+}
+CHANNEL_COLORMAPS: Dict[str, int] = {"red": 0, "green": 1, "blue": 2}
+
+if list(OPENCV_COLORMAPS) + list(CHANNEL_COLORMAPS) != BUILTIN_COLORMAPS:
+    raise RuntimeError("Eingebaute Colormaps weichen von config.models.BUILTIN_COLORMAPS ab")
+
+def opencv_lut(cv_colormap: int) -> np.ndarray:
+    """LUT einer OpenCV-Colormap, von BGR nach RGB gedreht."""
+    ramp = np.arange(LUT_SIZE, dtype=np.uint8).reshape(LUT_SIZE, 1)
+    bgr = cv2.applyColorMap(ramp, cv_colormap).reshape(LUT_SIZE, 3)
+    return np.ascontiguousarray(bgr[:, ::-1])
+
+
+def channel_lut(channel: int) -> np.ndarray:
+    """LUT, die den Grauwert nur in einen RGB-Kanal schreibt."""
+    lut = np.zeros((LUT_SIZE, 3), dtype=np.uint8)
+    lut[:, channel] = np.arange(LUT_SIZE, dtype=np.uint8)
+    return lut
+
+
+def gradient_lut(stops: Sequence[str]) -> np.ndarray:
+    """Linearer Verlauf durch gleichmäßig verteilte Hex-Farbstopps."""
+    colors = np.array(parse_colormap_stops(stops), dtype=np.float64)
+    positions = np.linspace(0, LUT_SIZE - 1, num=len(colors))
+    ramp = np.arange(LUT_SIZE)
+    lut = np.stack([np.interp(ramp, positions, colors[:, c]) for c in range(3)], axis=1)
+    return np.round(lut).astype(np.uint8)
+
+
+@lru_cache(maxsize=None)
+def _builtin_luts() -> Dict[str, np.ndarray]:
+    luts = {name: opencv_lut(cv_id) for name, cv_id in OPENCV_COLORMAPS.items()}
+    luts.update({name: channel_lut(c) for name, c in CHANNEL_COLORMAPS.items()})
+    for lut in luts.values():
+        lut.setflags(write=False)
+    return luts
+
+
+def build_colormap_luts(custom: Dict[str, List[str]] | None = None) -> Dict[str, np.ndarray]:
+    """
+    Alle verfügbaren LUTs: eingebaute plus eigene aus der Config.
+    Ungültige eigene Colormaps werden mit Warnung übersprungen
+    (``validate_config`` meldet sie bereits beim Laden).
+    """
+    luts = dict(_builtin_luts())
+    for name, stops in (custom or {}).items():
+        key = name.lower()
+        if key in luts:
+            logger.warning(f"Eigene Colormap '{name}' überschreibt keine eingebaute – übersprungen")
+            continue
+        try:
+            luts[key] = gradient_lut(stops)
+        except ValueError as e:
+            logger.warning(f"Eigene Colormap '{name}' ungültig – übersprungen: {e}")
+    return luts
+
+
+def pack_lut(lut: np.ndarray) -> np.ndarray:
+    """
+    (256, 3) uint8 → (256,) uint32 mit RGBA-Bytes; so reicht ein einziges
+    ``np.take`` mit 4-Byte-Elementen statt eines Gathers pro Kanal.
+    """
+    rgba = np.zeros((LUT_SIZE, 4), dtype=np.uint8)
+    rgba[:, :3] = lut
+    return rgba.view(np.uint32).reshape(LUT_SIZE)
+
+
+if __name__ == "__main__":
+    # Mini-Selbsttest
+    luts = build_colormap_luts({"museum": ["#0b1d3a", "#f2a900", "#ffffff"]})
+    gray = np.arange(256, dtype=np.uint8).reshape(16, 16)
+
+    # OpenCV-Tabellen entsprechen applyColorMap, nur in RGB
+    for name, cv_id in OPENCV_COLORMAPS.items():
+        assert np.array_equal(luts[name][gray], cv2.applyColorMap(gray, cv_id)[..., ::-1]), name
+    assert luts["red"][255].tolist() == [255, 0, 0]
+    assert luts["blue"][255].tolist() == [0, 0, 255]
+    assert luts["museum"][0].tolist() == [11, 29, 58]
+    assert luts["museum"][255].tolist() == [255, 255, 255]
+    assert validate_custom_colormaps({"jet": ["#000000", "#ffffff"], "x": ["#zzzzzz", "#000000"]})
+    print(f"{len(luts)} Colormaps: {sorted(luts)}")
@@ -0,0 +1,105 @@
+# core/engine_registry.py
+"""
+Prozessweite Registry für geteilte ModelEngine-Instanzen.
+
+Statt pro Streamlit-Session bzw. pro Kivy-Hilfsfunktion ein eigenes Modell
+zu laden, wird pro Schlüssel (Modell-Config, Device, Precision, aktive Layer)
+genau eine Engine erzeugt und wiederverwendet. Die Inferenz selbst ist in der
+ModelEngine per Lock serialisiert, sodass mehrere Threads (z.B. Streamlit-
+Sessions) dieselbe Engine gefahrlos nutzen können.
+
+Ändert ein Nutzer die Hooks einer geteilten Engine (``set_active_layers``,
+z.B. Kino-Verengung auf die Favoriten-Layer), passt sie nicht mehr zu ihrem
+Schlüssel; sie wird dann beim nächsten Zugriff unter ihren tatsächlichen
+Layern eingetragen, und für den alten Schlüssel entsteht eine neue Engine.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from config.models import ModelConfig
+from core.backbones import get_backbone
+from core.model_engine import ModelEngine
+
+logger = logging.getLogger(__name__)
+
+_engines: Dict[Tuple, ModelEngine] = {}
+_registry_lock = threading.Lock()
+
+
+def model_key(model_cfg: ModelConfig, precision: Optional[str] = None) -> Tuple:
+    """
+    Alle Felder der Modell-Config, die die geladenen Gewichte und die
+    Aktivierungen bestimmen (auch zum Abgleich mit dem Inferenz-Server).
+    """
+    return (
+        model_cfg.name,
+        model_cfg.weights,
+        precision if precision is not None else model_cfg.precision,
+        model_cfg.backend,
+        model_cfg.calibration_dir,
+        model_cfg.artifact_dir,
+        model_cfg.input_size,
+        model_cfg.resize_mode,
+        tuple((m.ui_layer_id, m.model_layer_id) for m in model_cfg.layer_mappings),
+    )
+
+
+def _engine_key(
+    model_cfg: ModelConfig,
+    device: str,
+    precision: str,
+    active_layer_ids: List[str],
+) -> Tuple:
+    """Schlüssel aus allen Feldern, die den Aufbau der Engine beeinflussen."""
+    return model_key(model_cfg, precision) + (device, tuple(active_layer_ids))
+
+
+def get_shared_engine(
+    model_cfg: ModelConfig,
+    device: str = "cpu",
+    precision: Optional[str] = None,
+    active_layer_ids: Optional[List[str]] = None,
+) -> ModelEngine:
+    """
+    Liefert die geteilte Engine für diese Konfiguration; legt sie beim ersten
+    Aufruf an. Gleichzeitige Erstaufrufe warten auf dieselbe Instanz.
+    """
+    precision = precision if precision is not None else model_cfg.precision
+    if active_layer_ids is None:
+        active_layer_ids = get_backbone(model_cfg.name).default_layers
+    layer_ids = list(active_layer_ids)
+    key = _engine_key(model_cfg, device, precision, layer_ids)
+
+    with _registry_lock:
+        engine = _engines.get(key)
+        if engine is not None and list(engine.active_layer_ids) != layer_ids:
+            # Hooks wurden nachträglich geändert → unter den aktuellen Layern führen
+            del _engines[key]
+            _engines.setdefault(key[:-1] + (tuple(engine.active_layer_ids),), engine)
+            engine = _engines.get(key)
+        if engine is None:
+            logger.info(f"Erzeuge geteilte ModelEngine: {model_cfg.name} ({precision}, {device})")
+            engine = ModelEngine(model_cfg, active_layer_ids=layer_ids, device=device, precision=precision)
+            _engines[key] = engine
+        return engine
+
+
+def clear_shared_engines() -> None:
+    """Verwirft alle geteilten Engines (z.B. nach Austausch der Gewichte)."""
+    with _registry_lock:
+        _engines.clear()
+
+
+def release_other_models(model_name: str) -> None:
+    """
+    Verwirft alle Engines anderer Modelle, z.B. nach einem Modellwechsel im
+    Admin. Das neue Modell wird beim nächsten Zugriff lazy geladen.
+    """
+    with _registry_lock:
+        for key in [k for k in _engines if k[0] != model_name]:
+            logger.info(f"Gebe geteilte ModelEngine frei: {key[0]}")
+            del _engines[key]
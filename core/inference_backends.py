@@ -0,0 +1,138 @@
+# core/inference_backends.py
+
+from __future__ import annotations
+
+import copy
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import torch
+import torch.nn as nn
+from torchvision.models.feature_extraction import create_feature_extractor
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBackend:
+    """
+    Basisklasse für Graph-Backends der ModelEngine.
+
+    Ein Backend liefert die Ausgaben der angefragten Layer direkt als Dict,
+    ohne Python-Forward-Hooks. Pro Layer-Kombination wird ein eigener Graph
+    gebaut (und gecacht); dieser endet automatisch nach dem tiefsten
+    angefragten Layer (Early-Exit durch Graph-Pruning).
+
+    Der eager-Modus benötigt kein Backend – die ModelEngine nutzt dann ihre
+    Hooks direkt.
+    """
+
+    name = "base"
+
+    def __init__(self, model: nn.Module, artifact_dir: Path, cache_key: str):
+        # Kopie ohne Hooks: TorchScript/FX würden die Python-Hooks sonst mitnehmen
+        self._model = copy.deepcopy(model).eval()
+        for module in self._model.modules():
+            module._forward_hooks.clear()
+            module._forward_pre_hooks.clear()
+
+        self.artifact_dir = artifact_dir
+        self.cache_key = cache_key
+        self._graphs: Dict[Tuple[str, ...], nn.Module] = {}
+
+    def run(self, x: torch.Tensor, layer_ids: List[str]) -> Dict[str, torch.Tensor]:
+        """Führt den Graph für ``layer_ids`` aus (wird beim ersten Aufruf gebaut)."""
+        key = tuple(sorted(layer_ids))
+        graph = self._graphs.get(key)
+        if graph is None:
+            graph = self._build(key, x)
+            self._graphs[key] = graph
+        return dict(graph(x))
+
+    def _extractor(self, layer_ids: Tuple[str, ...]) -> nn.Module:
+        """FX-Graph, der genau die angefragten Layer-Ausgaben zurückgibt."""
+        return create_feature_extractor(
+            self._model, return_nodes={layer_id: layer_id for layer_id in layer_ids}
+        ).eval()
+
+    def _artifact_path(self, layer_ids: Tuple[str, ...], suffix: str) -> Path:
+        raw = f"{self.cache_key}_{'+'.join(layer_ids)}_torch{torch.__version__}"
+        safe = re.sub(r"[^A-Za-z0-9_.+-]", "_", raw)
+        return self.artifact_dir / f"{safe}{suffix}"
+
+    def _build(self, layer_ids: Tuple[str, ...], example: torch.Tensor) -> nn.Module:
+        raise NotImplementedError
+
+
+class TorchScriptBackend(InferenceBackend):
+    """
+    Eingefrorener TorchScript-Graph (``torch.jit.freeze``) mit
+    ``torch.jit.optimize_for_inference``.
+
+    Gespeichert wird der eingefrorene Graph; die Optimierung (oneDNN-Fusionen)
+    ist nicht serialisierbar und wird nach dem Laden erneut angewendet – das
+    dauert nur einen Bruchteil des Skriptens.
+    """
+
+    name = "torchscript"
+
+    def _build(self, layer_ids: Tuple[str, ...], example: torch.Tensor) -> nn.Module:
+        path = self._artifact_path(layer_ids, ".pt")
+
+        if path.exists():
+            logger.info(f"Lade TorchScript-Artefakt: {path.name}")
+            frozen = torch.jit.load(str(path), map_location="cpu")
+        else:
+            scripted = torch.jit.script(self._extractor(layer_ids))
+            frozen = torch.jit.freeze(scripted)
+            # Probelauf vor dem Speichern, damit kein defekter Graph auf der Platte landet
+            frozen(example)
+            try:
+                self.artifact_dir.mkdir(parents=True, exist_ok=True)
+                torch.jit.save(frozen, str(path))
+                logger.info(f"TorchScript-Artefakt gespeichert: {path.name}")
+            except Exception as e:  # noqa: BLE001
+                logger.warning(f"TorchScript-Artefakt konnte nicht gespeichert werden: {e}")
+
+        return torch.jit.optimize_for_inference(frozen)
+
+
+class CompileBackend(InferenceBackend):
+    """
+    ``torch.compile`` (Inductor) auf dem FX-Feature-Extractor.
+
+    Der Inductor-FX-Graph-Cache liegt im Artefakt-Ordner, sodass ein Neustart
+    die kompilierten Kernel wiederverwendet statt neu zu kompilieren.
+    """
+
+    name = "compile"
+
+    def __init__(self, model: nn.Module, artifact_dir: Path, cache_key: str):
+        super().__init__(model, artifact_dir, cache_key)
+        cache_dir = artifact_dir / "inductor"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(cache_dir))
+        os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+
+    def _build(self, layer_ids: Tuple[str, ...], example: torch.Tensor) -> nn.Module:
+        return torch.compile(self._extractor(layer_ids))
+
+
+BACKENDS = {
+    TorchScriptBackend.name: TorchScriptBackend,
+    CompileBackend.name: CompileBackend,
+}
+
+
+def create_backend(name: str, model: nn.Module, artifact_dir: Path, cache_key: str) -> InferenceBackend | None:
+    """
+    Erzeugt das konfigurierte Backend. Für "eager" wird None zurückgegeben
+    (die ModelEngine nutzt dann ihre Hooks).
+    """
+    if name == "eager":
+        return None
+    if name not in BACKENDS:
+        raise ValueError(f"Unbekanntes Inferenz-Backend: {name}")
+    return BACKENDS[name](model, artifact_dir, cache_key)
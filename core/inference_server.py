@@ -0,0 +1,764 @@
+# core/inference_server.py
+"""
+Optionaler lokaler Inferenz-Server.
+
+Ein eigener Prozess lädt das Modell einmal pro Rechner; Admin-View
+(Streamlit) und Kino-View (Kivy) schicken ihre Frames über einen
+Unix-Socket. Bild- und Aktivierungsdaten laufen dabei nicht über den Socket,
+sondern über ``multiprocessing.shared_memory`` – über den Socket gehen nur
+kleine JSON-Header.
+
+Anfragen mehrerer Clients, die innerhalb eines kurzen Zeitfensters eintreffen,
+werden zu einem Batch zusammengefasst (``ModelEngine.run_inference_batch``).
+
+Start:
+    python -m core.inference_server
+
+Protokoll (je Nachricht: 4 Byte Länge, big-endian + UTF-8-JSON):
+    → {"op": "infer", "shm": name, "shape": [H, W, 3], "layer_ids": [...] | null}
+    ← {"ok": true, "layers": {layer_id: {"shm": name, "offset": n, "shape": [...], "dtype": "float32"}}}
+    → {"op": "layers"}
+    ← {"ok": true, "layers": [...], "model": name, "model_key": [...]}
+    Fehler: {"ok": false, "error": "..."}
+
+Alle Segmente gehören ihrem Erzeuger: Das Eingabebild liegt in einem
+Segment des Clients, die Aktivierungen einer Antwort in einem Segment, das
+der Server pro Verbindung wiederverwendet und beim Verbindungsende freigibt
+(unlink). Der Client kopiert die Aktivierungen vor seiner nächsten Anfrage
+heraus. Stirbt ein Prozess, räumt sein resource_tracker die eigenen Segmente
+auf – es bleibt nichts in /dev/shm liegen.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config.models import ModelConfig, VizPreset
+
+logger = logging.getLogger(__name__)
+
+SOCKET_ENV_VAR = "CNN_EXHIBIT_INFERENCE_SOCKET"
+DEFAULT_SOCKET_PATH = Path(tempfile.gettempdir()) / "cnn_exhibit_inference.sock"
+
+# Client-Timeouts (Sekunden, überschreibbar per Umgebungsvariable). Beim
+# Aufwärmen baut der Server ggf. erst Backend-Graphen (TorchScript/compile)
+# → eigener, großzügigerer Timeout.
+TIMEOUT_ENV_VAR = "CNN_EXHIBIT_INFERENCE_TIMEOUT"
+BUILD_TIMEOUT_ENV_VAR = "CNN_EXHIBIT_INFERENCE_BUILD_TIMEOUT"
+DEFAULT_TIMEOUT_S = 30.0
+DEFAULT_BUILD_TIMEOUT_S = 300.0
+
+MAX_BATCH_SIZE = 8
+BATCH_WINDOW_S = 0.005  # Wartezeit auf weitere Anfragen für einen gemeinsamen Batch
+
+_HEADER = struct.Struct("!I")
+
+
+def get_socket_path() -> Path:
+    """Socket-Pfad (überschreibbar per Umgebungsvariable)."""
+    return Path(os.environ.get(SOCKET_ENV_VAR, str(DEFAULT_SOCKET_PATH)))
+
+
+def _timeout_from_env(env_var: str, default: float) -> float:
+    value = os.environ.get(env_var)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Ungültiger Wert für {env_var}: {value!r} – verwende {default}s")
+        return default
+
+
+def get_client_timeout() -> float:
+    """Timeout je Anfrage (Sekunden)."""
+    return _timeout_from_env(TIMEOUT_ENV_VAR, DEFAULT_TIMEOUT_S)
+
+
+def get_build_timeout() -> float:
+    """Timeout je Aufwärm-Anfrage, während der Server Graphen baut (Sekunden)."""
+    return _timeout_from_env(BUILD_TIMEOUT_ENV_VAR, DEFAULT_BUILD_TIMEOUT_S)
+
+
+def unix_sockets_supported() -> bool:
+    """Unix-Sockets fehlen z.B. in CPython unter Windows."""
+    return hasattr(socket, "AF_UNIX")
+
+
+# ----------------------------------------------------------------------
+# Nachrichten-Framing
+# ----------------------------------------------------------------------
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("Verbindung geschlossen")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _send_msg(sock: socket.socket, msg: Dict[str, Any]) -> None:
+    data = json.dumps(msg).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_msg(sock: socket.socket) -> Dict[str, Any]:
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, length).decode("utf-8"))
+
+
+def _json_key(key: Tuple) -> Any:
+    """Schlüssel so, wie er nach dem JSON-Transport ankommt (Tupel → Listen)."""
+    return json.loads(json.dumps(key))
+
+
+def _attach_shm(name: str) -> shared_memory.SharedMemory:
+    """
+    Öffnet ein fremdes Segment. Python < 3.13 meldet auch geöffnete Segmente
+    beim resource_tracker an, der sie beim Prozessende löschen würde – das
+    Segment gehört aber der Gegenseite, daher wieder abmelden.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")  # noqa: SLF001
+    return shm
+
+
+# ----------------------------------------------------------------------
+# Server
+# ----------------------------------------------------------------------
+
+class _PendingRequest:
+    """Eine Inferenz-Anfrage in der Batch-Warteschlange."""
+
+    def __init__(
+        self,
+        frame: np.ndarray,
+        layer_ids: Optional[List[str]],
+        input_size: Optional[int] = None,
+        resize_mode: Optional[str] = None,
+    ):
+        self.frame = frame
+        self.layer_ids = layer_ids
+        self.input_size = input_size
+        self.resize_mode = resize_mode
+        self.response: Optional[Dict[str, Any]] = None
+        self.arrays: Dict[str, np.ndarray] = {}
+        self.done = threading.Event()
+
+
+class _OutputBuffer:
+    """
+    Shared-Memory-Segment für die Antworten einer Client-Verbindung.
+    Gehört dem Server: wird pro Verbindung wiederverwendet (wächst bei
+    Bedarf) und beim Verbindungsende freigegeben.
+    """
+
+    def __init__(self):
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+    def export(self, arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """Legt alle Arrays hintereinander im Segment ab; Rückgabe: Layer-Metadaten."""
+        arrays = {layer_id: np.ascontiguousarray(arr, dtype=np.float32) for layer_id, arr in arrays.items()}
+        nbytes = sum(arr.nbytes for arr in arrays.values())
+        if self._shm is None or self._shm.size < nbytes:
+            self.release()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+
+        layers: Dict[str, Any] = {}
+        offset = 0
+        for layer_id, arr in arrays.items():
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=self._shm.buf, offset=offset)[...] = arr
+            layers[layer_id] = {
+                "shm": self._shm.name,
+                "offset": offset,
+                "shape": list(arr.shape),
+                "dtype": str(arr.dtype),
+            }
+            offset += arr.nbytes
+        return layers
+
+    def release(self) -> None:
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+class InferenceServer:
+    """Lädt eine geteilte ModelEngine und bedient Clients über einen Unix-Socket."""
+
+    def __init__(
+        self,
+        model_cfg: ModelConfig,
+        socket_path: Optional[Path] = None,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        batch_window_s: float = BATCH_WINDOW_S,
+    ):
+        if not unix_sockets_supported():
+            raise RuntimeError("Unix-Sockets werden auf dieser Plattform nicht unterstützt.")
+
+        from core.engine_registry import get_shared_engine, model_key
+
+        self.engine = get_shared_engine(model_cfg)
+        self.model_key = _json_key(model_key(model_cfg))
+        # Vor dem Öffnen des Sockets aufwärmen: der erste Client bekommt keine Init-Latenz ab
+        self.engine.warmup()
+        self.socket_path = socket_path or get_socket_path()
+        self.max_batch_size = max_batch_size
+        self.batch_window_s = batch_window_s
+
+        self._queue: "queue.Queue[_PendingRequest]" = queue.Queue()
+        self._stop = threading.Event()
+        self._sock: Optional[socket.socket] = None
+
+    # -------------------------
+    # Lebenszyklus
+    # -------------------------
+
+    def serve_forever(self) -> None:
+        """Startet Batch-Worker und Accept-Schleife (blockiert bis ``stop``)."""
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(str(self.socket_path))
+        self._sock.listen()
+        logger.info(f"Inferenz-Server lauscht auf {self.socket_path}")
+
+        threading.Thread(target=self._batch_worker, name="inference-batcher", daemon=True).start()
+
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn, _ = self._sock.accept()
+                except OSError:
+                    break
+                threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+        if self.socket_path.exists():
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+    # -------------------------
+    # Client-Verbindungen
+    # -------------------------
+
+    def _handle_client(self, conn: socket.socket) -> None:
+        output = _OutputBuffer()
+        try:
+            with conn:
+                while not self._stop.is_set():
+                    try:
+                        msg = _recv_msg(conn)
+                    except (ConnectionError, OSError):
+                        return
+
+                    try:
+                        response = self._dispatch(msg, output)
+                    except Exception as e:  # noqa: BLE001
+                        logger.error(f"Fehler bei Server-Anfrage: {e}")
+                        response = {"ok": False, "error": str(e)}
+
+                    try:
+                        _send_msg(conn, response)
+                    except OSError:
+                        return
+        finally:
+            output.release()
+
+    def _dispatch(self, msg: Dict[str, Any], output: _OutputBuffer) -> Dict[str, Any]:
+        op = msg.get("op")
+        if op == "layers":
+            return {
+                "ok": True,
+                "layers": self.engine.get_active_layers(),
+                "model": self.engine.model_cfg.name,
+                "model_key": self.model_key,
+            }
+        if op != "infer":
+            return {"ok": False, "error": f"Unbekannte Operation: {op}"}
+
+        # Ungültige Layer nur für diese Anfrage ablehnen, bevor sie einen Batch mit anderen teilt
+        layer_ids = msg.get("layer_ids")
+        if layer_ids is not None:
+            active = set(self.engine.get_active_layers())
+            unknown = [layer_id for layer_id in layer_ids if layer_id not in active]
+            if unknown:
+                return {"ok": False, "error": f"Kein aktiver (gehookter) Layer: {', '.join(map(str, unknown))}"}
+
+        shm = _attach_shm(msg["shm"])
+        try:
+            frame = np.ndarray(tuple(msg["shape"]), dtype=np.uint8, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+
+        request = _PendingRequest(
+            frame,
+            layer_ids,
+            input_size=msg.get("input_size"),
+            resize_mode=msg.get("resize_mode"),
+        )
+        self._queue.put(request)
+        request.done.wait()
+        if not request.response.get("ok"):
+            return request.response
+        # Erst nach vollständigem Erfolg ins Segment dieser Verbindung schreiben
+        return {"ok": True, "layers": output.export(request.arrays)}
+
+    # -------------------------
+    # Batching
+    # -------------------------
+
+    def _collect_batch(self) -> List[_PendingRequest]:
+        first = self._queue.get()
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _batch_worker(self) -> None:
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            try:
+                self._run_batch(batch)
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"Fehler bei Batch-Inferenz: {e}")
+                for request in batch:
+                    if request.response is None:
+                        request.response = {"ok": False, "error": str(e)}
+            finally:
+                for request in batch:
+                    request.done.set()
+
+    def _run_batch(self, batch: List[_PendingRequest]) -> None:
+        # Nur Anfragen mit gleicher Netz-Eingabegröße teilen sich einen Forward-Pass
+        groups: Dict[Tuple[int, int], List[_PendingRequest]] = {}
+        for request in batch:
+            try:
+                shape = self.engine.get_input_shape(request.frame.shape, request.input_size, request.resize_mode)
+            except Exception as e:  # noqa: BLE001
+                request.response = {"ok": False, "error": str(e)}
+                continue
+            groups.setdefault(shape, []).append(request)
+
+        for group in groups.values():
+            try:
+                self._run_group(group)
+            except Exception as e:  # noqa: BLE001
+                if len(group) == 1:
+                    group[0].response = {"ok": False, "error": str(e)}
+                    continue
+                # Fehler einer Anfrage darf die anderen nicht mitreißen → einzeln wiederholen
+                logger.warning(f"Batch-Inferenz fehlgeschlagen ({e}), Anfragen werden einzeln gerechnet")
+                for request in group:
+                    try:
+                        self._run_group([request])
+                    except Exception as single_error:  # noqa: BLE001
+                        request.response = {"ok": False, "error": str(single_error)}
+
+    def _run_group(self, batch: List[_PendingRequest]) -> None:
+        active = self.engine.get_active_layers()
+        per_request = [r.layer_ids if r.layer_ids is not None else active for r in batch]
+        union = list(dict.fromkeys(layer_id for ids in per_request for layer_id in ids))
+
+        result = self.engine.run_inference_batch(
+            [r.frame for r in batch],
+            layer_ids=union,
+            input_size=batch[0].input_size,
+            resize_mode=batch[0].resize_mode,
+        )
+
+        for i, (request, layer_ids) in enumerate(zip(batch, per_request)):
+            frame_result = result.frame(i)
+            request.arrays = {layer_id: frame_result[layer_id] for layer_id in layer_ids}
+            request.response = {"ok": True}
+
+
+# ----------------------------------------------------------------------
+# Client
+# ----------------------------------------------------------------------
+
+class InferenceClient:
+    """
+    Client für den lokalen Inferenz-Server.
+
+    Bietet dieselbe Schnittstelle wie ModelEngine für die UIs
+    (``run_inference`` mit ``ActivationResult``, ``run_inference_map``,
+    ``get_active_layers``, ``warmup``), sodass Kino- und Admin-View ohne
+    Sonderfälle zwischen lokaler Engine und Server wechseln können.
+
+    Bei einem Verbindungsfehler oder Timeout wird die Verbindung verworfen –
+    eine verspätete Antwort darf nie der nächsten Anfrage zugeordnet werden.
+    Mit ``fallback_cfg`` rechnet der Client danach mit der lokalen geteilten
+    Engine weiter, sonst wirft er ``ConnectionError``.
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[Path] = None,
+        timeout: Optional[float] = None,
+        fallback_cfg: Optional[ModelConfig] = None,
+    ):
+        self.socket_path = socket_path or get_socket_path()
+        self.timeout = timeout if timeout is not None else get_client_timeout()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(self.timeout)
+        self._sock.connect(str(self.socket_path))
+        self._closed = False
+        self._fallback_cfg = fallback_cfg
+        self._local_engine = None
+        self._lock = threading.Lock()
+        self._frame_shm: Optional[shared_memory.SharedMemory] = None
+        self._result_shm: Optional[shared_memory.SharedMemory] = None
+        self._layers: Optional[List[str]] = None
+        self._model_name: Optional[str] = None
+        self._model_key: Optional[Any] = None
+
+    @property
+    def closed(self) -> bool:
+        """True, sobald die Verbindung geschlossen bzw. nach einem Fehler verworfen wurde."""
+        return self._closed
+
+    def _request(self, msg: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Eine Anfrage/Antwort; Aufrufer hält ``self._lock``."""
+        if self._closed:
+            raise ConnectionError("Verbindung zum Inferenz-Server ist geschlossen")
+        try:
+            if timeout is not None:
+                self._sock.settimeout(timeout)
+            _send_msg(self._sock, msg)
+            response = _recv_msg(self._sock)
+            if timeout is not None:
+                self._sock.settimeout(self.timeout)
+        except OSError as e:  # inkl. socket.timeout und ConnectionError
+            self._invalidate()
+            raise ConnectionError(f"Inferenz-Server nicht erreichbar: {e}") from e
+        if not response.get("ok"):
+            raise RuntimeError(f"Inferenz-Server: {response.get('error')}")
+        return response
+
+    def _frame_buffer(self, nbytes: int) -> shared_memory.SharedMemory:
+        """Wiederverwendetes Segment für Eingabebilder (wächst bei Bedarf)."""
+        if self._frame_shm is None or self._frame_shm.size < nbytes:
+            self._release_frame_buffer()
+            self._frame_shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        return self._frame_shm
+
+    def _release_frame_buffer(self) -> None:
+        if self._frame_shm is not None:
+            self._frame_shm.close()
+            self._frame_shm.unlink()
+            self._frame_shm = None
+
+    def _result_buffer(self, name: str) -> shared_memory.SharedMemory:
+        """Ausgabe-Segment des Servers (bleibt geöffnet, solange der Server es weiterverwendet)."""
+        if self._result_shm is None or self._result_shm.name != name:
+            self._release_result_buffer()
+            self._result_shm = _attach_shm(name)
+        return self._result_shm
+
+    def _release_result_buffer(self) -> None:
+        if self._result_shm is not None:
+            self._result_shm.close()
+            self._result_shm = None
+
+    def _invalidate(self) -> None:
+        """Verbindung und Puffer verwerfen (ohne Lock, Aufrufer hält ihn ggf.)."""
+        self._closed = True
+        self._release_frame_buffer()
+        self._release_result_buffer()
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    def _fall_back(self, error: ConnectionError):
+        """Lokale Engine nach einem Verbindungsfehler (ohne ``fallback_cfg``: Fehler weiterreichen)."""
+        if self._fallback_cfg is None:
+            raise error
+        if self._local_engine is None:
+            logger.warning(f"{error} – verwende lokale Engine")
+            from core.engine_registry import get_shared_engine
+
+            self._local_engine = get_shared_engine(self._fallback_cfg)
+        return self._local_engine
+
+    def _fetch_model_info(self) -> None:
+        with self._lock:
+            response = self._request({"op": "layers"})
+        self._layers = response["layers"]
+        self._model_name = response.get("model")
+        self._model_key = response.get("model_key")
+
+    def get_active_layers(self) -> List[str]:
+        if self._local_engine is not None:
+            return self._local_engine.get_active_layers()
+        if self._layers is None:
+            try:
+                self._fetch_model_info()
+            except ConnectionError as e:
+                return self._fall_back(e).get_active_layers()
+        return self._layers
+
+    def get_model_name(self) -> Optional[str]:
+        """Name des Modells, das der Server geladen hat."""
+        if self._layers is None:
+            self._fetch_model_info()
+        return self._model_name
+
+    def get_model_key(self) -> Optional[Any]:
+        """``engine_registry.model_key`` der Server-Config (JSON-Form), None bei älteren Servern."""
+        if self._layers is None:
+            self._fetch_model_info()
+        return self._model_key
+
+    def run_inference(
+        self,
+        np_image: np.ndarray,
+        layer_ids: Optional[Iterable[str]] = None,
+        bgr: bool = False,
+        input_size: Optional[int] = None,
+        resize_mode: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Schickt ein Bild (H, W, 3) an den Server; Parameter und Rückgabe
+        (``ActivationResult``) wie ``ModelEngine.run_inference``.
+        bgr: OpenCV-Frame – wird beim Kopieren ins Shared Memory nach RGB gedreht.
+        timeout: abweichender Timeout für diese Anfrage (z.B. beim Aufwärmen).
+        """
+        if self._local_engine is not None:
+            return self._local_engine.run_inference(
+                np_image, layer_ids=layer_ids, bgr=bgr, input_size=input_size, resize_mode=resize_mode
+            )
+        try:
+            return self._run_remote(np_image, layer_ids, bgr, input_size, resize_mode, timeout)
+        except ConnectionError as e:
+            return self._fall_back(e).run_inference(
+                np_image, layer_ids=layer_ids, bgr=bgr, input_size=input_size, resize_mode=resize_mode
+            )
+
+    def run_inference_map(
+        self,
+        np_image: np.ndarray,
+        preset: VizPreset,
+        layer_id: Optional[str] = None,
+        bgr: bool = False,
+        input_size: Optional[int] = None,
+        resize_mode: Optional[str] = None,
+        out: Optional[np.ndarray] = None,
+        reducer=None,
+    ) -> np.ndarray:
+        """
+        Wie ``ModelEngine.run_inference_map``: Graustufen-Map (H, W) uint8.
+        Der Server liefert nur die Aktivierung des einen Layers; Channel-
+        Auswahl, Reduktion und Normalisierung laufen hier in torch.
+        """
+        if self._local_engine is not None:
+            return self._local_engine.run_inference_map(
+                np_image, preset, layer_id=layer_id, bgr=bgr, input_size=input_size,
+                resize_mode=resize_mode, out=out, reducer=reducer,
+            )
+
+        import torch
+
+        from core.buffer_pool import fits
+        from core.torch_reduction import reduce_to_gray
+
+        layer_id = layer_id if layer_id is not None else preset.layer_id
+        result = self.run_inference(
+            np_image, layer_ids=[layer_id], bgr=bgr, input_size=input_size, resize_mode=resize_mode
+        )
+        if reducer is None:
+            reducer = functools.partial(reduce_to_gray, preset=preset)
+        activation = result.get_tensor(layer_id)
+        target = torch.from_numpy(out) if fits(out, tuple(activation.shape[-2:])) else None
+        gray = reducer(activation, out=target)
+        return out if target is not None else gray.cpu().numpy()
+
+    def _run_remote(
+        self,
+        np_image: np.ndarray,
+        layer_ids: Optional[Iterable[str]],
+        bgr: bool,
+        input_size: Optional[int],
+        resize_mode: Optional[str],
+        timeout: Optional[float],
+    ):
+        import torch
+
+        from core.model_engine import ActivationResult
+
+        if np_image.dtype != np.uint8:
+            np_image = np.clip(np_image, 0, 255).astype(np.uint8)
+
+        with self._lock:
+            shm = self._frame_buffer(np_image.nbytes)
+            # Kopie ins Shared Memory; ein BGR-Frame wird dabei gleich nach RGB gedreht
+            np.ndarray(np_image.shape, dtype=np.uint8, buffer=shm.buf)[...] = np_image[..., ::-1] if bgr else np_image
+            response = self._request(
+                {
+                    "op": "infer",
+                    "shm": shm.name,
+                    "shape": list(np_image.shape),
+                    "layer_ids": list(layer_ids) if layer_ids is not None else None,
+                    "input_size": input_size,
+                    "resize_mode": resize_mode,
+                },
+                timeout=timeout,
+            )
+
+            # Der Server überschreibt das Segment bei der nächsten Anfrage → noch unter dem Lock kopieren
+            tensors = {}
+            for layer_id, meta in response["layers"].items():
+                seg = self._result_buffer(meta["shm"])
+                tensors[layer_id] = torch.from_numpy(
+                    np.ndarray(tuple(meta["shape"]), dtype=meta["dtype"], buffer=seg.buf, offset=meta["offset"]).copy()
+                )
+        return ActivationResult(tensors)
+
+    def warmup(
+        self,
+        layer_ids: Optional[Iterable[str]] = None,
+        input_sizes: Optional[Iterable[Optional[int]]] = None,
+        iterations: int = 1,
+        presets: Optional[Iterable[VizPreset]] = None,
+    ) -> float:
+        """
+        Wie ``ModelEngine.warmup``: wärmt Verbindung, Shared Memory und
+        Server-Graphen auf (mit ``get_build_timeout()`` je Anfrage), danach
+        die clientseitige Reduktion von ``run_inference_map``.
+        """
+        start = time.perf_counter()
+        build_timeout = get_build_timeout()
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)  # typisches Kamera-Frame
+        layer_sets = [None] if layer_ids is None else [[layer_id] for layer_id in dict.fromkeys(layer_ids)]
+        if presets is None:
+            map_layers = dict.fromkeys(layer_ids) if layer_ids is not None else self.get_active_layers()
+            presets = [VizPreset(id="warmup", layer_id=layer_id) for layer_id in map_layers]
+        else:
+            presets = list(presets)
+        for size in (list(dict.fromkeys(input_sizes)) if input_sizes is not None else [None]):
+            for layer_set in layer_sets:
+                for _ in range(iterations):
+                    self.run_inference(frame, layer_ids=layer_set, input_size=size, timeout=build_timeout)
+            for preset in presets:
+                for _ in range(iterations):
+                    self.run_inference_map(frame, preset, input_size=size)
+        return time.perf_counter() - start
+
+    def close(self) -> None:
+        with self._lock:
+            self._invalidate()
+
+
+def connect_inference_client(
+    socket_path: Optional[Path] = None,
+    fallback_cfg: Optional[ModelConfig] = None,
+) -> Optional[InferenceClient]:
+    """Verbindet zum Server, falls er läuft; sonst None (→ lokale Engine verwenden)."""
+    if not unix_sockets_supported():
+        return None
+    path = socket_path or get_socket_path()
+    if not path.exists():
+        return None
+    try:
+        return InferenceClient(path, fallback_cfg=fallback_cfg)
+    except OSError as e:
+        logger.debug(f"Inferenz-Server unter {path} nicht erreichbar: {e}")
+        return None
+
+
+_shared_client: Optional[InferenceClient] = None
+_shared_client_lock = threading.Lock()
+_warned_mismatch: Optional[Tuple[str, str]] = None
+
+
+def get_engine_or_client(model_cfg: ModelConfig):
+    """
+    Liefert einen (prozessweit geteilten) Client, wenn der Inferenz-Server
+    läuft und dieselbe Modell-Config geladen hat (Modell, Gewichte, Precision,
+    Backend, Eingabegröße, … wie ``engine_registry.model_key``), sonst die
+    lokale geteilte ModelEngine.
+    """
+    global _shared_client, _warned_mismatch
+    from core.engine_registry import get_shared_engine, model_key
+
+    with _shared_client_lock:
+        if _shared_client is not None and (_shared_client.closed or not _shared_client.socket_path.exists()):
+            # Server wurde beendet bzw. Verbindung nach Fehler/Timeout verworfen
+            _shared_client.close()
+            _shared_client = None
+        if _shared_client is None:
+            _shared_client = connect_inference_client(fallback_cfg=model_cfg)
+        if _shared_client is not None:
+            try:
+                server_key = _shared_client.get_model_key()
+            except (OSError, ConnectionError, RuntimeError) as e:
+                logger.warning(f"Inferenz-Server antwortet nicht – verwende lokale Engine: {e}")
+                _shared_client.close()
+                _shared_client = None
+                server_key = None
+            # Nach einer Änderung im Admin (Modell, Gewichte, Precision, …) lädt die
+            # lokale Engine die neue Config, bis der Server neu gestartet wurde
+            if _shared_client is not None:
+                local_key = _json_key(model_key(model_cfg))
+                if server_key == local_key:
+                    _shared_client._fallback_cfg = model_cfg  # noqa: SLF001
+                    return _shared_client
+                mismatch = (json.dumps(server_key), json.dumps(local_key))
+                if mismatch != _warned_mismatch:
+                    _warned_mismatch = mismatch
+                    logger.warning(
+                        f"Inferenz-Server nutzt eine andere Modell-Config ({server_key}) als angefordert "
+                        f"({local_key}) – verwende lokale Engine; Server neu starten, um ihn zu nutzen."
+                    )
+
+    return get_shared_engine(model_cfg)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    from config.service import load_config
+
+    server = InferenceServer(load_config().model)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,397 @@
+# core/live_pipeline.py
+"""
+Threaded Live-Pipeline für den Kino-Modus:
+
+    Kamera-Worker ──(Queue, drop-oldest)──▶ Compute-Worker ──(Slot: neuestes Bild)──▶ UI
+
+- Der Kamera-Worker liest fortlaufend Frames und legt sie in eine kleine
+  Queue; ist sie voll, wird das älteste Frame verworfen.
+- Der Compute-Worker führt Inferenz + Visualisierung so schnell aus, wie
+  die CPU es erlaubt, und legt jeweils nur das neueste fertige Bild ab.
+- Ein ``SceneChangeGate`` vor der Inferenz überspringt Frames, in denen
+  sich die Szene kaum geändert hat; angezeigt bleibt dann das zuletzt
+  gerenderte Bild.
+- Ein optionaler ``LiveHeatmapSmoother`` ersetzt die zustandslose
+  Reduktion: geglättete Heatmap, geglätteter Normalisierungsbereich und
+  seltener neu bestimmte Top-K-Channels gegen Flackern.
+- Mit ``output_size`` (Größe des Anzeige-Widgets) wird direkt in
+  Anzeigegröße gerendert: Map einmal hochskalieren, Colormap und Overlay
+  in voller Auflösung, Seitenverhältnis des Kamerabilds bleibt erhalten.
+- Der UI-Thread holt per ``take_latest()`` nur noch das neueste Bild ab
+  und blittet es – er blockiert nie auf Kamera oder Modell.
+- Kamera- und Ergebnisbilder stammen aus einem ``BufferPool``: ein Puffer
+  geht erst zurück in den Pool, wenn das Frame verarbeitet, verworfen bzw.
+  durch das nächste angezeigte Bild ersetzt wurde. Im eingeschwungenen
+  Zustand wird pro Frame nichts mehr neu allokiert.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Deque, Optional, Tuple
+
+import numpy as np
+
+from config.models import VizPreset
+from core.buffer_pool import BufferPool
+from core.camera_service import CameraStream
+from core.scene_gate import SceneChangeGate
+from core.viz_engine import DEFAULT_INTERPOLATION, RenderPlan, VizEngine
+
+if TYPE_CHECKING:
+    # torch erst laden, wenn die Kino-App den Smoother tatsächlich erzeugt
+    from core.live_smoothing import LiveHeatmapSmoother
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_QUEUE_SIZE = 2
+LATE_FRAME_THRESHOLD_S = 0.1  # Kamera→Anzeige-Latenz, ab der ein Frame als verspätet zählt
+
+
+class LatestQueue:
+    """
+    Thread-sichere, begrenzte Queue mit Drop-Oldest-Verhalten.
+    ``put`` blockiert nie; ist die Queue voll, fällt das älteste Element heraus.
+    """
+
+    def __init__(self, maxsize: int = CAPTURE_QUEUE_SIZE):
+        self._items: Deque[Any] = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item: Any) -> Any | None:
+        """Legt ``item`` ab; gibt das dabei verworfene älteste Element zurück (sonst None)."""
+        dropped = None
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                dropped = self._items.popleft()
+            self._items.append(item)
+            self._cond.notify()
+        return dropped
+
+    def get(self, timeout: float | None = None) -> Any | None:
+        """Ältestes Element oder None (Timeout bzw. Queue geschlossen)."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+@dataclass
+class CapturedFrame:
+    seq: int
+    image: np.ndarray
+    captured_at: float
+
+
+@dataclass
+class RenderedFrame:
+    seq: int
+    image: np.ndarray
+    captured_at: float
+    rendered_at: float
+
+
+@dataclass
+class PipelineStats:
+    captured: int = 0        # von der Kamera gelesene Frames
+    processed: int = 0       # durch Inferenz + Visualisierung gelaufene Frames
+    displayed: int = 0       # vom UI-Thread abgeholte Frames
+    dropped: int = 0         # vor der Inferenz verworfene Kamera-Frames (Queue voll)
+    skipped: int = 0         # fertig gerenderte, aber nie angezeigte Frames
+    gated: int = 0           # Frames ohne Inferenz, weil sich die Szene nicht geändert hat
+    late: int = 0            # angezeigte Frames mit Latenz > LATE_FRAME_THRESHOLD_S
+    inference_fps: float = 0.0
+
+    @property
+    def gate_skip_ratio(self) -> float:
+        """Anteil der vom Compute-Worker geprüften Frames, die ohne Inferenz auskamen."""
+        total = self.processed + self.gated
+        return self.gated / total if total else 0.0
+
+
+class LivePipeline:
+    """Kamera → Inferenz/Visualisierung → neuestes Bild, in getrennten Threads."""
+
+    def __init__(
+        self,
+        camera_stream: CameraStream,
+        model_engine: Any,
+        viz_engine: VizEngine,
+        viz_preset: VizPreset,
+        layer_id: str,
+        late_threshold_s: float = LATE_FRAME_THRESHOLD_S,
+        scene_gate: Optional[SceneChangeGate] = None,
+        input_size: Optional[int] = None,
+        render_plan: Optional[RenderPlan] = None,
+        smoother: Optional[LiveHeatmapSmoother] = None,
+        output_size: Optional[Tuple[int, int]] = None,
+        interpolation: str = DEFAULT_INTERPOLATION,
+    ):
+        self.camera_stream = camera_stream
+        self.model_engine = model_engine
+        self.viz_engine = viz_engine
+        self.viz_preset = viz_preset
+        # Preset einmal kompilieren; pro Frame läuft nur noch der Plan
+        self.render_plan = render_plan if render_plan is not None else viz_engine.compile(viz_preset)
+        self.layer_id = layer_id
+        self.late_threshold_s = late_threshold_s
+        self.scene_gate = scene_gate
+        self.input_size = input_size  # None = Eingabegröße aus der Modell-Config
+        self.smoother = smoother      # None = jedes Frame unabhängig reduzieren
+        # (Breite, Höhe) der Anzeigefläche, darf vom UI-Thread jederzeit
+        # aktualisiert werden; None = in Map-Größe rendern
+        self.output_size = output_size
+        self.interpolation = interpolation
+
+        self.stats = PipelineStats()
+        self.error: Optional[str] = None
+
+        self._frames = LatestQueue(CAPTURE_QUEUE_SIZE)
+        self._result_lock = threading.Lock()
+        self._latest: Optional[RenderedFrame] = None
+        self._latest_taken = True
+        self._displayed: Optional[RenderedFrame] = None  # zuletzt vom UI abgeholtes Bild
+
+        # Wiederverwendete Puffer: Kamera-Frames, Graustufen-Map, gerenderte Bilder
+        self.buffers = BufferPool()
+        self._gray: Optional[np.ndarray] = None
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        # Puffer (und ggf. Kamera) erst freigeben, wenn kein Worker mehr läuft
+        self._workers_lock = threading.Lock()
+        self._running_workers = 0
+        self._release_camera = False
+        self._camera_released = False
+
+    # -------------------------
+    # Steuerung
+    # -------------------------
+
+    def start(self) -> None:
+        self._threads = [
+            threading.Thread(target=self._run_worker, args=(self._capture_loop,), name="live-capture", daemon=True),
+            threading.Thread(target=self._run_worker, args=(self._compute_loop,), name="live-compute", daemon=True),
+        ]
+        with self._workers_lock:
+            self._running_workers = len(self._threads)
+        for t in self._threads:
+            t.start()
+
+    def stop(self, timeout: float = 2.0, release_camera: bool = False) -> bool:
+        """
+        Beendet beide Worker und gibt die Puffer frei.
+        release_camera: Kamera-Stream mit freigeben, sobald kein Worker mehr läuft
+                        (der Aufrufer darf ihn dann selbst nicht mehr anfassen).
+        Gibt False zurück, wenn ein Worker nach ``timeout`` noch läuft (z.B. in
+        der Inferenz blockiert); Puffer und Kamera gibt dann der letzte Worker
+        beim Beenden frei.
+        """
+        with self._workers_lock:
+            self._release_camera = self._release_camera or release_camera
+        self._stop.set()
+        self._frames.close()
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join(timeout)
+        self._threads = []
+
+        with self._workers_lock:
+            running = self._running_workers
+        if running:
+            logger.warning(
+                f"Live-Pipeline: {running} Worker laufen noch – Puffer werden beim Beenden freigegeben"
+            )
+            return False
+        self._release_resources()
+        return True
+
+    @property
+    def running(self) -> bool:
+        return not self._stop.is_set()
+
+    def take_latest(self) -> Optional[RenderedFrame]:
+        """
+        Neuestes fertiges Bild, falls seit dem letzten Aufruf ein neues vorliegt.
+        Das Bild bleibt bis zum nächsten Aufruf gültig (danach wird sein
+        Puffer wiederverwendet) – also direkt blitten bzw. kopieren.
+        """
+        with self._result_lock:
+            if self._latest is None or self._latest_taken:
+                return None
+            self._latest_taken = True
+            frame = self._latest
+            previous, self._displayed = self._displayed, frame
+
+        if previous is not None:
+            self.buffers.release(previous.image)
+
+        self.stats.displayed += 1
+        if time.monotonic() - frame.captured_at > self.late_threshold_s:
+            self.stats.late += 1
+        return frame
+
+    # -------------------------
+    # Worker
+    # -------------------------
+
+    def _run_worker(self, loop) -> None:
+        try:
+            loop()
+        finally:
+            with self._workers_lock:
+                self._running_workers -= 1
+                last = self._running_workers == 0
+            if last and self._stop.is_set():
+                self._release_resources()
+
+    def _release_resources(self) -> None:
+        """Puffer (und ggf. Kamera) freigeben; erst aufrufen, wenn kein Worker mehr läuft."""
+        with self._workers_lock:
+            release_camera = self._release_camera and not self._camera_released
+            self._camera_released = self._camera_released or release_camera
+        self.buffers.clear()
+        if release_camera:
+            self.camera_stream.release()
+
+    def _fail(self, message: str) -> None:
+        logger.error(message)
+        self.error = message
+        self._stop.set()
+        self._frames.close()
+
+    def _capture_loop(self) -> None:
+        seq = 0
+        frame_shape: Optional[tuple] = None
+        while not self._stop.is_set():
+            buf = self.buffers.acquire(frame_shape) if frame_shape is not None else None
+            img, err = self.camera_stream.read(out=buf)
+            if img is None:
+                self._fail(f"Kamera-Fehler: {err}")
+                return
+            if img is not buf:
+                # Erstes Frame oder geänderte Auflösung: Puffer dieser Shape künftig aus dem Pool
+                frame_shape = img.shape
+            seq += 1
+            self.stats.captured += 1
+            dropped = self._frames.put(CapturedFrame(seq=seq, image=img, captured_at=time.monotonic()))
+            if dropped is not None:
+                self.buffers.release(dropped.image)
+            self.stats.dropped = self._frames.dropped
+
+    def _compute_loop(self) -> None:
+        window_start = time.monotonic()
+        window_count = 0
+
+        while not self._stop.is_set():
+            captured = self._frames.get(timeout=0.5)
+            if captured is None:
+                continue
+
+            # Szene unverändert → letztes gerendertes Bild bleibt stehen
+            if self.scene_gate is not None and not self.scene_gate.should_process(captured.image):
+                self.stats.gated += 1
+                self.buffers.release(captured.image)
+                continue
+
+            try:
+                vis_img = self._process(captured.image)
+            except Exception as e:  # noqa: BLE001
+                self._fail(f"Fehler bei Inferenz/Visualisierung: {e}")
+                return
+            finally:
+                self.buffers.release(captured.image)
+
+            rendered = RenderedFrame(
+                seq=captured.seq,
+                image=vis_img,
+                captured_at=captured.captured_at,
+                rendered_at=time.monotonic(),
+            )
+            with self._result_lock:
+                replaced = None
+                if not self._latest_taken:
+                    self.stats.skipped += 1
+                    replaced = self._latest
+                self._latest = rendered
+                self._latest_taken = False
+            if replaced is not None:
+                # Nie angezeigt → Puffer sofort wieder frei
+                self.buffers.release(replaced.image)
+
+            self.stats.processed += 1
+            window_count += 1
+            elapsed = rendered.rendered_at - window_start
+            if elapsed >= 1.0:
+                self.stats.inference_fps = window_count / elapsed
+                window_start = rendered.rendered_at
+                window_count = 0
+
+    def _process(self, img: np.ndarray) -> np.ndarray:
+        """Inferenz + Visualisierung für ein Kamera-Frame."""
+        original = img if self.viz_preset.overlay else None
+        output_size = _fit_size(img.shape, self.output_size) if self.output_size is not None else None
+
+        # Reduktion fusioniert: lokal im Hook, beim Server-Client direkt nach dem Empfang;
+        # zurück kommt nur die H×W-Map
+        run_map = getattr(self.model_engine, "run_inference_map", None)
+        if run_map is not None:
+            self._gray = run_map(
+                img,
+                self.viz_preset,
+                layer_id=self.layer_id,
+                input_size=self.input_size,
+                out=self._gray,
+                reducer=self.smoother,
+            )
+            return self._render_gray(self._gray, original, output_size)
+
+        acts = self.model_engine.run_inference(img, layer_ids=[self.layer_id], input_size=self.input_size)
+        if self.layer_id not in acts:
+            raise KeyError(f"Layer nicht gefunden: {self.layer_id}")
+
+        activation = acts[self.layer_id]
+        if self.smoother is not None:
+            self._gray = self.smoother.reduce_array(activation, out=self._gray)
+            return self._render_gray(self._gray, original, output_size)
+        out = self.buffers.acquire(_output_shape(activation.shape[-2:], output_size))
+        return self.render_plan.render(
+            activation, original=original, out=out, output_size=output_size, interpolation=self.interpolation
+        )
+
+    def _render_gray(
+        self,
+        gray: np.ndarray,
+        original: Optional[np.ndarray],
+        output_size: Optional[Tuple[int, int]],
+    ) -> np.ndarray:
+        out = self.buffers.acquire(_output_shape(gray.shape, output_size))
+        return self.render_plan.render_gray(
+            gray, original=original, out=out, output_size=output_size, interpolation=self.interpolation
+        )
+
+
+def _fit_size(frame_shape: Tuple[int, ...], box: Tuple[int, int]) -> Tuple[int, int]:
+    """Größte (Breite, Höhe) im Seitenverhältnis des Kamerabilds, die in ``box`` passt."""
+    h, w = frame_shape[:2]
+    scale = min(box[0] / w, box[1] / h)
+    return max(1, round(w * scale)), max(1, round(h * scale))
+
+
+def _output_shape(map_shape: Tuple[int, ...], output_size: Optional[Tuple[int, int]]) -> Tuple[int, int, int]:
+    if output_size is None:
+        return (*map_shape, 3)
+    return output_size[1], output_size[0], 3
@@ -0,0 +1,259 @@
+# core/live_smoothing.py
+"""
+Zeitliche Glättung der Heatmap im Live-Modus.
+
+Ohne Zustand wird jedes Frame für sich reduziert: Top-K-Ranking über alle
+Channels, danach Min-Max-Normalisierung auf genau dieses Frame. Kleine
+Schwankungen im Kamerabild lassen dadurch Channel-Auswahl und Helligkeit
+der Heatmap springen (Flackern), und das Ranking kostet jedes Frame eine
+Varianz über die komplette Aktivierung.
+
+``LiveHeatmapSmoother`` ersetzt im Live-Modus ``reduce_to_gray`` durch
+eine zustandsbehaftete Variante:
+- Top-K-Indizes werden nur alle ``rerank_every`` Frames neu bestimmt –
+  oder sofort, wenn der Score (``preset.rank_by``) der gewählten Channels
+  um mehr als ``rerank_drift`` (relativ) unter den Wert beim letzten
+  Ranking fällt. Dazwischen wird nur der Score der K gewählten Channels
+  geprüft.
+- Die reduzierte Map läuft durch einen EMA (Gewicht des neuen Frames:
+  ``heatmap_alpha``).
+- Der Normalisierungsbereich (min/max) läuft durch einen eigenen EMA
+  (``range_alpha``); Werte außerhalb des geglätteten Bereichs werden auf
+  0 bzw. 255 abgeschnitten.
+
+Ein Smoother gehört zu genau einer Live-Pipeline (ein Favorit); bei
+Favoritenwechsel wird ein neuer erzeugt, ``reset()`` vergisst den Zustand.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+import torch
+
+from config.models import LiveConfig, VizPreset
+from core.viz_engine import preset_weights
+from core.torch_reduction import (
+    as_float_activation,
+    channel_scores,
+    reduce_channels,
+    reduce_to_gray,
+    sanitize_non_finite,
+    scale_to_uint8,
+    select_channels,
+    top_k_count,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEATMAP_ALPHA = 0.5
+DEFAULT_RANGE_ALPHA = 0.2
+DEFAULT_RERANK_EVERY = 15
+DEFAULT_RERANK_DRIFT = 0.3
+
+
+class LiveHeatmapSmoother:
+    """Zustandsbehaftete Reduktion (1, C, H, W) → (H, W) uint8 für ein Preset."""
+
+    def __init__(
+        self,
+        preset: VizPreset,
+        heatmap_alpha: float = DEFAULT_HEATMAP_ALPHA,
+        range_alpha: float = DEFAULT_RANGE_ALPHA,
+        rerank_every: int = DEFAULT_RERANK_EVERY,
+        rerank_drift: float = DEFAULT_RERANK_DRIFT,
+        enabled: bool = True,
+    ):
+        if not 0 < heatmap_alpha <= 1:
+            raise ValueError("heatmap_alpha muss im Bereich (0, 1] liegen")
+        if not 0 < range_alpha <= 1:
+            raise ValueError("range_alpha muss im Bereich (0, 1] liegen")
+        if rerank_every < 1:
+            raise ValueError("rerank_every muss mindestens 1 sein")
+        if not 0 < rerank_drift <= 1:
+            raise ValueError("rerank_drift muss im Bereich (0, 1] liegen")
+
+        self.preset = preset
+        self.heatmap_alpha = float(heatmap_alpha)
+        self.range_alpha = float(range_alpha)
+        self.rerank_every = int(rerank_every)
+        self.rerank_drift = float(rerank_drift)
+        self.enabled = enabled
+
+        # Metriken
+        self.frames = 0
+        self.rerankings = 0
+
+        self.reset()
+
+    @classmethod
+    def from_config(cls, preset: VizPreset, live_cfg: LiveConfig) -> "LiveHeatmapSmoother":
+        return cls(
+            preset,
+            heatmap_alpha=live_cfg.heatmap_alpha,
+            range_alpha=live_cfg.range_alpha,
+            rerank_every=live_cfg.rerank_every,
+            rerank_drift=live_cfg.rerank_drift,
+            enabled=live_cfg.temporal_smoothing,
+        )
+
+    def reset(self) -> None:
+        """Vergisst Channel-Auswahl, geglättete Heatmap und Wertebereich."""
+        self._channel_idx: Optional[torch.Tensor] = None
+        self._num_channels = 0
+        self._ranked_energy = 0.0
+        self._frames_since_rank = 0
+        self._heatmap: Optional[torch.Tensor] = None
+        self._range: Optional[Tuple[float, float]] = None
+        self._weights: Optional[list[float]] = None
+        self._weights_channels = -1
+
+    @property
+    def channel_indices(self) -> Optional[list[int]]:
+        """Aktuell genutzte Top-K-Channels (None vor dem ersten Frame bzw. ohne Top-K)."""
+        return None if self._channel_idx is None else self._channel_idx.tolist()
+
+    # -------------------------
+    # Reduktion
+    # -------------------------
+
+    def __call__(self, activation: torch.Tensor, out: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """
+        Aktivierung (1, C, H, W) → geglättete Graustufen-Map (H, W) uint8.
+        Gleiche Signatur wie ``reduce_to_gray`` mit gebundenem Preset, damit
+        der Smoother direkt als Reducer an ``ModelEngine.run_inference_map``
+        übergeben werden kann.
+        """
+        if not self.enabled:
+            return reduce_to_gray(activation, self.preset, out=out)
+
+        activation = as_float_activation(activation)
+        self.frames += 1
+        fmap = self._select(activation)
+        if fmap.shape[0] == 0:
+            if out is not None and out.shape == activation.shape[-2:]:
+                return out.zero_()
+            return torch.zeros(activation.shape[-2:], dtype=torch.uint8, device=activation.device)
+
+        reduced = reduce_channels(fmap, self.preset, self._resolve_weights(activation.shape[1]))
+        heatmap = self._smooth_heatmap(sanitize_non_finite(reduced))
+        lo, hi = self._smooth_range(heatmap)
+        return scale_to_uint8(heatmap, lo, hi, out=out)
+
+    def reduce_array(self, activation: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """NumPy-Variante für Aktivierungen, die nicht aus einer lokalen Engine kommen."""
+        target = torch.from_numpy(out) if out is not None else None
+        gray = self(torch.from_numpy(np.asarray(activation)), out=target)
+        return out if target is not None and gray.data_ptr() == target.data_ptr() else gray.numpy()
+
+    def _resolve_weights(self, num_channels: int) -> Optional[list[float]]:
+        if num_channels != self._weights_channels:
+            self._weights = preset_weights(self.preset, num_channels)
+            self._weights_channels = num_channels
+        return self._weights
+
+    def _select(self, activation: torch.Tensor) -> torch.Tensor:
+        if self.preset.channels != "topk":
+            return select_channels(activation, self.preset)
+
+        fmap = activation[0]
+        C = fmap.shape[0]
+        self._frames_since_rank += 1
+        stale = (
+            self._channel_idx is None
+            or self._num_channels != C
+            or self._frames_since_rank >= self.rerank_every
+        )
+        if not stale:
+            selected = fmap.index_select(0, self._channel_idx)
+            # Drift: die gewählten Channels haben deutlich an Score verloren
+            # (bei nicht positivem Score, z.B. rank_by="mean", nur zeitgesteuert)
+            energy = float(channel_scores(selected, self.preset.rank_by).mean())
+            if self._ranked_energy <= 0 or energy >= (1.0 - self.rerank_drift) * self._ranked_energy:
+                return selected
+
+        return self._rerank(fmap)
+
+    def _rerank(self, fmap: torch.Tensor) -> torch.Tensor:
+        C = fmap.shape[0]
+        top = torch.topk(channel_scores(fmap, self.preset.rank_by), top_k_count(self.preset, C))
+        self._channel_idx = top.indices
+        self._num_channels = C
+        self._ranked_energy = float(top.values.mean()) if top.values.numel() else 0.0
+        self._frames_since_rank = 0
+        self.rerankings += 1
+        return fmap.index_select(0, self._channel_idx)
+
+    # -------------------------
+    # EMA
+    # -------------------------
+
+    def _smooth_heatmap(self, reduced: torch.Tensor) -> torch.Tensor:
+        if self._heatmap is None or self._heatmap.shape != reduced.shape:
+            self._heatmap = reduced.clone()
+            self._range = None
+        else:
+            self._heatmap.lerp_(reduced, self.heatmap_alpha)
+        return self._heatmap
+
+    def _smooth_range(self, heatmap: torch.Tensor) -> Tuple[float, float]:
+        lo, hi = (float(v) for v in torch.aminmax(heatmap))
+        if self._range is not None:
+            a = self.range_alpha
+            prev_lo, prev_hi = self._range
+            lo = prev_lo + a * (lo - prev_lo)
+            hi = prev_hi + a * (hi - prev_hi)
+        self._range = (lo, hi)
+        return lo, hi
+
+
+if __name__ == "__main__":
+    # Mini-Selbsttest
+    torch.manual_seed(0)
+    preset = VizPreset(id="t", layer_id="x", channels="topk", k=4, blend_mode="mean")
+    act = torch.rand(1, 256, 28, 28) * torch.linspace(0.1, 2.0, 256).view(1, -1, 1, 1)
+
+    # Ohne Glättung (alpha = 1) und mit Ranking pro Frame entspricht der Smoother reduce_to_gray
+    exact = LiveHeatmapSmoother(preset, heatmap_alpha=1.0, range_alpha=1.0, rerank_every=1)
+    for _ in range(3):
+        frame = torch.rand(1, 256, 28, 28)
+        assert int((exact(frame).int() - reduce_to_gray(frame, preset).int()).abs().max()) <= 1
+
+    # Leichtes Rauschen: Channel-Auswahl bleibt stabil, Ranking nur alle rerank_every Frames
+    smoother = LiveHeatmapSmoother(preset, rerank_every=10)
+    flicker_raw, flicker_smooth = [], []
+    prev_raw = prev_smooth = None
+    for _ in range(30):
+        frame = act + 0.05 * torch.randn_like(act)
+        raw, smooth = reduce_to_gray(frame, preset).float(), smoother(frame).float()
+        if prev_raw is not None:
+            flicker_raw.append(float((raw - prev_raw).abs().mean()))
+            flicker_smooth.append(float((smooth - prev_smooth).abs().mean()))
+        prev_raw, prev_smooth = raw, smooth
+    assert smoother.rerankings == 3, smoother.rerankings
+    assert np.mean(flicker_smooth) < np.mean(flicker_raw)
+
+    # Drift: gewählte Channels verstummen → sofort neues Ranking
+    quiet = act.clone()
+    silenced = smoother.channel_indices
+    quiet[0, silenced] = 0.5
+    before = smoother.rerankings
+    smoother(quiet)
+    assert smoother.rerankings == before + 1
+    assert not set(smoother.channel_indices) & set(silenced)
+
+    # Konstante bzw. nicht endliche Maps bleiben gültig
+    smoother.reset()
+    assert int(smoother(torch.zeros(1, 256, 28, 28)).max()) == 0
+    nan = act.clone()
+    nan[0, :, 0, 0] = float("nan")
+    assert smoother(nan).dtype == torch.uint8 and np.isfinite(smoother._heatmap.numpy()).all()
+
+    gray = smoother.reduce_array(act.numpy(), out=np.empty((28, 28), dtype=np.uint8))
+    assert gray.shape == (28, 28) and gray.dtype == np.uint8
+    print(
+        f"Flackern roh {np.mean(flicker_raw):.2f} → geglättet {np.mean(flicker_smooth):.2f}, "
+        f"Rankings: {smoother.rerankings} in {smoother.frames} Frames"
+    )
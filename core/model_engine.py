@@ -2,23 +2,120 @@
 
 from __future__ import annotations
 
+import functools
+import logging
+import threading
+import time
+from pathlib import Path
+
+import cv2
 import numpy as np
-from typing import Dict, List, Callable, Optional
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Callable, Optional, Tuple
 
 import torch
 import torch.nn as nn
-import torchvision.transforms as T
-from torchvision import models
 
-from config.models import ModelConfig, ModelLayerMapping
+from config.models import ModelConfig, ModelLayerMapping, VizPreset
+from core.backbones import BackboneSpec, get_backbone
+from core.inference_backends import InferenceBackend, create_backend
+from core.buffer_pool import BufferPool, fits
+from core.torch_reduction import reduce_to_gray
+from core.weight_store import load_model, weights_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# ImageNet-Normalisierung der torchvision-Gewichte
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+MIN_INPUT_SIZE = 32       # alle Backbones reduzieren bis zur letzten Stufe um Faktor 32
+INPUT_STRIDE = 32         # Seitenlängen im keep_aspect-Modus werden darauf gerundet
+RESIZE_MODES = ("stretch", "keep_aspect")
+
+# Aufwärmen: Bildgröße (typisches Kamera-Frame) und Durchläufe je Konfiguration
+WARMUP_FRAME_SHAPE = (480, 640, 3)
+WARMUP_ITERATIONS = 2
+
+# Reduktion (1, C, H, W) → (H, W) uint8 im fusionierten Pfad, Signatur wie reduce_to_gray
+MapReducer = Callable[..., torch.Tensor]
+
+# Maximale Anzahl Bilder für die int8-Kalibrierung
+MAX_CALIBRATION_FRAMES = 64
+CALIBRATION_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class ActivationResult(Mapping):
+    """
+    Ergebnis eines Forward-Passes: Mapping layer_id → Aktivierung (NumPy).
+
+    Hält intern die rohen Tensoren und wandelt einen Layer erst beim Zugriff
+    (``result[layer_id]``, ``get_activation``) in ein NumPy-Array um. Nicht
+    abgefragte Layer kosten so keine Kopie. Einmal umgewandelte Arrays werden
+    gecacht.
+    """
+
+    def __init__(self, tensors: Dict[str, torch.Tensor]):
+        self._tensors = tensors
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, layer_id: str) -> np.ndarray:
+        arr = self._arrays.get(layer_id)
+        if arr is None:
+            t = self._tensors[layer_id].detach()
+            # int8-/bf16-Aktivierungen für NumPy in float32 zurückwandeln
+            if t.is_quantized:
+                t = t.dequantize()
+            if t.dtype != torch.float32:
+                t = t.float()
+            arr = t.cpu().numpy()
+            self._arrays[layer_id] = arr
+        return arr
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tensors)
+
+    def __len__(self) -> int:
+        return len(self._tensors)
+
+    def __contains__(self, layer_id: object) -> bool:
+        return layer_id in self._tensors
+
+    def get_activation(self, layer_id: str) -> Optional[np.ndarray]:
+        """Aktivierung eines Layers als NumPy-Array oder None."""
+        if layer_id not in self._tensors:
+            return None
+        return self[layer_id]
+
+    def get_tensor(self, layer_id: str) -> Optional[torch.Tensor]:
+        """Roher Aktivierungs-Tensor eines Layers (ohne Umwandlung) oder None."""
+        return self._tensors.get(layer_id)
+
+    def batch_size(self) -> int:
+        """Anzahl der Bilder im Batch (1 bei ``run_inference``)."""
+        for t in self._tensors.values():
+            return int(t.shape[0])
+        return 0
+
+    def frame(self, index: int) -> "ActivationResult":
+        """
+        Aktivierungen eines einzelnen Bildes aus einem Batch-Ergebnis.
+        Die Batch-Dimension bleibt erhalten (shape (1, C, H, W)), damit das
+        Ergebnis direkt an VizEngine übergeben werden kann.
+        """
+        return ActivationResult(
+            {layer_id: t[index : index + 1] for layer_id, t in self._tensors.items()}
+        )
 
 
 class ModelEngine:
     """
     Zentrale Engine für:
-    - Laden von ResNet18 (oder später anderen Modellen)
+    - Laden eines Backbones aus der Registry (ResNet, MobileNetV3, EfficientNet)
     - Registrieren von Hooks für ausgewählte Layer
     - Einmalige Inferenz mit Rückgabe der gewünschten Aktivierungen
+    - Early-Exit: Forward-Pass endet nach der tiefsten gehookten Stage
+    - Austauschbare Backends: eager (Hooks), TorchScript, torch.compile
+    - Thread-sicher: Inferenz-Aufrufe werden per Lock serialisiert
     - Unterstützung für UI-Layer → Modell-Layer Mapping
     """
 
@@ -27,22 +124,61 @@ class ModelEngine:
         model_cfg: ModelConfig,
         active_layer_ids: Optional[List[str]] = None,
         device: str = "cpu",
+        precision: Optional[str] = None,
     ):
         self.device = device
         self.model_cfg = model_cfg
+        # Serialisiert Inferenz-Aufrufe (geteilte Engine, gemeinsamer Eingabe-Puffer)
+        self._lock = threading.RLock()
+        self.precision = precision if precision is not None else model_cfg.precision
+
+        if self.precision not in ("fp32", "bf16", "int8"):
+            raise ValueError(f"Unbekannte Precision: {self.precision}")
+        if self.precision == "int8" and device != "cpu":
+            raise ValueError("int8-Inferenz wird nur auf der CPU unterstützt.")
 
         # -------------------------
-        # 1. Modell laden
+        # 1. Preprocessing
+        #    uint8-Bild wird zuerst (OpenCV) auf die Eingabegröße verkleinert, danach
+        #    ToTensor + Normalize als eine fusionierte Operation:
+        #    x = u8 * 1/(255·std) + (−mean/std)
         # -------------------------
-        if model_cfg.name == "resnet18":
-            self.model = models.resnet18(weights=models.ResNet18_Weights.IMAGENET1K_V1)
-        else:
-            raise ValueError(f"Unbekanntes Modell: {model_cfg.name}")
+        self._norm_scale = torch.tensor(
+            [1.0 / (255.0 * s) for s in IMAGENET_STD], dtype=torch.float32
+        ).view(3, 1, 1)
+        self._norm_shift = torch.tensor(
+            [-m / s for m, s in zip(IMAGENET_MEAN, IMAGENET_STD)], dtype=torch.float32
+        ).view(3, 1, 1)
+
+        # Eingabegröße: Default aus der Config, pro Aufruf überschreibbar
+        self.input_size = model_cfg.input_size
+        self.resize_mode = model_cfg.resize_mode
+        self._validate_input_settings(self.input_size, self.resize_mode)
+
+        # Wiederverwendete Eingabe-Tensoren (N, 3, H, W), je Shape einer –
+        # so kostet der Wechsel zwischen Favoriten mit anderer Auflösung nichts
+        self._input_buffers: Dict[Tuple[int, ...], torch.Tensor] = {}
+        # uint8-Zwischenbild der Vorverarbeitung (Resize/BGR→RGB), wird je Frame überschrieben
+        self._buffers = BufferPool()
+
+        # -------------------------
+        # 2. Modell laden
+        #    (offline aus dem lokalen Weight-Store, per mmap)
+        # -------------------------
+        self.backbone: BackboneSpec = get_backbone(model_cfg.name)
+        self.model = load_model(model_cfg)
+        self.model.eval()
+
+        # Stages für den Early-Exit (Pooling/Klassifikator werden nur bei Bedarf gerechnet)
+        self._stages: List[str] = list(self.backbone.stages)
 
-        self.model.eval().to(self.device)
+        if self.precision == "int8":
+            self.model = self._quantize_int8(self.model)
+
+        self.model.to(self.device)
 
         # -------------------------
-        # 2. Layer-Registry aufbauen
+        # 3. Layer-Registry aufbauen
         #    (Name → Modul)
         # -------------------------
         self.layer_map: Dict[str, nn.Module] = {}
@@ -50,42 +186,122 @@ class ModelEngine:
             self.layer_map[name] = module
 
         # -------------------------
-        # 3. UI-Layer → Model-Layer Mapping aufbauen
+        # 4. UI-Layer → Model-Layer Mapping aufbauen
+        # -------------------------
+        #    (ohne Config-Mappings: Default-Mappings stage_0 … stage_4 des Backbones)
         # -------------------------
         self._ui_to_model_map: Dict[str, str] = {}
-        for mapping in model_cfg.layer_mappings:
+        for mapping in model_cfg.layer_mappings or self.backbone.default_layer_mappings():
             self._ui_to_model_map[mapping.ui_layer_id] = mapping.model_layer_id
 
-        # Standardlayer falls nichts spezifiziert
+        # Standardlayer des Backbones falls nichts spezifiziert
         if active_layer_ids is None:
-            active_layer_ids = ["conv1", "layer1", "layer2", "layer3", "layer4"]
+            active_layer_ids = list(self.backbone.default_layers)
 
         self.active_layer_ids = active_layer_ids
+        self._exit_index: Optional[int] = self._compute_exit_index(self.active_layer_ids)
 
         # -------------------------
-        # 4. Speicher für Aktivierungen
+        # 5. Speicher für Aktivierungen
+        #    (rohe Tensoren, NumPy-Umwandlung erst im ActivationResult)
         # -------------------------
-        self._activations: Dict[str, np.ndarray] = {}
+        self._activations: Dict[str, torch.Tensor] = {}
+        self._capture_ids: set[str] = set(self.active_layer_ids)
+        self._last_result: Optional[ActivationResult] = None
+        # Fusionierter Pfad (run_inference_map): Layer → Reducer, der
+        # direkt im Hook läuft
+        self._map_reducers: Dict[str, MapReducer] = {}
 
         # -------------------------
-        # 5. Hooks setzen
+        # 6. Hooks setzen
         # -------------------------
-        self._hooks = []
+        self._hooks: Dict[str, torch.utils.hooks.RemovableHandle] = {}
         self._register_hooks()
 
         # -------------------------
-        # 6. Preprocessing
+        # 7. Inferenz-Backend
+        #    eager → Hooks + Early-Exit (oben); sonst Graph ohne Python-Hooks
         # -------------------------
-        self.preprocess = T.Compose(
-            [
-                T.ToTensor(),
-                T.Resize((224, 224)),
-                T.Normalize(
-                    mean=[0.485, 0.456, 0.406],
-                    std=[0.229, 0.224, 0.225],
-                ),
-            ]
+        from config.service import resolve_artifact_dir
+
+        self._backend: Optional[InferenceBackend] = create_backend(
+            model_cfg.backend,
+            self.model,
+            artifact_dir=resolve_artifact_dir(model_cfg),
+            # Gewichtsinhalt und Eingabegeometrie im Schlüssel: ein neu exportierter
+            # Checkpoint unter gleichem Namen lädt nie einen alten Graphen
+            cache_key=(
+                f"{model_cfg.name}_{model_cfg.weights}_{weights_fingerprint(model_cfg)}_{self.precision}"
+                f"_{self.input_size}{self.resize_mode}"
+            ),
+        )
+
+    # ------------------------------------------------------------------
+    # Reduzierte Präzision (int8)
+    # ------------------------------------------------------------------
+
+    def _quantize_int8(self, float_model: nn.Module) -> nn.Module:
+        """
+        Post-Training-Quantisierung (Eager-Mode, torch.ao.quantization):
+        Fusion conv/bn/relu → Observer einsetzen → Kalibrierung mit gespeicherten
+        Snapshots → Umwandlung in int8-Module.
+
+        Die Modulnamen (conv1, layer1, …) bleiben erhalten, d.h. Hooks und
+        Early-Exit funktionieren wie im fp32-Modell. Ohne Kalibrierbilder oder
+        ohne quantisierbare torchvision-Variante des Backbones wird mit einer
+        Warnung auf fp32 zurückgefallen.
+        """
+        from torch.ao import quantization as tq
+
+        from config.service import resolve_calibration_dir
+
+        qbuilder = self.backbone.quantizable_builder()
+        if qbuilder is None:
+            logger.warning(f"Für '{self.backbone.name}' gibt es keine int8-Variante – verwende fp32.")
+            self.precision = "fp32"
+            return float_model
+
+        calibration_dir = resolve_calibration_dir(self.model_cfg)
+        frames = _load_calibration_frames(calibration_dir)
+        if not frames:
+            logger.warning(f"Keine Kalibrierbilder für int8 gefunden ({calibration_dir}) – verwende fp32.")
+            self.precision = "fp32"
+            return float_model
+
+        backend = next(
+            (b for b in ("x86", "fbgemm", "qnnpack") if b in torch.backends.quantized.supported_engines),
+            None,
         )
+        if backend is None:
+            logger.warning("Keine quantisierte CPU-Engine verfügbar – verwende fp32.")
+            self.precision = "fp32"
+            return float_model
+        torch.backends.quantized.engine = backend
+
+        qmodel = qbuilder(weights=None, quantize=False)
+        qmodel.load_state_dict(float_model.state_dict())
+        qmodel.eval()
+        # Nur die Residual-Blöcke fusionieren: conv1/bn1/relu bleiben getrennt,
+        # damit der Hook auf "conv1" weiterhin die reine Faltung liefert.
+        for module in qmodel.modules():
+            if module is not qmodel and hasattr(module, "fuse_model"):
+                module.fuse_model()
+        qmodel.qconfig = tq.get_default_qconfig(backend)
+        tq.prepare(qmodel, inplace=True)
+
+        # Kalibrierung: kompletter Forward-Pass, damit alle Observer Daten sehen
+        x = torch.empty((1, 3, self.input_size, self.input_size), dtype=torch.float32)
+        with torch.no_grad():
+            for frame in frames:
+                self._write_input(frame, x[0], bgr=True)
+                qmodel(x)
+
+        tq.convert(qmodel, inplace=True)
+        logger.info(f"int8-Modell mit {len(frames)} Kalibrierbildern erstellt (Backend: {backend})")
+
+        # QuantStub muss vor der ersten Stage laufen
+        self._stages = ["quant"] + self._stages
+        return qmodel
 
     # ------------------------------------------------------------------
     # Layer-Hooks
@@ -94,8 +310,21 @@ class ModelEngine:
     def _make_hook(self, layer_id: str) -> Callable:
         def hook(module, input, output):
             # output = Activation Tensor
-            # Wir speichern eine NumPy-Kopie → Kivy/Streamlit können es direkt nutzen
-            self._activations[layer_id] = output.detach().cpu().numpy()
+            # Nur angeforderte Layer merken; die NumPy-Umwandlung erfolgt lazy.
+            # Nachfolgende In-place-Ops (z.B. ReLU(inplace=True) nach bn1,
+            # ``out += identity`` in ResNet-Blöcken) überschreiben ``output``
+            # noch im selben Forward-Pass → hier kopieren.
+            if layer_id in self._capture_ids:
+                reducer = self._map_reducers.get(layer_id)
+                if reducer is None:
+                    self._activations[layer_id] = output.detach().clone()
+                else:
+                    # Fusionierter Pfad: Reduktion läuft sofort, nur die fertige
+                    # H×W-Map verlässt den Hook (kopiert, falls sie ``output`` teilt)
+                    gray = reducer(output.detach())
+                    if gray.untyped_storage().data_ptr() == output.untyped_storage().data_ptr():
+                        gray = gray.clone()
+                    self._activations[layer_id] = gray
 
         return hook
 
@@ -104,8 +333,75 @@ class ModelEngine:
         for layer_id in self.active_layer_ids:
             if layer_id not in self.layer_map:
                 raise ValueError(f"Layer {layer_id} existiert nicht im Modell.")
+            if layer_id in self._hooks:
+                continue
             module = self.layer_map[layer_id]
-            self._hooks.append(module.register_forward_hook(self._make_hook(layer_id)))
+            self._hooks[layer_id] = module.register_forward_hook(self._make_hook(layer_id))
+
+    def set_active_layers(self, layer_ids: Iterable[str]) -> None:
+        """
+        Ändert die gehookten Layer ohne Neuaufbau der Engine: Hooks für
+        entfallene Layer werden entfernt, für neue Layer gesetzt. Der
+        Early-Exit richtet sich danach nach der tiefsten verbleibenden Stage.
+
+        Achtung: Bei einer geteilten Engine (engine_registry) gilt die
+        Änderung für alle bisherigen Nutzer dieser Instanz; die Registry
+        führt sie danach unter den neuen Layern, spätere Anfragen mit den
+        alten Layern erhalten eine eigene Engine.
+        """
+        layer_ids = list(dict.fromkeys(layer_ids))
+        if not layer_ids:
+            raise ValueError("Mindestens ein aktiver Layer erforderlich.")
+        unknown = [layer_id for layer_id in layer_ids if layer_id not in self.layer_map]
+        if unknown:
+            raise ValueError(f"Layer existieren nicht im Modell: {unknown}")
+
+        with self._lock:
+            for layer_id in [l for l in self._hooks if l not in layer_ids]:
+                self._hooks.pop(layer_id).remove()
+
+            self.active_layer_ids = layer_ids
+            self._register_hooks()
+            self._exit_index = self._compute_exit_index(self.active_layer_ids)
+            self._capture_ids = set(self.active_layer_ids)
+
+        logger.info(f"Aktive Layer: {self.active_layer_ids}")
+
+    # ------------------------------------------------------------------
+    # Early-Exit
+    # ------------------------------------------------------------------
+
+    def _compute_exit_index(self, layer_ids: List[str]) -> Optional[int]:
+        """
+        Bestimmt den Index der tiefsten Stage, in der einer der Layer liegt.
+        Verschachtelte IDs (z.B. "layer2.1.conv1" oder "features.3.block")
+        zählen zu ihrer Stage ("layer2" bzw. "features.3").
+        Gibt None zurück, wenn ein Layer außerhalb der Stages liegt (z.B. "fc")
+        → dann wird der komplette Forward-Pass ausgeführt.
+        """
+        exit_index = -1
+        for layer_id in layer_ids:
+            index = next(
+                (
+                    i
+                    for i, stage in enumerate(self._stages)
+                    if layer_id == stage or layer_id.startswith(stage + ".")
+                ),
+                None,
+            )
+            if index is None:
+                return None
+            exit_index = max(exit_index, index)
+        return exit_index
+
+    def _forward(self, x: torch.Tensor, exit_index: Optional[int]) -> torch.Tensor:
+        """Forward-Pass, der nach der Stage ``exit_index`` abbricht (None = komplett)."""
+        if exit_index is None:
+            return self.model(x)
+
+        for name in self._stages[: exit_index + 1]:
+            x = self.layer_map[name](x)
+        return x
 
     # ------------------------------------------------------------------
     # Öffentliche API
@@ -115,6 +411,10 @@ class ModelEngine:
         """Gibt alle Layer zurück, die im Modell existieren."""
         return list(self.layer_map.keys())
 
+    def get_backend_name(self) -> str:
+        """Name des tatsächlich genutzten Backends (nach evtl. Fallback auf eager)."""
+        return self._backend.name if self._backend is not None else "eager"
+
     def get_active_layers(self) -> List[str]:
         """Gibt die Layer zurück, für die wir Hooks gesetzt haben."""
         return self.active_layer_ids
@@ -126,34 +426,324 @@ class ModelEngine:
         """
         return self._ui_to_model_map.get(ui_layer_id, ui_layer_id)
 
-    def run_inference(self, np_image: np.ndarray) -> Dict[str, np.ndarray]:
-        """
-        Führt einen Forward-Pass durch.
-        Erwartet: np_image (H, W, 3), uint8 oder float.
-        Gibt zurück: dict(layer_id → activation_numpy_array)
+    def _resolve_capture_ids(self, layer_ids: Optional[Iterable[str]]) -> List[str]:
+        """Prüft die angefragten Layer gegen die gehookten Layer."""
+        if layer_ids is None:
+            return list(self.active_layer_ids)
+
+        capture_ids = list(dict.fromkeys(layer_ids))
+        for layer_id in capture_ids:
+            if layer_id not in self.active_layer_ids:
+                raise ValueError(f"Layer {layer_id} ist kein aktiver (gehookter) Layer.")
+        return capture_ids
+
+    @staticmethod
+    def _validate_input_settings(input_size: int, resize_mode: str) -> None:
+        if int(input_size) < MIN_INPUT_SIZE:
+            raise ValueError(f"input_size muss mindestens {MIN_INPUT_SIZE} sein, erhalten: {input_size}")
+        if resize_mode not in RESIZE_MODES:
+            raise ValueError(f"Unbekannter resize_mode: {resize_mode}")
+
+    def get_input_shape(
+        self,
+        image_shape: Tuple[int, ...],
+        input_size: Optional[int] = None,
+        resize_mode: Optional[str] = None,
+    ) -> Tuple[int, int]:
         """
-        self._activations.clear()
+        Eingabegröße (H, W) des Netzes für ein Bild der Form ``image_shape``.
 
+        - stretch: quadratisch input_size × input_size (Bild wird ggf. gestaucht)
+        - keep_aspect: kürzere Seite = input_size, längere Seite proportional,
+          auf ein Vielfaches von 32 gerundet (ResNet ist bis avgpool
+          vollständig faltend, die Featuremaps werden dann einfach breiter)
+        """
+        size = int(input_size if input_size is not None else self.input_size)
+        mode = resize_mode if resize_mode is not None else self.resize_mode
+        self._validate_input_settings(size, mode)
+
+        if mode == "stretch":
+            return size, size
+
+        h, w = image_shape[:2]
+        if h <= w:
+            long_side = max(size, int(round(size * w / h / INPUT_STRIDE)) * INPUT_STRIDE)
+            return size, long_side
+        long_side = max(size, int(round(size * h / w / INPUT_STRIDE)) * INPUT_STRIDE)
+        return long_side, size
+
+    def _get_input_buffer(self, batch_size: int, height: int, width: int) -> torch.Tensor:
+        """Liefert den vorallokierten Eingabe-Tensor für Batch-Größe und Eingabegröße."""
+        shape = (batch_size, 3, height, width)
+        buffer = self._input_buffers.get(shape)
+        if buffer is None:
+            buffer = torch.empty(shape, dtype=torch.float32)
+            self._input_buffers[shape] = buffer
+        return buffer
+
+    def _write_input(self, np_image: np.ndarray, out: torch.Tensor, bgr: bool = False) -> None:
+        """
+        Schreibt ein Bild (H, W, 3) vorverarbeitet in ``out`` (3, h, w).
+        Reihenfolge: uint8-Resize auf (h, w) → (optional BGR→RGB) → fusionierte Normalisierung.
+        """
         # Sicherstellen, dass Bild im passenden Format vorliegt
         if np_image.dtype != np.uint8:
             np_image = np.clip(np_image, 0, 255).astype(np.uint8)
 
-        # In PIL-Format wandeln für torchvision
-        from PIL import Image
+        out_h, out_w = out.shape[-2:]
+        h, w = np_image.shape[:2]
+        interpolation = cv2.INTER_AREA if h >= out_h and w >= out_w else cv2.INTER_LINEAR
+        small = self._buffers.scratch("resize", (out_h, out_w, 3))
+        small = cv2.resize(np_image, (out_w, out_h), dst=small, interpolation=interpolation)
+        if bgr:
+            cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=small)
+
+        u8 = torch.from_numpy(small).permute(2, 0, 1)
+        torch.addcmul(self._norm_shift, u8, self._norm_scale, out=out)
+
+    def _run(self, x: torch.Tensor, layer_ids: Optional[Iterable[str]]) -> ActivationResult:
+        """Gemeinsamer Forward-Pass für Einzelbild und Batch (x: (N, 3, H, W))."""
+        capture_ids = self._resolve_capture_ids(layer_ids)
+        exit_index = (
+            self._exit_index if layer_ids is None else self._compute_exit_index(capture_ids)
+        )
 
-        pil_img = Image.fromarray(np_image)
+        self._activations = {}
+        self._capture_ids = set(capture_ids)
+
+        with torch.no_grad(), torch.autocast(
+            device_type=torch.device(self.device).type,
+            dtype=torch.bfloat16,
+            enabled=self.precision == "bf16",
+        ):
+            x = x.to(self.device)
+            if self._backend is not None:
+                try:
+                    self._activations = self._backend.run(x, capture_ids)
+                except Exception as e:  # noqa: BLE001
+                    logger.warning(
+                        f"Backend '{self._backend.name}' fehlgeschlagen – verwende eager: {e}"
+                    )
+                    self._backend = None
+
+            if self._backend is None:
+                _ = self._forward(x, exit_index)
 
-        x = self.preprocess(pil_img).unsqueeze(0).to(self.device)
+        # Hier ist self._activations jetzt gefüllt
+        self._last_result = ActivationResult(self._activations)
+        return self._last_result
 
-        with torch.no_grad():
-            _ = self.model(x)
+    def run_inference(
+        self,
+        np_image: np.ndarray,
+        layer_ids: Optional[Iterable[str]] = None,
+        bgr: bool = False,
+        input_size: Optional[int] = None,
+        resize_mode: Optional[str] = None,
+    ) -> ActivationResult:
+        """
+        Führt einen Forward-Pass durch.
+        Erwartet: np_image (H, W, 3), uint8 oder float; RGB oder mit bgr=True
+                  direkt ein OpenCV-Frame (BGR).
+        layer_ids: optional nur diese (gehookten) Layer erfassen; der Forward-Pass
+                   endet dann nach der tiefsten davon benötigten Stage.
+        input_size / resize_mode: optional abweichend von der Config (z.B. pro Favorit).
+        Gibt zurück: ActivationResult (Mapping layer_id → activation_numpy_array,
+                     NumPy-Umwandlung erst beim Zugriff)
+        """
+        height, width = self.get_input_shape(np_image.shape, input_size, resize_mode)
+        with self._lock:
+            x = self._get_input_buffer(1, height, width)
+            self._write_input(np_image, x[0], bgr=bgr)
+            return self._run(x, layer_ids)
+
+    def run_inference_batch(
+        self,
+        frames: List[np.ndarray] | np.ndarray,
+        layer_ids: Optional[Iterable[str]] = None,
+        bgr: bool = False,
+        input_size: Optional[int] = None,
+        resize_mode: Optional[str] = None,
+    ) -> ActivationResult:
+        """
+        Führt einen gemeinsamen Forward-Pass für mehrere Bilder durch.
+        Erwartet: Liste von Bildern (H, W, 3) oder gestapeltes Array (N, H, W, 3);
+                  die Bilder dürfen unterschiedliche Auflösungen haben. Im
+                  keep_aspect-Modus bestimmt das erste Bild die Eingabegröße.
+        Gibt zurück: ActivationResult mit Batch-Dimension, shape (N, C, H, W).
+                     Einzelbilder über ``result.frame(i)``.
+        """
+        if isinstance(frames, np.ndarray):
+            if frames.ndim != 4:
+                raise ValueError(f"Erwarte gestapelte Bilder (N, H, W, 3), erhalten: shape={frames.shape}")
+            frames = list(frames)
+
+        if len(frames) == 0:
+            raise ValueError("run_inference_batch benötigt mindestens ein Bild.")
+
+        height, width = self.get_input_shape(frames[0].shape, input_size, resize_mode)
+        with self._lock:
+            x = self._get_input_buffer(len(frames), height, width)
+            for i, frame in enumerate(frames):
+                self._write_input(frame, x[i], bgr=bgr)
+            return self._run(x, layer_ids)
+
+    def run_inference_map(
+        self,
+        np_image: np.ndarray,
+        preset: VizPreset,
+        layer_id: Optional[str] = None,
+        bgr: bool = False,
+        input_size: Optional[int] = None,
+        resize_mode: Optional[str] = None,
+        out: Optional[np.ndarray] = None,
+        reducer: Optional[MapReducer] = None,
+    ) -> np.ndarray:
+        """
+        Fusionierter Pfad für den Live-Modus: Channel-Auswahl, Top-K,
+        Reduktion und Min-Max-Normalisierung laufen in torch direkt im Hook.
+        Gibt zurück: Graustufen-Map (H, W) uint8 für ``VizEngine.visualize_gray``.
+        layer_id: gehookter Layer (Default: ``preset.layer_id``).
+        out: optionaler Zielpuffer (H, W) uint8; passt er nicht, wird ein neues
+             Array zurückgegeben.
+        reducer: ersetzt ``reduce_to_gray`` mit ``preset``, z.B. ein
+                 ``LiveHeatmapSmoother`` (gleiche Signatur: Aktivierung, out=).
+        """
+        layer_id = layer_id if layer_id is not None else preset.layer_id
+        if reducer is None:
+            reducer = functools.partial(reduce_to_gray, preset=preset)
+        height, width = self.get_input_shape(np_image.shape, input_size, resize_mode)
+        with self._lock:
+            x = self._get_input_buffer(1, height, width)
+            self._write_input(np_image, x[0], bgr=bgr)
+            self._map_reducers = {layer_id: reducer}
+            try:
+                result = self._run(x, [layer_id])
+            finally:
+                self._map_reducers = {}
+            # Die Map ist keine Aktivierung → nicht als letztes Ergebnis merken
+            self._last_result = None
+
+            gray = result.get_tensor(layer_id)
+            map_shape = tuple(gray.shape[-2:])
+            target = torch.from_numpy(out) if fits(out, map_shape) else None
+            if gray.dim() == 4:
+                # Graph-Backends laufen ohne Hooks → Reduktion im Anschluss
+                gray = reducer(gray, out=target)
+            elif target is not None:
+                target.copy_(gray)
+            return out if target is not None else gray.cpu().numpy()
+
+    def warmup(
+        self,
+        layer_ids: Optional[Iterable[str]] = None,
+        input_sizes: Optional[Iterable[Optional[int]]] = None,
+        iterations: int = WARMUP_ITERATIONS,
+        presets: Optional[Iterable[VizPreset]] = None,
+    ) -> float:
+        """
+        Führt Dummy-Forward-Passes aus, damit Allocator, oneDNN-Primitive und
+        ggf. Backend-Graphen vor dem ersten echten Frame initialisiert sind.
+        Aufgewärmt werden ``run_inference`` und der fusionierte Pfad
+        ``run_inference_map``, den der Live-Modus aufruft.
+
+        layer_ids: je Layer ein eigener Durchlauf (so werden die Graphen der
+                   Backends gebaut, die der Live-Modus später anfragt);
+                   None = ein Durchlauf mit allen aktiven Layern.
+        input_sizes: Eingabegrößen, die später genutzt werden (None-Eintrag =
+                     Config-Default); Default: nur die Config-Größe.
+        presets: VizPresets für ``run_inference_map`` (z.B. die der Favoriten);
+                 Default: ein Top-K-Preset je Layer aus ``layer_ids`` bzw. je
+                 aktivem Layer.
+        Gibt zurück: Dauer in Sekunden.
+        """
+        start = time.perf_counter()
+        frame = np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8)
+        layer_sets: List[Optional[List[str]]] = (
+            [None] if layer_ids is None else [[layer_id] for layer_id in dict.fromkeys(layer_ids)]
+        )
+        sizes = list(dict.fromkeys(input_sizes)) if input_sizes is not None else [None]
+        if presets is None:
+            map_layers = dict.fromkeys(layer_ids) if layer_ids is not None else self.get_active_layers()
+            presets = [VizPreset(id="warmup", layer_id=layer_id) for layer_id in map_layers]
+        else:
+            presets = list(presets)
+
+        for size in sizes:
+            for layer_set in layer_sets:
+                for _ in range(iterations):
+                    self.run_inference(frame, layer_ids=layer_set, input_size=size)
+            for preset in presets:
+                for _ in range(iterations):
+                    self.run_inference_map(frame, preset, input_size=size)
+
+        # Dummy-Ergebnis nicht als letzte Aktivierung stehen lassen
+        self._last_result = None
+        elapsed = time.perf_counter() - start
+        logger.info(f"ModelEngine aufgewärmt in {elapsed:.2f}s (Größen: {sizes}, Layer: {layer_ids or 'aktiv'})")
+        return elapsed
+
+    def get_activation(self, layer_id: str) -> Optional[np.ndarray]:
+        """Letzte Aktivierung eines bestimmten Layers holen (NumPy, lazy umgewandelt)."""
+        if self._last_result is None:
+            return None
+        return self._last_result.get_activation(layer_id)
 
-        # Hier ist self._activations jetzt gefüllt
-        return self._activations.copy()
 
-    def get_activation(self, layer_id: str) -> np.ndarray:
-        """Letzte Aktivierung eines bestimmten Layers holen."""
-        return self._activations.get(layer_id)
+# ----------------------------------------------------------------------
+# Kalibrierung & Präzisions-Report
+# ----------------------------------------------------------------------
+
+def _load_calibration_frames(directory: Path, max_frames: int = MAX_CALIBRATION_FRAMES) -> List[np.ndarray]:
+    """Lädt gespeicherte Snapshots (BGR, wie von OpenCV gelesen) aus einem Ordner."""
+    if not directory.is_dir():
+        return []
+
+    frames: List[np.ndarray] = []
+    for path in sorted(directory.iterdir()):
+        if path.suffix.lower() not in CALIBRATION_EXTENSIONS:
+            continue
+        frame = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if frame is None:
+            logger.warning(f"Kalibrierbild konnte nicht gelesen werden: {path}")
+            continue
+        frames.append(frame)
+        if len(frames) >= max_frames:
+            break
+    return frames
+
+
+def precision_drift_report(
+    engine: ModelEngine,
+    frames: List[np.ndarray],
+    layer_ids: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Vergleicht die Aktivierungen einer Engine (bf16/int8) mit einer fp32-Referenz.
+    Erwartet: RGB-Bilder (H, W, 3).
+    Gibt zurück: dict(layer_id → {max_abs, mean_abs, rel_l2, cosine})
+    """
+    layer_ids = layer_ids if layer_ids is not None else engine.get_active_layers()
+    reference = ModelEngine(engine.model_cfg, active_layer_ids=layer_ids, device=engine.device, precision="fp32")
+
+    ref_acts = reference.run_inference_batch(frames, layer_ids=layer_ids)
+    acts = engine.run_inference_batch(frames, layer_ids=layer_ids)
+
+    report: Dict[str, Dict[str, float]] = {}
+    for layer_id in layer_ids:
+        ref = ref_acts[layer_id].astype(np.float64).ravel()
+        act = acts[layer_id].astype(np.float64).ravel()
+        diff = act - ref
+        ref_norm = float(np.linalg.norm(ref))
+        denom = ref_norm * float(np.linalg.norm(act))
+        report[layer_id] = {
+            "max_abs": float(np.abs(diff).max()),
+            "mean_abs": float(np.abs(diff).mean()),
+            "rel_l2": float(np.linalg.norm(diff) / ref_norm) if ref_norm > 0 else 0.0,
+            "cosine": float(ref @ act / denom) if denom > 0 else 1.0,
+        }
+        logger.info(f"Drift {engine.precision} vs. fp32 [{layer_id}]: {report[layer_id]}")
+    return report
 
 
 # ----------------------------------------------------------------------
@@ -0,0 +1,116 @@
+# core/scene_gate.py
+"""
+Günstiger Szenenwechsel-Detektor vor der Modell-Inferenz.
+
+Jedes Kamera-Frame wird auf ein kleines Graustufenbild (z.B. 32×32)
+verkleinert und mit dem Bild verglichen, für das zuletzt gerechnet wurde.
+Liegt die mittlere absolute Differenz unter der Schwelle, kann der
+Live-Modus Aktivierungen und gerendertes Bild des letzten Durchlaufs
+weiterverwenden. Nach ``max_stale_s`` wird trotzdem neu gerechnet, damit
+langsame Änderungen (Licht, Kamera-Drift) nicht ewig ignoriert werden.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from config.models import LiveConfig
+
+
+class SceneChangeGate:
+    """Entscheidet pro Frame, ob ein neuer Forward-Pass nötig ist."""
+
+    def __init__(
+        self,
+        threshold: float = 3.0,
+        max_stale_s: float = 2.0,
+        size: int = 32,
+        enabled: bool = True,
+    ):
+        if threshold < 0:
+            raise ValueError("threshold darf nicht negativ sein")
+        if max_stale_s <= 0:
+            raise ValueError("max_stale_s muss größer als 0 sein")
+
+        self.threshold = float(threshold)
+        self.max_stale_s = float(max_stale_s)
+        self.size = int(size)
+        self.enabled = enabled
+
+        self._reference: Optional[np.ndarray] = None
+        self._reference_at = 0.0
+        self.last_score = float("inf")
+
+        # Metriken
+        self.checked = 0
+        self.skipped = 0
+
+    @classmethod
+    def from_config(cls, live_cfg: LiveConfig) -> "SceneChangeGate":
+        return cls(
+            threshold=live_cfg.scene_change_threshold,
+            max_stale_s=live_cfg.max_stale_s,
+            size=live_cfg.gate_size,
+            enabled=live_cfg.scene_gate,
+        )
+
+    @property
+    def skip_ratio(self) -> float:
+        """Anteil der Frames, für die keine Inferenz nötig war."""
+        return self.skipped / self.checked if self.checked else 0.0
+
+    def reset(self) -> None:
+        """Vergisst das Referenzbild; das nächste Frame wird immer gerechnet."""
+        self._reference = None
+        self.last_score = float("inf")
+
+    def _signature(self, img: np.ndarray) -> np.ndarray:
+        # Erst verkleinern, dann Graustufen: spart die Farbkonvertierung auf voller Auflösung
+        small = cv2.resize(img, (self.size, self.size), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+        return small.astype(np.int16)
+
+    def should_process(self, img: np.ndarray, now: float | None = None) -> bool:
+        """
+        True, wenn für ``img`` neu gerechnet werden muss (Szene geändert,
+        kein Referenzbild oder Staleness-Grenze erreicht). In diesem Fall wird
+        ``img`` zum neuen Referenzbild.
+        """
+        now = time.monotonic() if now is None else now
+        self.checked += 1
+
+        if not self.enabled:
+            return True
+
+        signature = self._signature(img)
+        if self._reference is not None:
+            self.last_score = float(np.abs(signature - self._reference).mean())
+            fresh = now - self._reference_at < self.max_stale_s
+            if fresh and self.last_score < self.threshold:
+                self.skipped += 1
+                return False
+
+        self._reference = signature
+        self._reference_at = now
+        return True
+
+
+if __name__ == "__main__":
+    # Mini-Selbsttest
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, size=(480, 640, 3), dtype=np.uint8)
+    noisy = np.clip(base.astype(np.int16) + rng.integers(-2, 3, size=base.shape), 0, 255).astype(np.uint8)
+    other = rng.integers(0, 255, size=(480, 640, 3), dtype=np.uint8)
+
+    gate = SceneChangeGate(threshold=3.0, max_stale_s=1.0)
+    assert gate.should_process(base, now=0.0)       # erstes Frame
+    assert not gate.should_process(noisy, now=0.1)  # Rauschen → übersprungen
+    assert gate.should_process(other, now=0.2)      # neue Szene
+    assert not gate.should_process(other, now=0.5)
+    assert gate.should_process(other, now=1.3)      # Staleness-Grenze
+    print(f"Skip-Ratio: {gate.skip_ratio:.2f}, letzter Score: {gate.last_score:.2f}")
@@ -0,0 +1,192 @@
+# core/torch_reduction.py
+"""
+Fusionierte Featuremap-Reduktion in torch (für den Live-Modus).
+
+Entspricht den Schritten A–C von ``VizEngine.visualize`` – Channel-Auswahl
+(explizit oder Top-K nach ``rank_by``), Reduktion (mean/max/sum/weighted) und
+Min-Max-Normalisierung auf uint8 –, läuft aber direkt auf dem
+Aktivierungs-Tensor. Aus der ModelEngine kommt so nur noch eine einzelne
+H×W-Map statt der kompletten (1, C, H, W)-Aktivierung.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import torch
+
+from config.models import DEFAULT_TOP_K, VizPreset
+from core.viz_engine import preset_weights
+
+
+def channel_variances(fmap: torch.Tensor) -> torch.Tensor:
+    """(C, H, W) → (C,) Varianz je Channel."""
+    flat = fmap.reshape(fmap.shape[0], -1)
+    # Varianz über zentrierte Werte (deutlich schneller als Tensor.var auf der CPU)
+    return (flat - flat.mean(dim=1, keepdim=True)).square_().mean(dim=1)
+
+
+def channel_scores(fmap: torch.Tensor, rank_by: str = "variance") -> torch.Tensor:
+    """(C, H, W) → (C,) Score je Channel, wie ``core.viz_engine.channel_scores``."""
+    flat = fmap.reshape(fmap.shape[0], -1)
+    if rank_by == "mean":
+        return flat.mean(dim=1)
+    if rank_by == "max":
+        return flat.amax(dim=1)
+    if rank_by == "l2":
+        return torch.einsum("ij,ij->i", flat, flat)
+    return channel_variances(fmap)
+
+
+def top_k_count(preset: VizPreset, num_channels: int) -> int:
+    """
+    Anzahl der Top-K-Channels für ``preset`` bei ``num_channels`` Channels;
+    wie ``top_k_indices`` bedeutet k <= 0 alle Channels.
+    """
+    k = preset.k if preset.k is not None else DEFAULT_TOP_K
+    return num_channels if k <= 0 else min(k, num_channels)
+
+
+def select_channels(activation: torch.Tensor, preset: VizPreset) -> torch.Tensor:
+    """
+    (1, C, H, W) → (N, H, W) gemäß ``preset.channels`` / ``preset.k``;
+    Top-K nach ``preset.rank_by``, stärkster Channel zuerst.
+    """
+    fmap = activation[0]
+    C = fmap.shape[0]
+
+    if preset.channels == "topk":
+        idx = torch.topk(channel_scores(fmap, preset.rank_by), top_k_count(preset, C)).indices
+        return fmap.index_select(0, idx)
+
+    idx_list = [i for i in preset.channels if 0 <= i < C]
+    if len(idx_list) == C and idx_list == list(range(C)):
+        return fmap
+    return fmap.index_select(0, torch.tensor(idx_list, dtype=torch.long, device=fmap.device))
+
+
+def reduce_channels(
+    fmap: torch.Tensor,
+    preset: VizPreset,
+    weights: Optional[List[float]] = None,
+) -> torch.Tensor:
+    """
+    (N, H, W) → (H, W) gemäß ``preset.blend_mode``.
+    weights: Gewichte für "weighted" in Auswahl-Reihenfolge (``preset_weights``);
+             None bzw. zu wenige → 1/N, also wie "mean".
+    """
+    if preset.blend_mode == "max":
+        return fmap.amax(dim=0)
+    if preset.blend_mode == "sum":
+        return fmap.sum(dim=0)
+    if preset.blend_mode == "weighted" and weights is not None and len(weights) >= fmap.shape[0]:
+        w = torch.tensor(weights[: fmap.shape[0]], dtype=fmap.dtype, device=fmap.device)
+        return torch.tensordot(w, fmap, dims=1)
+    return fmap.mean(dim=0)
+
+
+def sanitize_non_finite(fmap: torch.Tensor) -> torch.Tensor:
+    """NaN → 0, ±Inf auf min/max der endlichen Werte (wie ``VizEngine._normalize``)."""
+    if bool(torch.isfinite(fmap).all()):
+        return fmap
+    fmap = torch.nan_to_num(fmap, nan=0.0)
+    inf_mask = torch.isinf(fmap)
+    if bool(inf_mask.any()):
+        valid = fmap[~inf_mask]
+        if valid.numel() == 0:
+            return torch.zeros_like(fmap)
+        fmap = fmap.clamp(valid.min(), valid.max())
+    return fmap
+
+
+def _to_uint8(fmap: torch.Tensor, out: Optional[torch.Tensor]) -> torch.Tensor:
+    if out is not None and out.shape == fmap.shape and out.dtype == torch.uint8:
+        return out.copy_(fmap)
+    return fmap.to(torch.uint8)
+
+
+def normalize_to_uint8(fmap: torch.Tensor, out: Optional[torch.Tensor] = None) -> torch.Tensor:
+    """
+    Min-Max-Normalisierung auf 0–255 (uint8), mit denselben Edge Cases wie
+    ``VizEngine._normalize``: NaN → 0, ±Inf auf min/max der endlichen Werte.
+    out: optionaler uint8-Zielpuffer gleicher Shape (sonst neuer Tensor).
+    """
+    fmap = sanitize_non_finite(fmap)
+    fmap = fmap - fmap.min()
+    maxv = fmap.max()
+    if maxv > 0:
+        fmap = fmap / maxv
+    return _to_uint8((fmap * 255).clamp_(0, 255), out)
+
+
+def scale_to_uint8(
+    fmap: torch.Tensor,
+    lo: float,
+    hi: float,
+    out: Optional[torch.Tensor] = None,
+) -> torch.Tensor:
+    """
+    Lineare Abbildung des festen Wertebereichs [lo, hi] auf 0–255 (uint8);
+    Werte außerhalb werden abgeschnitten. Leerer Bereich → schwarze Map.
+    """
+    if hi - lo <= 0:
+        if out is not None and out.shape == fmap.shape and out.dtype == torch.uint8:
+            return out.zero_()
+        return torch.zeros(fmap.shape, dtype=torch.uint8, device=fmap.device)
+    return _to_uint8(((fmap - lo) * (255.0 / (hi - lo))).clamp_(0, 255), out)
+
+
+def as_float_activation(activation: torch.Tensor) -> torch.Tensor:
+    """int8-/bf16-Aktivierungen → float32 (andere bleiben unverändert)."""
+    if activation.is_quantized:
+        activation = activation.dequantize()
+    if activation.dtype != torch.float32:
+        activation = activation.float()
+    return activation
+
+
+def reduce_to_gray(
+    activation: torch.Tensor,
+    preset: VizPreset,
+    out: Optional[torch.Tensor] = None,
+) -> torch.Tensor:
+    """
+    Aktivierung (1, C, H, W) → Graustufen-Map (H, W) uint8.
+    int8-/bf16-Aktivierungen werden vorher in float32 umgewandelt.
+    out: optionaler uint8-Zielpuffer (H, W).
+    """
+    activation = as_float_activation(activation)
+    fmap = select_channels(activation, preset)
+    if fmap.shape[0] == 0:
+        if out is not None and out.shape == activation.shape[-2:]:
+            return out.zero_()
+        return torch.zeros(activation.shape[-2:], dtype=torch.uint8, device=activation.device)
+    weights = preset_weights(preset, activation.shape[1])
+    return normalize_to_uint8(reduce_channels(fmap, preset, weights), out=out)
+
+
+if __name__ == "__main__":
+    # Mini-Selbsttest: Vergleich mit dem NumPy-Pfad der VizEngine
+    import numpy as np
+
+    from core.viz_engine import VizEngine
+
+    viz = VizEngine()
+    act = torch.rand(1, 64, 28, 28)
+    for preset in (
+        VizPreset(id="a", layer_id="x", channels=[0, 3, 7], blend_mode="mean"),
+        VizPreset(id="b", layer_id="x", channels="topk", k=5, blend_mode="max"),
+        VizPreset(id="c", layer_id="x", channels="topk", k=3, blend_mode="sum"),
+        VizPreset(id="d", layer_id="x", channels=[1, 2], blend_mode="weighted"),
+        VizPreset(id="e", layer_id="x", channels=[4, 99, 9], blend_mode="weighted", weights=[2.0, 5.0, -1.0]),
+        VizPreset(id="f", layer_id="x", channels="topk", k=4, blend_mode="weighted",
+                  weights=[4.0, 3.0, 2.0, 1.0], rank_by="max"),
+        VizPreset(id="g", layer_id="x", channels="topk", k=6, blend_mode="mean", rank_by="l2"),
+        VizPreset(id="h", layer_id="x", channels="topk", k=2, blend_mode="sum", rank_by="mean"),
+    ):
+        fused = reduce_to_gray(act, preset).numpy()
+        plan = viz.compile(preset, tuple(act.shape))
+        reference = viz._normalize(plan.reduce(plan.select(act.numpy())))
+        diff = int(np.abs(fused.astype(np.int16) - reference.astype(np.int16)).max())
+        print(f"{preset.id}: max. Abweichung {diff}")
+        assert diff <= 1
@@ -2,22 +2,94 @@
 
 from __future__ import annotations
 
+import math
+from dataclasses import dataclass
+
 import numpy as np
 import cv2
-from typing import List, Dict
-from config.models import VizPreset
+from typing import Callable, Hashable, List, Dict, Optional, Tuple
+from config.models import (
+    DEFAULT_INTERPOLATION,
+    DEFAULT_RANK_BY,
+    DEFAULT_TOP_K,
+    INTERPOLATIONS,
+    RANK_CRITERIA,
+    VizPreset,
+)
+from core.buffer_pool import BufferPool, fits
+from core.colormaps import COLORMAP_ALIASES, DEFAULT_COLORMAP, build_colormap_luts, pack_lut
+
+MAX_CACHED_PLANS = 32
+MAX_CACHED_SCORES = 16
+DEFAULT_ATLAS_TILE_SIZE = 48
+
+# Interpolation beim Hochskalieren der Graustufen-Map auf Anzeigegröße
+# (Namen: config.models.INTERPOLATIONS)
+_CV2_INTERPOLATIONS: Dict[str, int] = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "cubic": cv2.INTER_CUBIC,
+    "lanczos": cv2.INTER_LANCZOS4,
+}
 
 
 class VizEngine:
     """
     Wandelt Aktivierungen eines Layers + VizPreset in ein darstellbares RGB-Bild um.
     Unterstützt:
-    - Auswahl mehrerer Featuremaps
-    - Blend-Modi (mean, max, sum, weighted)
-    - Colormaps (OpenCV + einfache RGB-Verstärkungsmodi)
+    - Auswahl mehrerer Featuremaps (Liste oder Top-K nach ``rank_by``)
+    - Blend-Modi (mean, max, sum, weighted mit Gewichten aus dem Preset)
+    - Colormaps als vorberechnete RGB-LUTs (OpenCV, einfache RGB-Verstärkungs-
+      modi und eigene Verläufe aus ``ExhibitConfig.colormaps``)
     - Overlay über Originalbild
+
+    Zwischenergebnisse (Normalisierung, Colormap, Overlay-Resize) liegen in
+    wiederverwendeten Puffern; eine Instanz ist daher für einen Thread
+    gedacht. Mit ``out=`` landet auch das Ergebnis in einem vorhandenen Array.
+
+    ``output_size=(Breite, Höhe)`` rendert direkt in Anzeigegröße: nur die
+    Graustufen-Map wird hochskaliert, Colormap und Overlay laufen danach in
+    voller Auflösung – das Originalbild wird dafür nicht mehr auf die
+    (bei tiefen Layern winzige) Map-Größe verkleinert.
     """
 
+    def __init__(self, custom_colormaps: Dict[str, List[str]] | None = None):
+        self._buffers = BufferPool()
+        self._custom_colormaps: Dict[str, List[str]] = {}
+        self._luts: Dict[str, np.ndarray] = {}
+        self._packed_luts: Dict[str, np.ndarray] = {}
+        self._plans: Dict[tuple, RenderPlan] = {}
+        # Channel-Scores je (cache_key, Kriterium, Shape), z.B. pro Snapshot der Feature-View
+        self._scores: Dict[tuple, np.ndarray] = {}
+        self.set_custom_colormaps(custom_colormaps or {})
+
+    # -----------------------------
+    # 0. Colormap-Tabellen
+    # -----------------------------
+
+    def set_custom_colormaps(self, custom_colormaps: Dict[str, List[str]]) -> None:
+        """Übernimmt eigene Colormaps aus der Config; baut LUTs nur bei Änderung neu."""
+        if self._luts and custom_colormaps == self._custom_colormaps:
+            return
+        self._custom_colormaps = {name: list(stops) for name, stops in custom_colormaps.items()}
+        self._luts = build_colormap_luts(self._custom_colormaps)
+        self._packed_luts = {name: pack_lut(lut) for name, lut in self._luts.items()}
+        # Kompilierte Pläne halten die alte LUT
+        self._plans.clear()
+
+    def colormap_names(self) -> List[str]:
+        """Alle verfügbaren Colormaps (eingebaute zuerst)."""
+        return list(self._luts)
+
+    def get_colormap_lut(self, cmap: str) -> np.ndarray:
+        """RGB-LUT (256, 3) einer Colormap; unbekannte Namen → viridis."""
+        return self._luts[self._resolve_colormap(cmap)]
+
+    def _resolve_colormap(self, cmap: str) -> str:
+        name = cmap.lower()
+        name = COLORMAP_ALIASES.get(name, name)
+        return name if name in self._luts else DEFAULT_COLORMAP
+
     # -----------------------------
     # 1. Hauptmethode
     # -----------------------------
@@ -26,38 +98,171 @@ class VizEngine:
         activation: np.ndarray,       # shape: (1, C, H, W)
         preset: VizPreset,
         original: np.ndarray | None = None,  # optional (H,W,3)
+        out: np.ndarray | None = None,       # optional Zielpuffer (H,W,3) uint8
+        output_size: Tuple[int, int] | None = None,  # optional (Breite, Höhe) der Anzeige
+        interpolation: str = DEFAULT_INTERPOLATION,
+        cache_key: Hashable | None = None,
     ) -> np.ndarray:
         """
-        Gibt ein fertiges RGB-Bild zurück (uint8), HxWx3.
+        Gibt ein fertiges RGB-Bild zurück (uint8), HxWx3 – bzw. in
+        ``output_size``, wenn angegeben (Interpolation: siehe ``INTERPOLATIONS``).
+        cache_key: Kennung der Aktivierung (z.B. Snapshot-Hash + Layer); mit ihr
+                   werden die Channel-Scores für Top-K wiederverwendet.
         """
+        plan = self.compile(preset, activation.shape)
+        scores = self.channel_scores(activation, plan.rank_by, cache_key) if plan.topk and cache_key is not None else None
+        return plan.render(
+            activation, original, out=out, output_size=output_size, interpolation=interpolation, scores=scores
+        )
 
-        # -------------------------
-        # A) Featuremaps auswählen
-        # -------------------------
-        fmap = self._select_featuremaps(activation, preset)
-
-        # -------------------------
-        # B) Featuremaps reduzieren
-        # -------------------------
-        reduced = self._reduce_featuremaps(fmap, preset)
-
-        # -------------------------
-        # C) Normalisieren
-        # -------------------------
-        heatmap_gray = self._normalize(reduced)
-
-        # -------------------------
-        # D) Colormap anwenden
-        # -------------------------
-        heatmap_rgb = self._apply_colormap(heatmap_gray, preset)
+    def visualize_gray(
+        self,
+        heatmap_gray: np.ndarray,     # shape: (H, W), uint8
+        preset: VizPreset,
+        original: np.ndarray | None = None,  # optional (H,W,3)
+        out: np.ndarray | None = None,       # optional Zielpuffer (H,W,3) uint8
+        output_size: Tuple[int, int] | None = None,  # optional (Breite, Höhe) der Anzeige
+        interpolation: str = DEFAULT_INTERPOLATION,
+    ) -> np.ndarray:
+        """
+        Schritte D–E für eine bereits reduzierte und normalisierte Map,
+        z.B. aus ``ModelEngine.run_inference_map``.
+        Gibt ein fertiges RGB-Bild zurück (uint8), HxWx3 bzw. in ``output_size``.
+        """
+        return self.compile(preset).render_gray(
+            heatmap_gray, original, out=out, output_size=output_size, interpolation=interpolation
+        )
 
-        # -------------------------
-        # E) Overlay
-        # -------------------------
-        if preset.overlay and original is not None:
-            heatmap_rgb = self._overlay(heatmap_rgb, original, preset.alpha)
+    def visualize_many(
+        self,
+        activation: np.ndarray,       # shape: (1, C, H, W)
+        presets: List[VizPreset],
+        original: np.ndarray | None = None,  # optional (H,W,3)
+        output_size: Tuple[int, int] | None = None,  # optional (Breite, Höhe) der Anzeige
+        interpolation: str = DEFAULT_INTERPOLATION,
+        cache_key: Hashable | None = None,
+    ) -> List[np.ndarray]:
+        """
+        Mehrere Presets über dieselbe Aktivierung (z.B. Einzel- und
+        Kombi-Vorschau der Feature-View, Favoriten-Galerie). Gemeinsam
+        genutzt werden:
+        - die Channel-Scores (einmal je Ranking-Kriterium; mit ``cache_key``
+          auch über Aufrufe hinweg, siehe ``visualize``)
+        - Min/Max und Skalierung aller Maps in einem vektorisierten Durchlauf
+        - ein einziges Resize des Originalbilds für alle Overlays
+        Gibt je Preset ein RGB-Bild zurück (uint8), HxWx3 – identisch zu
+        einzelnen ``visualize``-Aufrufen.
+        """
+        if not presets:
+            return []
+        plans = [self.compile(preset, activation.shape) for preset in presets]
+
+        # A) Channel-Scores nur einmal je Kriterium
+        scores: Dict[str, np.ndarray] = {}
+        for plan in plans:
+            if plan.topk and plan.rank_by not in scores:
+                scores[plan.rank_by] = self.channel_scores(activation, plan.rank_by, cache_key)
+
+        # B) + C) Reduktion je Preset, Normalisierung gemeinsam
+        reduced = [plan.reduce(plan.select(activation, scores=scores.get(plan.rank_by))) for plan in plans]
+        grays = self._normalize_many(reduced)
+
+        # D) + E) Original einmal auf Ausgabegröße bringen
+        resized = None
+        if original is not None and any(plan.overlay for plan in plans):
+            H, W = grays[0].shape
+            W, H = output_size if output_size is not None else (W, H)
+            resized = original if original.shape[:2] == (H, W) else cv2.resize(original, (W, H))
+
+        return [
+            plan.render_gray(gray, resized, output_size=output_size, interpolation=interpolation)
+            for plan, gray in zip(plans, grays)
+        ]
+
+    def render_atlas(
+        self,
+        activation: np.ndarray,       # shape: (1, C, H, W)
+        cols: int | None = None,
+        tile_size: int = DEFAULT_ATLAS_TILE_SIZE,
+        cmap: str = DEFAULT_COLORMAP,
+    ) -> "ChannelAtlas":
+        """
+        Alle C Featuremaps eines Layers als ein Mosaik (Channel-Atlas).
+        Jeder Channel wird für sich min-max-normalisiert (vektorisiert über
+        alle Channels); Kacheln, Skalierung und Colormap laufen jeweils in
+        einem Schritt über das ganze Mosaik.
+
+        cols: Spalten (Default: ≈ Quadratwurzel von C)
+        tile_size: Kachelbreite in Pixeln (Höhe nach Seitenverhältnis der Map)
+        Gibt einen ``ChannelAtlas`` zurück (Bild + Kachel-Koordinaten).
+        """
+        _, C, H, W = activation.shape
+        cols = max(1, min(cols if cols else math.ceil(math.sqrt(C)), C))
+        rows = math.ceil(C / cols)
+        tile_w = max(1, int(tile_size))
+        tile_h = max(1, round(tile_w * H / W))
+
+        # 1) Channels normalisieren, direkt in ein Kachel-Raster (rows*cols, H, W)
+        fmaps = activation[0]
+        work = fmaps.astype(fmaps.dtype if np.issubdtype(fmaps.dtype, np.floating) else np.float64)
+        grid = np.zeros((rows * cols, H, W), dtype=np.uint8)
+        self._normalize_stack(work, out=grid[:C])
+
+        # 2) Raster → Mosaik (reine Umsortierung) und in einem Resize auf Kachelgröße;
+        #    INTER_NEAREST hält die Kachelgrenzen exakt
+        mosaic = grid.reshape(rows, cols, H, W).transpose(0, 2, 1, 3).reshape(rows * H, cols * W)
+        mosaic = cv2.resize(mosaic, (cols * tile_w, rows * tile_h), interpolation=cv2.INTER_NEAREST)
+
+        # 3) Colormap einmal über das ganze Mosaik
+        image = _colorize(mosaic, self._packed_luts[self._resolve_colormap(cmap)])
+
+        atlas = ChannelAtlas(image=image, cols=cols, rows=rows, tile_w=tile_w, tile_h=tile_h, n_channels=C)
+        # Leere Kacheln am Ende schwarz statt Colormap-Minimum
+        if rows * cols > C:
+            x, y, _, _ = atlas.tile_rect(C)
+            image[y:, x:] = 0
+        return atlas
+
+    def channel_scores(
+        self,
+        activation: np.ndarray,       # shape: (1, C, H, W)
+        rank_by: str = DEFAULT_RANK_BY,
+        cache_key: Hashable | None = None,
+    ) -> np.ndarray:
+        """
+        Score je Channel für das Top-K-Ranking (siehe ``channel_scores`` auf
+        Modulebene). Mit ``cache_key`` werden die Scores gemerkt, sodass
+        wiederholte Renderings derselben Aktivierung sie nicht neu berechnen.
+        """
+        if cache_key is None:
+            return channel_scores(activation, rank_by)
+        key = (cache_key, rank_by, activation.shape)
+        scores = self._scores.get(key)
+        if scores is None:
+            if len(self._scores) >= MAX_CACHED_SCORES:
+                self._scores.pop(next(iter(self._scores)))
+            scores = channel_scores(activation, rank_by)
+            self._scores[key] = scores
+        return scores
+
+    def compile(self, preset: VizPreset, activation_shape: Tuple[int, ...] | None = None) -> "RenderPlan":
+        """
+        Übersetzt ein VizPreset einmalig in einen ``RenderPlan`` (aufgelöste
+        Channel-Indizes, Blend-Gewichte, LUT, Puffer), der dann pro Frame
+        aufgerufen wird. Pläne werden je Preset-Inhalt und Shape gecacht.
 
-        return heatmap_rgb
+        activation_shape: (1, C, H, W) oder None – dann bindet sich der Plan
+        beim ersten Frame an dessen Shape.
+        """
+        key = (_preset_key(preset), tuple(activation_shape) if activation_shape is not None else None)
+        plan = self._plans.get(key)
+        if plan is None:
+            if len(self._plans) >= MAX_CACHED_PLANS:
+                # ältesten Plan verwerfen (Dict behält die Einfügereihenfolge)
+                self._plans.pop(next(iter(self._plans)))
+            plan = RenderPlan(self, preset, activation_shape)
+            self._plans[key] = plan
+        return plan
 
     # -----------------------------
     # 2. Featuremap-Auswahl
@@ -67,18 +272,7 @@ class VizEngine:
         """
         Gibt ein Array shape (N_selected, H, W) zurück.
         """
-        _, C, H, W = activation.shape
-
-        if preset.channels == "topk":
-            # Energie-basierte Auswahl (größte Varianz)
-            k = preset.k if preset.k is not None else 3
-            variances = activation.reshape(C, -1).var(axis=1)
-            idx = np.argsort(variances)[-k:]
-            return activation[0, idx, :, :]
-
-        # explizite Liste
-        idx_list = [i for i in preset.channels if 0 <= i < C]
-        return activation[0, idx_list, :, :]
+        return self.compile(preset, activation.shape).select(activation)
 
     # -----------------------------
     # 3. Reduktion
@@ -89,115 +283,459 @@ class VizEngine:
         fmap shape = (N, H, W)
         Gibt 2D-Map zurück (H, W).
         """
-        if fmap.ndim == 2:
-            return fmap
-
-        if preset.blend_mode == "mean":
-            return fmap.mean(axis=0)
-        elif preset.blend_mode == "max":
-            return fmap.max(axis=0)
-        elif preset.blend_mode == "sum":
-            return fmap.sum(axis=0)
-        elif preset.blend_mode == "weighted":
-            # simple weights = 1/N (kann später konfigurierbar werden)
-            w = np.ones(fmap.shape[0]) / fmap.shape[0]
-            return np.tensordot(w, fmap, axes=(0, 0))
-        else:
-            return fmap.mean(axis=0)
+        return self.compile(preset).reduce(fmap)
 
     # -----------------------------
     # 4. Normalisierung
     # -----------------------------
 
-    def _normalize(self, fmap: np.ndarray) -> np.ndarray:
+    def _normalize(self, fmap: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
         """
-        fmap -> skaliert auf 0-255 uint8
+        fmap -> skaliert auf 0-255 uint8 (optional in ``out``)
 
         Behandelt Edge Cases:
         - NaN-Werte werden auf 0 gesetzt
         - Inf-Werte werden geclippt auf min/max der gültigen Werte
         - Reine 0-Aktivierungen bleiben 0
-        """
-        # NaN-Handhabung: NaNs auf 0 setzen
-        if np.isnan(fmap).any():
-            fmap = np.nan_to_num(fmap, nan=0.0)
-
-        # Inf-Handhabung: auf min/max der gültigen Werte clippen
-        if np.isinf(fmap).any():
-            valid_mask = ~np.isinf(fmap)
-            if valid_mask.any():
-                valid_min = fmap[valid_mask].min()
-                valid_max = fmap[valid_mask].max()
-                fmap = np.clip(fmap, valid_min, valid_max)
-            else:
-                # Alle Werte sind inf -> auf 0 setzen
-                fmap = np.zeros_like(fmap)
 
-        # Min-Max-Normalisierung
-        fmap = fmap - fmap.min()
-        maxv = fmap.max()
-        fmap = fmap / maxv if maxv > 0 else fmap
-        fmap = (fmap * 255).clip(0, 255).astype(np.uint8)
-        return fmap
+        Ergebnis ist bitgleich zur ursprünglichen, unfusionierten Variante
+        (Referenz in tests/test_viz_normalize.py), braucht aber im
+        Normalfall (alles endlich) nur min/max und drei elementweise
+        Durchläufe auf einem wiederverwendeten Puffer: NaN/Inf zeigen sich
+        bereits in min/max, und der Clip auf 0–255 ist nach der Division
+        durch den Maximalwert ohnehin ein No-op.
+        """
+        if not np.issubdtype(fmap.dtype, np.floating):
+            fmap = fmap.astype(np.float64)
+
+        fmin, fmax = fmap.min(), fmap.max()
+        if not (np.isfinite(fmin) and np.isfinite(fmax)):
+            # Seltener Pfad: NaN/Inf wie in der Referenz bereinigen
+            fmap = _sanitize_non_finite(fmap)
+            fmin, fmax = fmap.min(), fmap.max()
+
+        if not fits(out, fmap.shape):
+            out = np.empty(fmap.shape, dtype=np.uint8)
+
+        # max(fmap - fmin) == fmax - fmin, da die Subtraktion monoton ist
+        maxv = fmax - fmin
+        if not maxv > 0:
+            out.fill(0)
+            return out
+
+        # Gleiche Operationsreihenfolge wie die Referenz: (x - min) / max * 255 → uint8
+        work = self._buffers.scratch("normalize", fmap.shape, fmap.dtype)
+        np.subtract(fmap, fmin, out=work)
+        np.divide(work, maxv, out=work)
+        np.multiply(work, 255, out=out, casting="unsafe")
+        return out
+
+    def _normalize_many(self, maps: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Wie ``_normalize`` für mehrere Maps: Maps gleicher Shape und dtype
+        werden gestapelt und in einem Durchlauf skaliert (bitgleich zu
+        Einzelaufrufen).
+        """
+        maps = [m if np.issubdtype(m.dtype, np.floating) else m.astype(np.float64) for m in maps]
+        results: List[Optional[np.ndarray]] = [None] * len(maps)
+
+        groups: Dict[tuple, List[int]] = {}
+        for i, fmap in enumerate(maps):
+            groups.setdefault((fmap.dtype, fmap.shape), []).append(i)
+
+        for indices in groups.values():
+            if len(indices) == 1:
+                results[indices[0]] = self._normalize(maps[indices[0]])
+                continue
+            gray = self._normalize_stack(np.stack([maps[i] for i in indices]))
+            for j, i in enumerate(indices):
+                results[i] = gray[j]
+        return results
+
+    def _normalize_stack(self, stack: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Normalisiert jede Map eines Stapels (N, H, W) einzeln auf 0–255 uint8,
+        vektorisiert über alle Maps. ``stack`` (float) wird dabei überschrieben.
+        Maps mit NaN/Inf laufen einzeln über ``_normalize``.
+        """
+        flat = stack.reshape(len(stack), -1)
+        fmin, fmax = flat.min(axis=1), flat.max(axis=1)
+        non_finite = np.flatnonzero(~(np.isfinite(fmin) & np.isfinite(fmax)))
+        # Originalwerte der seltenen Sonderfälle vor dem In-place-Rechnen sichern
+        fallback = {int(j): stack[j].copy() for j in non_finite}
+
+        if not fits(out, stack.shape):
+            out = np.empty(stack.shape, dtype=np.uint8)
+        with np.errstate(invalid="ignore", over="ignore"):
+            maxv = fmax - fmin
+            # konstante Maps sind nach der Subtraktion 0 – Division durch 1 lässt sie unverändert
+            maxv[~(maxv > 0)] = 1
+            np.subtract(stack, fmin[:, None, None], out=stack)
+            np.divide(stack, maxv[:, None, None], out=stack)
+            np.multiply(stack, 255, out=out, casting="unsafe")
+
+        for j, fmap in fallback.items():
+            self._normalize(fmap, out=out[j])
+        return out
 
     # -----------------------------
     # 5. Colormaps
     # -----------------------------
 
-    def _apply_colormap(self, gray: np.ndarray, preset: VizPreset) -> np.ndarray:
+    def _apply_colormap(self, gray: np.ndarray, preset: VizPreset, out: np.ndarray | None = None) -> np.ndarray:
         """
         Unterstützte Modi:
         - OpenCV-Colormaps: viridis, magma, inferno, etc.
         - simple RGB highlighting: "red", "green", "blue"
+        - eigene Colormaps aus der Config
+        out: optionaler Zielpuffer (H, W, 3) uint8.
         """
-        cmap = preset.cmap.lower()
-
-        if cmap in ["red", "r"]:
-            rgb = np.zeros((gray.shape[0], gray.shape[1], 3), dtype=np.uint8)
-            rgb[:, :, 2] = gray
-            return rgb
-
-        if cmap in ["green", "g"]:
-            rgb = np.zeros((gray.shape[0], gray.shape[1], 3), dtype=np.uint8)
-            rgb[:, :, 1] = gray
-            return rgb
-
-        if cmap in ["blue", "b"]:
-            rgb = np.zeros((gray.shape[0], gray.shape[1], 3), dtype=np.uint8)
-            rgb[:, :, 0] = gray
-            return rgb
-
-        # OpenCV colormaps
-        cv_maps = {
-            "viridis": cv2.COLORMAP_VIRIDIS,
-            "magma": cv2.COLORMAP_MAGMA,
-            "inferno": cv2.COLORMAP_INFERNO,
-            "plasma": cv2.COLORMAP_PLASMA,
-            "jet": cv2.COLORMAP_JET,
-        }
-
-        if cmap in cv_maps:
-            return cv2.applyColorMap(gray, cv_maps[cmap])
-
-        # fallback
-        return cv2.applyColorMap(gray, cv2.COLORMAP_VIRIDIS)
+        return self.compile(preset).colorize(gray, out=out)
 
     # -----------------------------
     # 6. Overlay
     # -----------------------------
 
-    def _overlay(self, heatmap_rgb: np.ndarray, original: np.ndarray, alpha: float) -> np.ndarray:
+    def _overlay(
+        self,
+        heatmap_rgb: np.ndarray,
+        original: np.ndarray,
+        alpha: float,
+        out: np.ndarray | None = None,
+        resized: np.ndarray | None = None,
+    ) -> np.ndarray:
         """
         Beide müssen HxWx3 uint8 sein.
+        ``out`` darf ``heatmap_rgb`` selbst sein (elementweise Operation).
+        ``resized``: optionaler Puffer für das auf Heatmap-Größe skalierte Original.
         """
         # resize original to heatmap size
         H, W, _ = heatmap_rgb.shape
-        original_resized = cv2.resize(original, (W, H))
+        if original.shape[:2] == (H, W):
+            original_resized = original
+        else:
+            if not fits(resized, (H, W, original.shape[2]), original.dtype):
+                resized = self._buffers.scratch("overlay", (H, W, original.shape[2]), original.dtype)
+            original_resized = cv2.resize(original, (W, H), dst=resized)
 
-        blended = cv2.addWeighted(original_resized, 1 - alpha, heatmap_rgb, alpha, 0)
+        if not fits(out, heatmap_rgb.shape):
+            out = None
+        blended = cv2.addWeighted(original_resized, 1 - alpha, heatmap_rgb, alpha, 0, dst=out)
         return blended
 
 
+# ------------------------------------------------------
+# Kompilierte Render-Pläne
+# ------------------------------------------------------
+
+
+def _colorize(
+    gray: np.ndarray,
+    packed_lut: np.ndarray,
+    rgba: np.ndarray | None = None,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Graustufen (H, W) uint8 → RGB über eine gepackte LUT: ein einziges
+    ``np.take`` (4 Byte je Eintrag), danach wird nur noch der leere vierte
+    Kanal abgeschnitten. ``rgba``/``out``: optionale Puffer.
+    """
+    H, W = gray.shape
+    if not fits(rgba, (H, W), np.uint32):
+        rgba = np.empty((H, W), dtype=np.uint32)
+    np.take(packed_lut, gray, out=rgba, mode="clip")
+    if not fits(out, (H, W, 3)):
+        out = None
+    return cv2.cvtColor(rgba.view(np.uint8).reshape(H, W, 4), cv2.COLOR_RGBA2RGB, dst=out)
+
+
+@dataclass
+class ChannelAtlas:
+    """Mosaik aller Channels eines Layers; Kachel i = Channel i, zeilenweise."""
+    image: np.ndarray       # (rows * tile_h, cols * tile_w, 3) RGB uint8
+    cols: int
+    rows: int
+    tile_w: int
+    tile_h: int
+    n_channels: int
+
+    def channel_at(self, x: float, y: float) -> Optional[int]:
+        """Channel-Index unter Bildkoordinate (x, y), z.B. für Klicks; None außerhalb."""
+        if x < 0 or y < 0:
+            return None
+        col, row = int(x) // self.tile_w, int(y) // self.tile_h
+        if col >= self.cols or row >= self.rows:
+            return None
+        channel = row * self.cols + col
+        return channel if channel < self.n_channels else None
+
+    def tile_rect(self, channel: int) -> Tuple[int, int, int, int]:
+        """(x, y, Breite, Höhe) der Kachel eines Channels im Atlasbild."""
+        row, col = divmod(channel, self.cols)
+        return col * self.tile_w, row * self.tile_h, self.tile_w, self.tile_h
+
+
+_REDUCERS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "mean": lambda fmap: fmap.mean(axis=0),
+    "max": lambda fmap: fmap.max(axis=0),
+    "sum": lambda fmap: fmap.sum(axis=0),
+}
+
+
+def channel_scores(activation: np.ndarray, rank_by: str = DEFAULT_RANK_BY) -> np.ndarray:
+    """
+    (1, C, H, W) → (C,) Score je Channel, eine Reduktion über die
+    zusammenhängende (C, H·W)-Sicht:
+    - variance: Varianz (Default, wie bisher)
+    - mean: mittlere Aktivierung
+    - max: stärkste Einzelaktivierung
+    - l2: Energie (Summe der Quadrate)
+    """
+    C = activation.shape[1]
+    flat = activation.reshape(C, -1)
+    if rank_by == "mean":
+        return flat.mean(axis=1)
+    if rank_by == "max":
+        return flat.max(axis=1)
+    if rank_by == "l2":
+        return np.einsum("ij,ij->i", flat, flat)
+    return flat.var(axis=1)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indizes der k höchsten Scores, stärkster zuerst. ``argpartition`` statt
+    vollständigem ``argsort``; sortiert werden nur die k Gewinner.
+    k <= 0 oder k >= C: alle Channels.
+    """
+    C = len(scores)
+    if k <= 0 or k >= C:
+        return np.argsort(scores)[::-1]
+    idx = np.argpartition(scores, C - k)[C - k:]
+    return idx[np.argsort(scores[idx])[::-1]]
+
+
+def preset_weights(preset: VizPreset, num_channels: int) -> Optional[List[float]]:
+    """
+    Blend-Gewichte in Auswahl-Reihenfolge (Liste: ungültige Channels fallen
+    samt Gewicht weg; Top-K: je Rang). None = gleichgewichtet (1/N).
+    """
+    if preset.blend_mode != "weighted" or not preset.weights:
+        return None
+    if preset.channels == "topk":
+        return [float(w) for w in preset.weights]
+    return [float(w) for c, w in zip(preset.channels, preset.weights) if 0 <= c < num_channels]
+
+
+def _preset_key(preset: VizPreset) -> tuple:
+    """Hashbarer Schnappschuss der darstellungsrelevanten Preset-Felder."""
+    channels = preset.channels if isinstance(preset.channels, str) else tuple(preset.channels)
+    weights = tuple(preset.weights) if preset.weights is not None else None
+    return (
+        channels,
+        preset.k,
+        preset.blend_mode,
+        preset.cmap.lower(),
+        bool(preset.overlay),
+        float(preset.alpha),
+        weights,
+        preset.rank_by,
+    )
+
+
+class RenderPlan:
+    """
+    Ein für ein VizPreset (und eine Aktivierungs-Shape) vorbereiteter
+    Darstellungsweg: Channel-Indizes, Blend-Gewichte, LUT und Puffer werden
+    einmal aufgelöst, pro Frame laufen nur noch die Rechenschritte A–E.
+
+    Aufruf: ``plan(activation, original)`` bzw. ``plan.render_gray(gray, original)``
+    für den fusionierten Pfad der ModelEngine. Das Ergebnis liegt ohne ``out``
+    in einem neuen Array. Ändert sich die Aktivierungs-Shape (z.B. andere
+    Kameraauflösung mit keep_aspect), bindet sich der Plan neu.
+
+    Mit ``output_size`` hält der Plan zusätzlich Puffer in Anzeigegröße
+    (hochskalierte Map, RGBA, skaliertes Original); sie werden nur bei
+    geänderter Größe neu angelegt.
+    """
+
+    def __init__(self, engine: VizEngine, preset: VizPreset, activation_shape: Tuple[int, ...] | None = None):
+        self._engine = engine
+        self.preset = preset
+
+        # Preset-Felder einmalig auflösen
+        self.topk = preset.channels == "topk"
+        self.k = preset.k if preset.k is not None else DEFAULT_TOP_K
+        self.rank_by = preset.rank_by if preset.rank_by in RANK_CRITERIA else DEFAULT_RANK_BY
+        self.blend_mode = preset.blend_mode if preset.blend_mode in _REDUCERS or preset.blend_mode == "weighted" else "mean"
+        self._reduce_op = _REDUCERS.get(self.blend_mode)
+        self.cmap = engine._resolve_colormap(preset.cmap)
+        self.packed_lut = engine._packed_luts[self.cmap]
+        self.overlay = bool(preset.overlay)
+        self.alpha = float(preset.alpha)
+
+        # Shape-abhängig (bind)
+        self.activation_shape: Optional[Tuple[int, ...]] = None
+        self.channel_idx: Optional[np.ndarray] = None
+        self.weights: Optional[np.ndarray] = None
+        self._map_shape: Optional[Tuple[int, int]] = None
+        self._gray: Optional[np.ndarray] = None
+        self._rgba: Optional[np.ndarray] = None
+        self._upsampled: Optional[np.ndarray] = None
+        self._resized: Optional[np.ndarray] = None
+        if activation_shape is not None:
+            self.bind(activation_shape)
+
+    def bind(self, activation_shape: Tuple[int, ...]) -> None:
+        """Löst Channel-Indizes und Blend-Gewichte für (1, C, H, W) auf und legt Puffer an."""
+        _, C, H, W = activation_shape
+        if self.topk:
+            # top_k_indices liefert min(k, C) Channels (k <= 0: alle)
+            n_selected = C if self.k <= 0 else min(self.k, C)
+        else:
+            # explizite Liste, ungültige Indizes fallen weg
+            self.channel_idx = np.array([i for i in self.preset.channels if 0 <= i < C], dtype=np.intp)
+            n_selected = len(self.channel_idx)
+
+        if self.blend_mode == "weighted" and n_selected > 0:
+            # Gewichte aus dem Preset; fehlen sie (oder sind es zu wenige): 1/N
+            weights = preset_weights(self.preset, C)
+            if weights is not None and len(weights) >= n_selected:
+                self.weights = np.array(weights[:n_selected], dtype=np.float64)
+            else:
+                self.weights = np.ones(n_selected) / n_selected
+        self.activation_shape = tuple(activation_shape)
+        self._bind_map((H, W))
+
+    def _bind_map(self, map_shape: Tuple[int, int]) -> None:
+        if map_shape == self._map_shape:
+            return
+        self._map_shape = map_shape
+        self._gray = np.empty(map_shape, dtype=np.uint8)
+
+    # -------------------------
+    # Schritte
+    # -------------------------
+
+    def select(self, activation: np.ndarray, scores: np.ndarray | None = None) -> np.ndarray:
+        """
+        A) (1, C, H, W) → (N, H, W); Top-K in absteigender Reihenfolge.
+        scores: optional bereits berechnete Channel-Scores nach ``rank_by``,
+                z.B. aus ``visualize_many`` oder dem Score-Cache der Engine.
+        """
+        if activation.shape != self.activation_shape:
+            self.bind(activation.shape)
+        if self.topk:
+            if scores is None:
+                scores = channel_scores(activation, self.rank_by)
+            idx = top_k_indices(scores, self.k)
+            return activation[0, idx, :, :]
+        return activation[0, self.channel_idx, :, :]
+
+    def reduce(self, fmap: np.ndarray) -> np.ndarray:
+        """B) (N, H, W) → (H, W)."""
+        if fmap.ndim == 2:
+            return fmap
+        if self._reduce_op is not None:
+            return self._reduce_op(fmap)
+        weights = self.weights
+        if weights is None or len(weights) != fmap.shape[0]:
+            # Plan nicht (passend) gebunden: Preset-Gewichte nur bei exakt passender Anzahl
+            N = fmap.shape[0]
+            preset_w = self.preset.weights
+            weights = np.array(preset_w, dtype=np.float64) if preset_w and len(preset_w) == N else np.ones(N) / N
+        return np.tensordot(weights, fmap, axes=(0, 0))
+
+    def upsample(
+        self,
+        gray: np.ndarray,
+        output_size: Tuple[int, int],
+        interpolation: str = DEFAULT_INTERPOLATION,
+    ) -> np.ndarray:
+        """Graustufen-Map (H, W) → (Höhe, Breite) aus ``output_size`` (Puffer des Plans)."""
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unbekannte Interpolation '{interpolation}' (erlaubt: {', '.join(INTERPOLATIONS)})")
+        W, H = output_size
+        if gray.shape == (H, W):
+            return gray
+        if not fits(self._upsampled, (H, W)):
+            self._upsampled = np.empty((H, W), dtype=np.uint8)
+        return cv2.resize(gray, (W, H), dst=self._upsampled, interpolation=_CV2_INTERPOLATIONS[interpolation])
+
+    def colorize(self, gray: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """D) Graustufen-Map (H, W) uint8 → RGB über die gepackte LUT (ein ``np.take``)."""
+        if not fits(self._rgba, gray.shape, np.uint32):
+            self._rgba = np.empty(gray.shape, dtype=np.uint32)
+        return _colorize(gray, self.packed_lut, rgba=self._rgba, out=out)
+
+    def render_gray(
+        self,
+        heatmap_gray: np.ndarray,
+        original: np.ndarray | None = None,
+        out: np.ndarray | None = None,
+        output_size: Tuple[int, int] | None = None,
+        interpolation: str = DEFAULT_INTERPOLATION,
+    ) -> np.ndarray:
+        """
+        Schritte D–E für eine fertige Graustufen-Map.
+        output_size: (Breite, Höhe) des Ergebnisses; die Map wird vor der
+                     Colormap einmal hochskaliert, das Original auf diese
+                     Größe gebracht (statt auf Map-Größe verkleinert).
+        """
+        if output_size is not None:
+            heatmap_gray = self.upsample(heatmap_gray, output_size, interpolation)
+        heatmap_rgb = self.colorize(heatmap_gray, out=out)
+        if self.overlay and original is not None:
+            H, W, _ = heatmap_rgb.shape
+            if original.shape[:2] != (H, W) and not fits(self._resized, (H, W, original.shape[2]), original.dtype):
+                self._resized = np.empty((H, W, original.shape[2]), dtype=original.dtype)
+            heatmap_rgb = self._engine._overlay(
+                heatmap_rgb, original, self.alpha, out=heatmap_rgb, resized=self._resized
+            )
+        return heatmap_rgb
+
+    def render(
+        self,
+        activation: np.ndarray,
+        original: np.ndarray | None = None,
+        out: np.ndarray | None = None,
+        output_size: Tuple[int, int] | None = None,
+        interpolation: str = DEFAULT_INTERPOLATION,
+        scores: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Schritte A–E: Aktivierung (1, C, H, W) → RGB-Bild (H, W, 3) bzw. ``output_size``, uint8."""
+        reduced = self.reduce(self.select(activation, scores=scores))
+        self._bind_map(reduced.shape)
+        heatmap_gray = self._engine._normalize(reduced, out=self._gray)
+        return self.render_gray(heatmap_gray, original, out=out, output_size=output_size, interpolation=interpolation)
+
+    __call__ = render
+
+
+# ------------------------------------------------------
+# Normalisierung: NaN/Inf-Bereinigung
+# ------------------------------------------------------
+
+def _sanitize_non_finite(fmap: np.ndarray) -> np.ndarray:
+    """NaN/Inf-Behandlung der Normalisierung (ohne die Skalierung)."""
+    # NaN-Handhabung: NaNs auf 0 setzen
+    # (nan_to_num ersetzt dabei auch ±Inf durch die größten endlichen Werte)
+    if np.isnan(fmap).any():
+        fmap = np.nan_to_num(fmap, nan=0.0)
+
+    # Inf-Handhabung: auf min/max der gültigen Werte clippen
+    if np.isinf(fmap).any():
+        valid_mask = ~np.isinf(fmap)
+        if valid_mask.any():
+            valid_min = fmap[valid_mask].min()
+            valid_max = fmap[valid_mask].max()
+            fmap = np.clip(fmap, valid_min, valid_max)
+        else:
+            # Alle Werte sind inf -> auf 0 setzen
+            fmap = np.zeros_like(fmap)
+    return fmap
+
+
 # ------------------------------------------------------
 # Minimaler Selbsttest (optional)
 # ------------------------------------------------------
@@ -211,3 +749,56 @@ if __name__ == "__main__":
     img = engine.visualize(fmap, preset)
 
     print("Output shape:", img.shape)  # (H, W, 3)
+
+    rng = np.random.default_rng(0)
+
+    # visualize_many entspricht einzelnen visualize-Aufrufen
+    many_presets = [
+        VizPreset(id="m1", layer_id="conv1", channels=[2], overlay=True, cmap="jet"),
+        VizPreset(id="m2", layer_id="conv1", channels="topk", k=2, blend_mode="max", overlay=True),
+        VizPreset(id="m3", layer_id="conv1", channels=[0, 4], blend_mode="weighted", cmap="red"),
+    ]
+    original = rng.integers(0, 255, size=(60, 80, 3), dtype=np.uint8)
+    many = engine.visualize_many(fmap, many_presets, original)
+    for p, img_many in zip(many_presets, many):
+        assert np.array_equal(img_many, engine.visualize(fmap, p, original)), p.id
+    print(f"visualize_many: {len(many)} Presets identisch zu visualize")
+
+    # Channel-Atlas: jede Kachel entspricht der Einzel-Channel-Ansicht
+    atlas = engine.render_atlas(fmap, cols=2, tile_size=20, cmap="jet")
+    for ch in range(atlas.n_channels):
+        x, y, w, h = atlas.tile_rect(ch)
+        single = engine.visualize(fmap, VizPreset(id="s", layer_id="conv1", channels=[ch], cmap="jet"))
+        assert np.array_equal(atlas.image[y:y + h, x:x + w], cv2.resize(single, (w, h), interpolation=cv2.INTER_NEAREST))
+        assert atlas.channel_at(x + w // 2, y + h // 2) == ch
+    print(f"Atlas: {atlas.n_channels} Channels, {atlas.rows}×{atlas.cols} Kacheln, Bild {atlas.image.shape}")
+
+    # Anzeigegröße: Map einmal hochskalieren, Colormap und Overlay in voller Auflösung
+    size = (160, 120)
+    display = engine.visualize(fmap, many_presets[1], original, output_size=size, interpolation="nearest")
+    small = engine.visualize(fmap, VizPreset(**{**many_presets[1].__dict__, "overlay": False}))
+    heat = cv2.resize(small, size, interpolation=cv2.INTER_NEAREST)
+    alpha = many_presets[1].alpha
+    expected = cv2.addWeighted(cv2.resize(original, size), 1 - alpha, heat, alpha, 0)
+    assert display.shape == (120, 160, 3) and np.array_equal(display, expected)
+    assert [im.shape for im in engine.visualize_many(fmap, many_presets, original, output_size=size)] == [(120, 160, 3)] * 3
+    print(f"Anzeigegröße: {display.shape}")
+
+    # Ranking-Kriterien: argpartition wählt dieselben Channels wie ein vollständiges argsort
+    big = rng.standard_normal((1, 64, 8, 8)).astype(np.float32)
+    for rank_by in RANK_CRITERIA:
+        scores = channel_scores(big, rank_by)
+        for k in (1, 5, 64, 100):
+            assert np.array_equal(top_k_indices(scores, k), np.argsort(scores)[::-1][:k]), (rank_by, k)
+
+    # Gewichte: eine tensordot über die gewählten Channels, Top-K stärkster zuerst
+    weighted = VizPreset(id="w", layer_id="conv1", channels="topk", k=3, blend_mode="weighted",
+                         weights=[3.0, 2.0, 1.0], rank_by="l2")
+    idx = top_k_indices(channel_scores(big, "l2"), 3)
+    expected = engine._normalize(np.tensordot([3.0, 2.0, 1.0], big[0, idx], axes=(0, 0)))
+    plan = engine.compile(weighted, big.shape)
+    assert np.array_equal(engine._normalize(plan.reduce(plan.select(big))), expected)
+    cached = engine.visualize(big, weighted, cache_key="snapshot")
+    assert np.array_equal(cached, engine.visualize(big, weighted, cache_key="snapshot"))
+    assert np.array_equal(cached, engine.visualize(big, weighted)) and len(engine._scores) == 1
+    print(f"Ranking: {len(RANK_CRITERIA)} Kriterien, Gewichte {weighted.weights}")
@@ -0,0 +1,124 @@
+# core/weight_store.py
+"""
+Lokaler, versionierter Weight-Store für die ModelEngine.
+
+Gewichte werden einmalig als State-Dict unter ``weights/<name>.pt`` abgelegt
+und danach offline per mmap geladen (kein Torch-Hub-Cache, kein Download,
+keine vollständige Deserialisierung beim Start).
+
+``ModelConfig.weights`` kann sein:
+- "imagenet": Alias für die torchvision-ImageNet-Gewichte des Backbones,
+  z.B. ``resnet18_imagenet1k_v1`` oder ``resnet50_imagenet1k_v2``
+- ein Name im Store, z.B. "resnet18_imagenet1k_v1" oder "resnet18_ausstellung_v2"
+- ein Pfad zu einer .pt/.pth-Datei (relativ zum Projekt-Root oder absolut)
+
+Gewichte anlegen (einmalig, mit Netzwerk):
+    python -m core.weight_store resnet18
+    python -m core.weight_store mobilenet_v3_small
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+from pathlib import Path
+from typing import Dict
+
+import torch
+import torch.nn as nn
+
+from config.models import ModelConfig
+from config.service import BASE_DIR, WEIGHTS_DIR
+from core.backbones import get_backbone
+
+logger = logging.getLogger(__name__)
+
+WEIGHT_SUFFIXES = (".pt", ".pth")
+IMAGENET_ALIAS = "imagenet"
+
+
+class WeightsNotFoundError(FileNotFoundError):
+    """Gewichtsdatei für ein Modell fehlt im lokalen Store."""
+
+
+def store_name(model_name: str, weights: str) -> str:
+    """Löst den Alias "imagenet" zum versionierten Store-Namen auf."""
+    if weights == IMAGENET_ALIAS:
+        return f"{model_name}_{get_backbone(model_name).imagenet_weights.lower()}"
+    return weights
+
+
+def resolve_weights_path(model_cfg: ModelConfig) -> Path:
+    """Bestimmt die Gewichtsdatei für ``model_cfg.weights`` (Pfad oder Store-Name)."""
+    weights = model_cfg.weights
+    looks_like_path = weights.endswith(WEIGHT_SUFFIXES) or "/" in weights or "\\" in weights
+    if looks_like_path:
+        path = Path(weights)
+        return path if path.is_absolute() else BASE_DIR / path
+    return WEIGHTS_DIR / f"{store_name(model_cfg.name, weights)}.pt"
+
+
+def weights_fingerprint(model_cfg: ModelConfig) -> str:
+    """
+    Kennung des Dateiinhalts (Größe + Änderungszeit) für Caches, die aus den
+    Gewichten abgeleitet sind – ein neu exportierter Checkpoint unter gleichem
+    Namen ergibt eine andere Kennung. Ohne Datei: "missing".
+    """
+    try:
+        stat = resolve_weights_path(model_cfg).stat()
+    except OSError:
+        return "missing"
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def load_state_dict(path: Path) -> Dict[str, torch.Tensor]:
+    """Lädt ein State-Dict per mmap (Tensoren werden erst bei Zugriff eingelesen)."""
+    if not path.exists():
+        raise WeightsNotFoundError(path)
+    return torch.load(str(path), map_location="cpu", mmap=True, weights_only=True)
+
+
+def load_model(model_cfg: ModelConfig) -> nn.Module:
+    """
+    Baut das Modell ohne Initialisierung (meta-Device) und übernimmt die
+    gemappten Gewichte direkt (``assign=True``, keine Kopie).
+    """
+    builder = get_backbone(model_cfg.name).builder()
+
+    path = resolve_weights_path(model_cfg)
+    try:
+        state_dict = load_state_dict(path)
+    except WeightsNotFoundError:
+        raise WeightsNotFoundError(
+            f"Gewichtsdatei für Modell '{model_cfg.name}' (weights='{model_cfg.weights}') "
+            f"nicht gefunden: {path}\n"
+            f"Einmalig anlegen mit: python -m core.weight_store {model_cfg.name}"
+        ) from None
+
+    with torch.device("meta"):
+        model = builder(weights=None)
+    model.load_state_dict(state_dict, assign=True)
+    return model
+
+
+def export_weights(model_name: str, name: str | None = None) -> Path:
+    """
+    Lädt die torchvision-Standardgewichte (einmalig, benötigt Netzwerk bzw.
+    Hub-Cache) und legt sie im lokalen Store ab.
+    """
+    from torchvision import models
+
+    model = models.get_model(model_name, weights=get_backbone(model_name).imagenet_weights)
+    target = WEIGHTS_DIR / f"{name or store_name(model_name, IMAGENET_ALIAS)}.pt"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    torch.save(model.state_dict(), str(target))
+    logger.info(f"Gewichte gespeichert: {target}")
+    return target
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 2:
+        print("Aufruf: python -m core.weight_store <modell> [store-name]")
+        sys.exit(1)
+    export_weights(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,77 @@
+# tests/test_viz_normalize.py
+"""
+Äquivalenz der fusionierten Normalisierung (``VizEngine._normalize``) zur
+ursprünglichen, unfusionierten Variante – inklusive NaN/Inf-Randfällen.
+"""
+
+import numpy as np
+import pytest
+
+from core.viz_engine import VizEngine
+
+
+def _normalize_reference(fmap: np.ndarray) -> np.ndarray:
+    """Ursprüngliche, unfusionierte Normalisierung (Referenz)."""
+    # NaN-Handhabung: NaNs auf 0 setzen
+    if np.isnan(fmap).any():
+        fmap = np.nan_to_num(fmap, nan=0.0)
+
+    # Inf-Handhabung: auf min/max der gültigen Werte clippen
+    if np.isinf(fmap).any():
+        valid_mask = ~np.isinf(fmap)
+        if valid_mask.any():
+            valid_min = fmap[valid_mask].min()
+            valid_max = fmap[valid_mask].max()
+            fmap = np.clip(fmap, valid_min, valid_max)
+        else:
+            # Alle Werte sind inf -> auf 0 setzen
+            fmap = np.zeros_like(fmap)
+
+    # Min-Max-Normalisierung
+    fmap = fmap - fmap.min()
+    maxv = fmap.max()
+    fmap = fmap / maxv if maxv > 0 else fmap
+    fmap = (fmap * 255).clip(0, 255).astype(np.uint8)
+    return fmap
+
+
+_rng = np.random.default_rng(0)
+inf, nan = np.inf, np.nan
+
+CASES = {
+    "zufall_f32": _rng.standard_normal((56, 56)).astype(np.float32),
+    "zufall_f64": _rng.standard_normal((56, 56)),
+    "positiv_gross": (_rng.random((28, 28)) * 1e6).astype(np.float32),
+    "negativ": -_rng.random((14, 14)).astype(np.float32),
+    "winzige_spanne": (1.0 + _rng.random((14, 14)) * 1e-6).astype(np.float32),
+    "alles_null": np.zeros((7, 7), dtype=np.float32),
+    "konstant": np.full((7, 7), 3.5, dtype=np.float32),
+    "alles_nan": np.full((7, 7), nan, dtype=np.float32),
+    "einzelnes_nan": np.where(np.eye(7) > 0, nan, 1.0).astype(np.float32),
+    "plus_inf": np.array([[inf, 1.0], [2.0, 3.0]], dtype=np.float32),
+    "minus_inf": np.array([[-inf, 1.0], [2.0, 3.0]], dtype=np.float32),
+    "plus_minus_inf": np.array([[inf, -inf], [2.0, 3.0]], dtype=np.float32),
+    "alles_inf": np.array([[inf, -inf], [inf, inf]], dtype=np.float32),
+    "nan_und_inf": np.array([[nan, inf], [2.0, -inf]], dtype=np.float64),
+    "int": _rng.integers(-50, 50, size=(9, 9)),
+    "uint8": _rng.integers(0, 255, size=(9, 9), dtype=np.uint8),
+    "nicht_zusammenhaengend": _rng.standard_normal((20, 20)).astype(np.float32)[::2, 1::2],
+}
+
+
+# Die NaN/Inf-Fälle lösen bewusst ungültige Rechenoperationen aus
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("name", list(CASES))
+def test_normalize_matches_reference(name):
+    case = CASES[name]
+    engine = VizEngine()
+    with np.errstate(all="ignore"):
+        reference = _normalize_reference(case)
+        fused = engine._normalize(case)
+        out = np.empty(case.shape, dtype=np.uint8)
+        fused_out = engine._normalize(case, out=out)
+
+    assert fused.dtype == np.uint8
+    assert fused_out is out
+    assert np.array_equal(fused, reference)
+    assert np.array_equal(fused_out, reference)
@@ -8,6 +8,7 @@ sys.path.append(str(Path(__file__).resolve().parent.parent))
 # Views (modular)
 from ui_admin_streamlit.content_view import render as render_content
 from ui_admin_streamlit.feature_view import render as render_feature
+from core.inference_server import connect_inference_client, unix_sockets_supported
 # Optional: später
 # from ui_admin_streamlit.layout_view import render as render_layout
 
@@ -34,6 +35,45 @@ def main():
         except Exception as e:
             st.error(f"Kinomodus konnte nicht gestartet werden: {e}")
 
+    # ------------------------------
+    # Optional: lokaler Inferenz-Server
+    # (Modell wird einmal pro Rechner geladen und von Admin- und Kino-View geteilt)
+    # ------------------------------
+    if not unix_sockets_supported():
+        st.caption("Inferenz-Server auf dieser Plattform nicht verfügbar (keine Unix-Sockets).")
+    else:
+        server_proc = st.session_state.get("inference_server_proc")
+        if server_proc is not None and server_proc.poll() is not None:
+            # Eigener Server wurde inzwischen beendet
+            st.session_state.pop("inference_server_proc", None)
+            server_proc = None
+
+        if server_proc is None:
+            if st.button("Inferenz-Server starten"):
+                client = connect_inference_client()
+                if client is not None:
+                    client.close()
+                    st.info("Inferenz-Server läuft bereits.")
+                else:
+                    try:
+                        # Entspricht:  (im Projektroot)
+                        #   python -m core.inference_server
+                        st.session_state.inference_server_proc = subprocess.Popen(
+                            [sys.executable, "-m", "core.inference_server"],
+                            cwd=str(project_root),
+                        )
+                        st.info("Inferenz-Server wurde gestartet. Admin- und Kino-View nutzen ihn automatisch.")
+                    except Exception as e:
+                        st.error(f"Inferenz-Server konnte nicht gestartet werden: {e}")
+        elif st.button("Inferenz-Server stoppen"):
+            server_proc.terminate()
+            try:
+                server_proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                server_proc.kill()
+            st.session_state.pop("inference_server_proc", None)
+            st.info("Inferenz-Server wurde gestoppt.")
+
     # ------------------------------
     # Oben mittige Hauptnavigation
     # ------------------------------
@@ -12,7 +12,11 @@ from config.service import (
     MAX_FAVORITES_PER_MODEL_LAYER,
 )
 from config.models import LayerUIConfig, ModelConfig, ModelLayerContent, GlobalUITexts
-from core.model_engine import ModelEngine
+from core.backbones import BACKBONES, SUPPORTED_MODELS
+from core.colormaps import gradient_lut, validate_custom_colormaps
+from core.engine_registry import release_other_models
+from core.inference_server import get_engine_or_client
+from core.weight_store import IMAGENET_ALIAS, WeightsNotFoundError, resolve_weights_path
 
 
 PAGE_ID_GLOBAL = "global"
@@ -28,13 +32,29 @@ def _get_layer_by_id(cfg, layer_id: str) -> LayerUIConfig | None:
 def _get_model_layer_ids(cfg_model: ModelConfig) -> list[str]:
     """Bestimmt die Liste der Modell-Layer-IDs analog zur Feature-View.
 
-    Nutzt denselben Default wie ModelEngine, falls keine explizite Liste
-    hinterlegt ist. Hier wird kein ModelEngine-Objekt persistent gehalten,
-    sondern nur der Kontrakt der aktiven Layer verwendet.
+    Nutzt dieselbe prozessweit geteilte Engine (bzw. den Inferenz-Server) wie
+    die Feature-View, es wird also kein zusätzliches Modell geladen.
     """
-    # Wir instanziieren die Engine kurz, um die aktive Layer-Liste zu erhalten.
-    engine = ModelEngine(cfg_model)
-    return engine.get_active_layers()
+    return get_engine_or_client(cfg_model).get_active_layers()
+
+
+def _format_colormaps(colormaps: dict[str, list[str]]) -> str:
+    """Eigene Colormaps → Textfeld-Inhalt, eine Zeile je Colormap."""
+    return "\n".join(f"{name}: {', '.join(stops)}" for name, stops in colormaps.items())
+
+
+def _parse_colormaps(text: str) -> dict[str, list[str]]:
+    """Textfeld-Inhalt ("name: #rrggbb, #rrggbb, …" je Zeile) → Dict; ValueError bei Formfehlern."""
+    colormaps: dict[str, list[str]] = {}
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        name, sep, stops = line.partition(":")
+        if not sep or not name.strip():
+            raise ValueError(f"Zeile {line_no}: erwartet 'name: #rrggbb, #rrggbb, …'")
+        colormaps[name.strip()] = [s.strip() for s in stops.split(",") if s.strip()]
+    return colormaps
 
 
 def render():
@@ -57,7 +77,12 @@ def render():
         )
 
     # Modell-Layer-Liste aus ModelConfig / ModelEngine bestimmen
-    model_layer_ids = _get_model_layer_ids(cfg.model)
+    try:
+        model_layer_ids = _get_model_layer_ids(cfg.model)
+    except (WeightsNotFoundError, ValueError) as e:
+        # z.B. nach Modellwechsel ohne lokale Gewichte – Globalseite bleibt bedienbar
+        st.error(f"Modell konnte nicht geladen werden: {e}")
+        model_layer_ids = []
 
     # Linke Unternavigation: Global + Modell-Layer + bestehende UI-Layer
     nav_options: list[tuple[str, str]] = [("Global", PAGE_ID_GLOBAL)]
@@ -106,6 +131,59 @@ def render():
             "Label für Global/Home-Button",
             value=gt.home_button_label or "Home",
         )
+
+        st.markdown("---")
+        st.markdown("**Modell**")
+        current_model = cfg.model.name if cfg.model.name in SUPPORTED_MODELS else SUPPORTED_MODELS[0]
+        new_model = st.selectbox(
+            "Backbone",
+            SUPPORTED_MODELS,
+            index=SUPPORTED_MODELS.index(current_model),
+            format_func=lambda name: BACKBONES[name].display_name,
+            help=(
+                "Netz, dessen Aktivierungen gezeigt werden. Kleine Netze (MobileNet) "
+                "erreichen auf schwacher Kiosk-Hardware eher ein flüssiges Livebild. "
+                "Das Modell wird beim nächsten Zugriff geladen, ein Neustart ist nicht nötig."
+            ),
+        )
+        if new_model != cfg.model.name:
+            cfg.model.name = new_model
+            # Store-Namen/Pfade gehören zum alten Modell → auf ImageNet-Gewichte zurücksetzen
+            cfg.model.weights = IMAGENET_ALIAS
+            # Eigene Layer-Mappings gelten nur für das alte Modell
+            cfg.model.layer_mappings = []
+            if not resolve_weights_path(cfg.model).exists():
+                st.warning(
+                    f"Gewichte für '{new_model}' fehlen im lokalen Store. "
+                    f"Einmalig anlegen mit: python -m core.weight_store {new_model}"
+                )
+
+        st.markdown("---")
+        st.markdown("**Eigene Colormaps**")
+        colormaps_text = st.text_area(
+            "Colormaps (eine pro Zeile)",
+            value=_format_colormaps(cfg.colormaps),
+            placeholder="museum: #0b1d3a, #f2a900, #ffffff",
+            help=(
+                "Eigene Farbverläufe, z.B. in den Hausfarben der Ausstellung. "
+                "Farbstopps als Hex-Werte von niedriger zu hoher Aktivierung; "
+                "danach in der Feature-View als Colormap wählbar."
+            ),
+        )
+        try:
+            new_colormaps = _parse_colormaps(colormaps_text)
+            colormap_errors = validate_custom_colormaps(new_colormaps)
+        except ValueError as e:
+            new_colormaps, colormap_errors = None, [str(e)]
+
+        if colormap_errors:
+            for err in colormap_errors:
+                st.error(err)
+        else:
+            cfg.colormaps = new_colormaps
+            for name, stops in new_colormaps.items():
+                # Vorschau: Verlauf als schmaler Streifen
+                st.image(gradient_lut(stops)[None, :, :].repeat(16, axis=0), caption=name)
     elif active_page_id.startswith("model::"):
         # Modell-Layer-Content-Seite
         model_layer_id = active_page_id.split("::", 1)[1]
@@ -186,4 +264,6 @@ def render():
             set_selected_kivy_favorites(cfg, ml_id, names)
 
         save_config(cfg)
+        # Engines anderer Modelle freigeben; das gewählte Modell lädt lazy beim nächsten Zugriff
+        release_other_models(cfg.model.name)
         st.success("Gespeichert.")
@@ -3,6 +3,8 @@
 Konstanten für die Feature-View.
 """
 
+from config.models import BUILTIN_COLORMAPS, DEFAULT_COLORMAP, DEFAULT_RANK_BY, DEFAULT_TOP_K, RANK_CRITERIA  # noqa: F401
+
 # Channel-Auswahl-Modi
 MODE_SELECTED_CHANNELS = "Ausgewählte Channels"
 MODE_TOP_K = "Top-K"
@@ -10,11 +12,15 @@ MODE_TOP_K = "Top-K"
 # Blend-Modi
 BLEND_MODES = ["mean", "max", "sum", "weighted"]
 
-# Colormaps
-COLORMAPS = ["viridis", "magma", "inferno", "plasma", "jet", "red", "green", "blue"]
+# Ranking-Kriterien für Top-K
+RANK_BY_OPTIONS = list(RANK_CRITERIA)
+
+# Colormaps (eingebaute; eigene kommen aus ExhibitConfig.colormaps dazu)
+COLORMAPS = list(BUILTIN_COLORMAPS)
+
+# Eingabe-Auflösungen pro Favorit (None = Auflösung aus der Modell-Config)
+INPUT_SIZES = [None, 160, 224, 256, 320]
 
-# Default-Werte
+# Default-Werte (Top-K, Ranking und Colormap kommen aus config.models)
 DEFAULT_BLEND_MODE = "mean"
-DEFAULT_COLORMAP = "viridis"
 DEFAULT_ALPHA = 0.5
-DEFAULT_TOP_K = 3
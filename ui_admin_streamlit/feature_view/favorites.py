@@ -3,6 +3,10 @@ from __future__ import annotations
 import logging
 from typing import Dict, Any, List
 
+from config.service import input_size_error
+
+from .constants import RANK_BY_OPTIONS
+
 logger = logging.getLogger(__name__)
 
 
@@ -66,6 +70,31 @@ def validate_preset(preset: Dict[str, Any]) -> bool:
         logger.warning(f"Preset alpha muss zwischen 0 und 1 sein, ist: {alpha}")
         return False
 
+    # optionale Felder: Blend-Gewichte und Ranking-Kriterium
+    weights = preset.get("weights")
+    if weights is not None and not (
+        isinstance(weights, list) and all(isinstance(w, (int, float)) for w in weights)
+    ):
+        logger.warning("Preset weights muss eine Liste von Zahlen sein")
+        return False
+
+    # Gewichte werden per Position zugeordnet → doppelte Channels würden sie verschieben
+    if weights is not None and isinstance(channels, list) and len(set(channels)) != len(channels):
+        logger.warning("Preset channels müssen eindeutig sein, wenn weights gesetzt sind")
+        return False
+
+    if preset.get("rank_by", "variance") not in RANK_BY_OPTIONS:
+        logger.warning(f"Ungültiges rank_by: {preset.get('rank_by')}")
+        return False
+
+    # optionale Eingabegröße pro Favorit (None = Modell-Default)
+    input_size = preset.get("input_size")
+    if input_size is not None:
+        size_error = input_size_error(input_size)
+        if size_error:
+            logger.warning(f"Preset {size_error}")
+            return False
+
     return True
 
 
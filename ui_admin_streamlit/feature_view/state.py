@@ -9,16 +9,20 @@ import streamlit as st
 
 from config.models import ModelConfig
 from core.model_engine import ModelEngine
-from core.viz_engine import VizEngine
+from core.viz_engine import ChannelAtlas, VizEngine
 from .constants import (
     MODE_SELECTED_CHANNELS,
     DEFAULT_BLEND_MODE,
     DEFAULT_COLORMAP,
     DEFAULT_ALPHA,
-    DEFAULT_TOP_K
+    DEFAULT_TOP_K,
+    DEFAULT_RANK_BY,
 )
 
 
+MAX_CACHED_ATLASES = 8
+
+
 @dataclass
 class LayerState:
     """
@@ -27,11 +31,14 @@ class LayerState:
     mode: str = MODE_SELECTED_CHANNELS
     channels: List[int] = field(default_factory=list)
     k: int = DEFAULT_TOP_K
+    rank_by: str = DEFAULT_RANK_BY
     blend_mode: str = DEFAULT_BLEND_MODE
+    weights: Optional[List[float]] = None  # nur für blend_mode "weighted"
     colormap: str = DEFAULT_COLORMAP
     overlay: bool = False
     alpha: float = DEFAULT_ALPHA
     model_layer_id: str = "conv1"
+    input_size: Optional[int] = None  # None = Eingabegröße aus der Modell-Config
     last_channel: int = 0
     fav_name: str = ""
     # Name des Favoriten, der zuletzt explizit in diesen Layer-State geladen wurde.
@@ -45,11 +52,14 @@ class LayerState:
             "mode": self.mode,
             "channels": self.channels,
             "k": self.k,
+            "rank_by": self.rank_by,
             "blend_mode": self.blend_mode,
+            "weights": self.weights,
             "cmap": self.colormap,
             "overlay": self.overlay,
             "alpha": self.alpha,
             "model_layer_id": self.model_layer_id,
+            "input_size": self.input_size,
             "last_channel": self.last_channel,
             "fav_name": self.fav_name,
             "editing_favorite_name": self.editing_favorite_name,
@@ -62,11 +72,14 @@ class LayerState:
             mode=d.get("mode", MODE_SELECTED_CHANNELS),
             channels=d.get("channels", []),
             k=d.get("k", DEFAULT_TOP_K),
+            rank_by=d.get("rank_by", DEFAULT_RANK_BY),
             blend_mode=d.get("blend_mode", DEFAULT_BLEND_MODE),
+            weights=d.get("weights"),
             colormap=d.get("cmap", DEFAULT_COLORMAP),
             overlay=d.get("overlay", False),
             alpha=d.get("alpha", DEFAULT_ALPHA),
             model_layer_id=d.get("model_layer_id", "conv1"),
+            input_size=d.get("input_size"),
             last_channel=d.get("last_channel", 0),
             fav_name=d.get("fav_name", ""),
             editing_favorite_name=d.get("editing_favorite_name"),
@@ -84,11 +97,8 @@ def init_state() -> None:
     """
     Initialisiert die für die Feature-View benötigten Session-State-Einträge.
     """
-    if "feature_model_engine" not in st.session_state:
-        st.session_state.feature_model_engine = ModelEngine(
-            ModelConfig(name="resnet18", weights="imagenet"),
-            active_layer_ids=["conv1", "layer1", "layer2", "layer3", "layer4"],
-        )
+    # Die ModelEngine liegt nicht im Session-State, sondern wird prozessweit
+    # über core.engine_registry geteilt (siehe view.render).
     if "feature_viz_engine" not in st.session_state:
         st.session_state.feature_viz_engine = VizEngine()
     if "feature_state" not in st.session_state:
@@ -103,6 +113,10 @@ def init_state() -> None:
             "activations": None,
         }
 
+    # Channel-Atlas-Cache: (snapshot_hash, Modell, layer, input_size, cmap, LUT) → ChannelAtlas
+    if "feature_atlas_cache" not in st.session_state:
+        st.session_state.feature_atlas_cache = {}
+
     # Flag für einmaliges Laden eines Favoriten je Layer-Key
     if "feature_favorite_load_flags" not in st.session_state:
         # Struktur: { layer_key: bool }
@@ -128,6 +142,50 @@ def get_cached_activations(snapshot: np.ndarray, model_engine: ModelEngine) -> D
         return activations
 
 
+def model_cache_key(model_cfg: ModelConfig) -> tuple:
+    """
+    Modell-Anteil von Cache-Keys: Backbones teilen sich Layer-Namen und
+    Shapes (z.B. resnet18/resnet34), Gewichte, Präzision und Resize-Modus
+    ändern die Aktivierungen – ohne diese Felder käme nach einem
+    Modellwechsel ein veraltetes Ergebnis aus dem Cache.
+    """
+    return (model_cfg.name, model_cfg.weights, model_cfg.precision, model_cfg.resize_mode)
+
+
+def get_cached_atlas(
+    snapshot: np.ndarray,
+    activation: np.ndarray,
+    model_cfg: ModelConfig,
+    model_layer_id: str,
+    input_size: Optional[int],
+    cmap: str,
+    viz_engine: VizEngine,
+) -> ChannelAtlas:
+    """
+    Channel-Atlas eines Layers; gerendert nur bei neuem Snapshot, Modell,
+    Layer, Eingabegröße oder Colormap (inkl. geänderter Farbstopps einer
+    eigenen Colormap) – Slider-Bewegungen nutzen den Cache.
+    """
+    lut_hash = hashlib.md5(viz_engine.get_colormap_lut(cmap).tobytes()).hexdigest()
+    key = (
+        compute_snapshot_hash(snapshot),
+        model_cache_key(model_cfg),
+        model_layer_id,
+        input_size,
+        cmap,
+        lut_hash,
+    )
+    cache: Dict[tuple, ChannelAtlas] = st.session_state.feature_atlas_cache
+
+    atlas = cache.get(key)
+    if atlas is None:
+        if len(cache) >= MAX_CACHED_ATLASES:
+            cache.pop(next(iter(cache)))
+        atlas = viz_engine.render_atlas(activation, cmap=cmap)
+        cache[key] = atlas
+    return atlas
+
+
 def layer_state(layer_key: str) -> Dict[str, Any]:
     """
     Liefert (und initialisiert) den UI-State für einen einzelnen UI-Layer.
@@ -1,18 +1,64 @@
 from __future__ import annotations
 
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Tuple
 
 import cv2
 import streamlit as st
 
 from config.models import VizPreset
-from config.service import load_config, load_raw_config_dict, save_raw_config_dict
+from config.service import (
+    load_config,
+    load_raw_config_dict,
+    save_raw_config_dict,
+    resolve_calibration_dir,
+)
+from core.inference_server import InferenceClient, get_engine_or_client
 from core.model_engine import ModelEngine
 from core.viz_engine import VizEngine
 
 from .camera import detect_cameras, take_snapshot
+from .constants import COLORMAPS, DEFAULT_COLORMAP, DEFAULT_RANK_BY, INPUT_SIZES, RANK_BY_OPTIONS
 from .favorites import get_layer_favorites, upsert_favorite, delete_favorite
-from .state import init_state, layer_state
+from .state import compute_snapshot_hash, get_cached_atlas, init_state, layer_state, model_cache_key
+
+
+def _format_weights(weights: List[float] | None) -> str:
+    return ", ".join(f"{w:g}" for w in weights) if weights else ""
+
+
+def _parse_weights(text: str) -> List[float] | None:
+    """"1, 0.5, 2" → [1.0, 0.5, 2.0]; leer → None; ValueError bei ungültiger Eingabe."""
+    parts = [p.strip() for p in text.replace(";", ",").split(",") if p.strip()]
+    if not parts:
+        return None
+    try:
+        return [float(p) for p in parts]
+    except ValueError:
+        raise ValueError(f"Ungültige Gewichte '{text}' (erwartet: Zahlen, durch Komma getrennt)") from None
+
+
+def _unique_channels(
+    channels: List[int], weights: List[float] | None, n_channels: int | None = None
+) -> Tuple[List[int], List[float] | None]:
+    """
+    Entfernt doppelte (und bei ``n_channels`` ungültige) Channels samt ihrem Gewicht.
+
+    Gewichte gehören zum jeweiligen Listeneintrag; beim ersten Vorkommen eines
+    Channels bleibt dessen Gewicht erhalten. Passt die Anzahl der Gewichte nicht
+    zur Liste, werden sie unverändert zurückgegeben.
+    """
+    paired = weights is not None and len(weights) == len(channels)
+    kept: Dict[int, float | None] = {}
+    for i, c in enumerate(channels):
+        if not isinstance(c, int) or c in kept:
+            continue
+        if n_channels is not None and not 0 <= c < n_channels:
+            continue
+        kept[int(c)] = weights[i] if paired else None
+    if paired:
+        return list(kept), list(kept.values())
+    return list(kept), weights
 
 
 def render() -> None:
@@ -22,8 +68,12 @@ def render() -> None:
     cfg = load_config()
     raw_cfg = load_raw_config_dict()
 
-    model_engine: ModelEngine = st.session_state.feature_model_engine
+    # Eine Engine pro Prozess, von allen Browser-Sessions geteilt
+    # (bzw. der lokale Inferenz-Server, falls er läuft)
+    model_engine: ModelEngine | InferenceClient = get_engine_or_client(cfg.model)
     viz_engine: VizEngine = st.session_state.feature_viz_engine
+    # Eigene Colormaps können sich im Content-Editor geändert haben
+    viz_engine.set_custom_colormaps(cfg.colormaps)
 
     st.subheader("Feature-View – Snapshot-Konfiguration")
 
@@ -114,9 +164,16 @@ def render() -> None:
                         k_val = st_data.get("k", 3)
 
                     st_data["k"] = k_val
+                    st_data["rank_by"] = preset.get("rank_by", DEFAULT_RANK_BY)
 
-                    # Blend-Mode, Cmap, Overlay, Alpha
+                    # Blend-Mode, Gewichte, Cmap, Overlay, Alpha
                     st_data["blend_mode"] = preset.get("blend_mode", "mean")
+                    st_data["weights"] = preset.get("weights")
+                    if st_data["mode"] == "Ausgewählte Channels":
+                        # Doppelte Channels samt Gewicht entfernen, damit die Zuordnung stimmt
+                        st_data["channels"], st_data["weights"] = _unique_channels(
+                            st_data["channels"], st_data["weights"]
+                        )
                     st_data["cmap"] = preset.get("cmap", "viridis")
                     st_data["overlay"] = preset.get("overlay", True)
                     st_data["alpha"] = float(preset.get("alpha", 0.5))
@@ -125,13 +182,17 @@ def render() -> None:
                     st_data["fav_name"] = f.get("name", "")
                     new_layer_id = preset.get("model_layer_id", st_data.get("model_layer_id", "conv1"))
                     st_data["model_layer_id"] = new_layer_id
+                    st_data["input_size"] = preset.get("input_size")
 
                     # Streamlit-Widget-State setzen
                     st.session_state[f"{layer_key}_model_layer"] = new_layer_id
+                    st.session_state[f"{layer_key}_input_size"] = st_data["input_size"]
                     st.session_state[f"{layer_key}_mode_snapshot"] = st_data["mode"]
                     if st_data["mode"] == "Top-K":
                         st.session_state[f"{layer_key}_k_snapshot"] = int(st_data["k"])
+                        st.session_state[f"{layer_key}_rank_by_snapshot"] = st_data["rank_by"]
                     st.session_state[f"{layer_key}_blend_snapshot"] = st_data["blend_mode"]
+                    st.session_state[f"{layer_key}_weights_snapshot"] = _format_weights(st_data["weights"])
                     st.session_state[f"{layer_key}_cmap_snapshot"] = st_data["cmap"]
                     st.session_state[f"{layer_key}_overlay_snapshot"] = bool(st_data["overlay"])
                     st.session_state[f"{layer_key}_alpha_snapshot"] = float(st_data["alpha"])
@@ -182,6 +243,22 @@ def render() -> None:
             else:
                 st.session_state.feature_snapshot = snap
 
+        if st.session_state.feature_snapshot is not None and st.button(
+            "Snapshot für int8-Kalibrierung speichern",
+            help=(
+                "Legt den aktuellen Snapshot im Kalibrier-Ordner ab. "
+                "Diese Bilder werden bei precision='int8' zur Quantisierung des Modells genutzt."
+            ),
+        ):
+            calib_dir = resolve_calibration_dir(cfg.model)
+            calib_dir.mkdir(parents=True, exist_ok=True)
+            target = calib_dir / f"snapshot_{time.strftime('%Y%m%d_%H%M%S')}.png"
+            bgr = cv2.cvtColor(st.session_state.feature_snapshot, cv2.COLOR_RGB2BGR)
+            if cv2.imwrite(str(target), bgr):
+                st.success(f"Kalibrier-Snapshot gespeichert: {target.name}")
+            else:
+                st.error(f"Kalibrier-Snapshot konnte nicht gespeichert werden: {target}")
+
     with right_col:
         st.markdown("**Einstellungen für Modell-Output**")
 
@@ -189,22 +266,39 @@ def render() -> None:
         if not model_layers:
             st.error("Keine aktiven Modell-Layer konfiguriert.")
             return
-        current_model_layer = st_data.get("model_layer_id", "conv1")
+        current_model_layer = st_data.get("model_layer_id", model_layers[0])
         if current_model_layer not in model_layers:
-            current_model_layer = "conv1"
+            current_model_layer = model_layers[0]
         model_layer_id = st.selectbox(
             "Modell-Layer",
             model_layers,
             index=model_layers.index(current_model_layer),
             key=f"{layer_key}_model_layer",
             help=(
-                "Welcher Schicht im ResNet soll angezeigt werden?\n"
-                "- conv1: frühe Kanten/Filter direkt nach dem Eingang\n"
-                "- layer1–layer4: immer tiefere Schichten mit komplexeren Merkmalen"
+                "Welche Schicht des Netzes soll angezeigt werden?\n"
+                "- erste Einträge (z.B. conv1, features.0): frühe Kanten/Filter direkt nach dem Eingang\n"
+                "- spätere Einträge (z.B. layer4, features.12): tiefere Schichten mit komplexeren Merkmalen"
             ),
         )
         st_data["model_layer_id"] = model_layer_id
 
+        current_input_size = st_data.get("input_size")
+        if current_input_size not in INPUT_SIZES:
+            current_input_size = None
+        st_data["input_size"] = st.selectbox(
+            "Eingabe-Auflösung",
+            INPUT_SIZES,
+            index=INPUT_SIZES.index(current_input_size),
+            format_func=lambda v: f"Modell-Default ({cfg.model.input_size})" if v is None else f"{v} px",
+            key=f"{layer_key}_input_size",
+            help=(
+                "Auflösung, mit der das Netz das Kamerabild sieht:\n"
+                "- kleiner (z.B. 160): flüssigeres Livebild, gröbere Featuremaps\n"
+                "- größer (z.B. 320): schärfere frühe Layer, aber langsamer"
+            ),
+        )
+        input_size = st_data["input_size"]
+
         mode = st.radio(
             "Channel-Modus",
             ["Ausgewählte Channels", "Top-K"],
@@ -226,7 +320,7 @@ def render() -> None:
             st.info("Bitte zuerst einen Snapshot aufnehmen, um Channels auswählen zu können.")
             C = None
         else:
-            acts_tmp = model_engine.run_inference(snapshot)
+            acts_tmp = model_engine.run_inference(snapshot, layer_ids=[model_layer_id], input_size=input_size)
             act_tmp = acts_tmp.get(model_layer_id)
             if act_tmp is None:
                 st.error(f"Aktivierung für Modell-Layer '{model_layer_id}' nicht gefunden.")
@@ -249,6 +343,29 @@ def render() -> None:
                 )
                 st_data["last_channel"] = selected_channel
 
+                with st.expander("Channel-Atlas – alle Channels auf einen Blick"):
+                    atlas = get_cached_atlas(
+                        snapshot,
+                        act_tmp,
+                        cfg.model,
+                        model_layer_id,
+                        input_size,
+                        st_data.get("cmap", DEFAULT_COLORMAP),
+                        viz_engine,
+                    )
+                    # Gewählten Channel markieren (Kopie, der Atlas bleibt im Cache unverändert)
+                    atlas_img = atlas.image.copy()
+                    x, y, w, h = atlas.tile_rect(selected_channel)
+                    cv2.rectangle(atlas_img, (x, y), (x + w - 1, y + h - 1), (255, 255, 255), 2)
+                    st.image(
+                        atlas_img,
+                        caption=(
+                            f"{atlas.n_channels} Channels, zeilenweise von links oben "
+                            f"({atlas.cols} pro Zeile). Markiert: Channel {selected_channel}."
+                        ),
+                        use_container_width=True,
+                    )
+
                 cols_add = st.columns([2, 3])
                 with cols_add[0]:
                     if st.button("In Liste aufnehmen", key=f"{layer_key}_add_channel"):
@@ -296,6 +413,20 @@ def render() -> None:
                 key=f"{layer_key}_k_snapshot",
                 help="Wie viele der aktivsten Featuremaps sollen automatisch zusammengefasst werden?",
             )
+            current_rank_by = st_data.get("rank_by", DEFAULT_RANK_BY)
+            st_data["rank_by"] = st.selectbox(
+                "Ranking-Kriterium",
+                RANK_BY_OPTIONS,
+                index=RANK_BY_OPTIONS.index(current_rank_by) if current_rank_by in RANK_BY_OPTIONS else 0,
+                key=f"{layer_key}_rank_by_snapshot",
+                help=(
+                    "Woran die aktivsten Featuremaps gemessen werden:\n"
+                    "- variance: stärkste Kontraste innerhalb der Map\n"
+                    "- mean: höchste mittlere Aktivierung\n"
+                    "- max: stärkste Einzelstelle\n"
+                    "- l2: höchste Gesamtenergie (Summe der Quadrate)"
+                ),
+            )
 
         st_data["blend_mode"] = st.selectbox(
             "Blend-Mode",
@@ -307,28 +438,43 @@ def render() -> None:
                 "- mean: Mittelwert über alle gewählten Channels\n"
                 "- max: pro Pixel der größte Wert über alle Channels\n"
                 "- sum: Summe der Werte (stärkere Kontraste)\n"
-                "- weighted: aktuell einfache Gleichgewichtung (wie mean)"
+                "- weighted: eigene Gewichte je Channel (ohne Angabe wie mean)"
             ),
         )
 
+        if st_data["blend_mode"] == "weighted":
+            n_expected = int(st_data["k"]) if st_data["mode"] == "Top-K" else len(st_data["channels"])
+            weights_text = st.text_input(
+                "Gewichte",
+                value=_format_weights(st_data.get("weights")),
+                key=f"{layer_key}_weights_snapshot",
+                help=(
+                    "Ein Gewicht je Channel, durch Komma getrennt – in der Reihenfolge der Liste "
+                    "bzw. bei Top-K je Rang (stärkster Channel zuerst). Leer = gleichgewichtet."
+                ),
+            )
+            try:
+                weights = _parse_weights(weights_text)
+            except ValueError as e:
+                st.warning(str(e))
+                weights = None
+            if weights is not None and len(weights) != n_expected:
+                st.warning(f"{len(weights)} Gewichte für {n_expected} Channels – es wird gleichgewichtet.")
+                weights = None
+            st_data["weights"] = weights
+
+        colormap_options = COLORMAPS + [name for name in viz_engine.colormap_names() if name not in COLORMAPS]
+        current_cmap = st_data.get("cmap", DEFAULT_COLORMAP)
         st_data["cmap"] = st.selectbox(
             "Farbschema (Colormap)",
-            ["viridis", "magma", "inferno", "plasma", "jet", "red", "green", "blue"],
-            index=[
-                "viridis",
-                "magma",
-                "inferno",
-                "plasma",
-                "jet",
-                "red",
-                "green",
-                "blue",
-            ].index(st_data.get("cmap", "viridis")),
+            colormap_options,
+            index=colormap_options.index(current_cmap) if current_cmap in colormap_options else 0,
             key=f"{layer_key}_cmap_snapshot",
             help=(
                 "Farbcodierung der Aktivierung:\n"
                 "- viridis/magma/inferno/plasma/jet: wissenschaftliche Colormaps von blau → gelb etc.\n"
-                "- red/green/blue: einfache Färbung nur in einem Farbkanal."
+                "- red/green/blue: einfache Färbung nur in einem Farbkanal.\n"
+                "- weitere Einträge: eigene Colormaps aus dem Content-Editor (Global)."
             ),
         )
 
@@ -362,7 +508,11 @@ def render() -> None:
         return
 
     snapshot = st.session_state.feature_snapshot
-    acts = model_engine.run_inference(snapshot)
+    acts = model_engine.run_inference(
+        snapshot,
+        layer_ids=[st_data["model_layer_id"]],
+        input_size=st_data.get("input_size"),
+    )
 
     act = acts.get(st_data["model_layer_id"])
     if act is None:
@@ -389,22 +539,13 @@ def render() -> None:
         alpha=float(st_data["alpha"]),
     )
 
-    vis_img_top = viz_engine.visualize(
-        activation=act,
-        preset=top_preset,
-        original=snapshot if top_preset.overlay else None,
-    )
-
     # Unteres Bild: zusammengelegte Channels (Liste oder Top-K)
     has_combined_preview = True
 
     if mode == "Ausgewählte Channels":
-        # Nur eindeutige, gültige Channels verwenden
-        unique_channels = list(
-            dict.fromkeys(
-                int(c) for c in st_data["channels"] if isinstance(c, int) and 0 <= c < C
-            )
-        )
+        # Nur eindeutige, gültige Channels verwenden – Gewichte werden mitgefiltert,
+        # damit sie nicht auf den falschen Channel rutschen
+        unique_channels, weights = _unique_channels(st_data["channels"], st_data.get("weights"), C)
         channels: List[int] | str = unique_channels
         k: int | None = None
 
@@ -416,28 +557,41 @@ def render() -> None:
         st_data["k"] = k_val
         channels = "topk"
         k = k_val
+        weights = st_data.get("weights")
 
-    vis_img_bottom_200 = None
+    preview_presets = [top_preset]
     if has_combined_preview:
-        bottom_preset = VizPreset(
-            id="temp_combined",
-            layer_id=st_data["model_layer_id"],
-            channels=channels,
-            k=k,
-            blend_mode=st_data["blend_mode"],
-            cmap=st_data["cmap"],
-            overlay=st_data["overlay"],
-            alpha=float(st_data["alpha"]),
+        preview_presets.append(
+            VizPreset(
+                id="temp_combined",
+                layer_id=st_data["model_layer_id"],
+                channels=channels,
+                k=k,
+                blend_mode=st_data["blend_mode"],
+                cmap=st_data["cmap"],
+                overlay=st_data["overlay"],
+                alpha=float(st_data["alpha"]),
+                weights=weights if st_data["blend_mode"] == "weighted" else None,
+                rank_by=st_data.get("rank_by", DEFAULT_RANK_BY),
+            )
         )
 
-        vis_img_bottom = viz_engine.visualize(
-            activation=act,
-            preset=bottom_preset,
-            original=snapshot if bottom_preset.overlay else None,
-        )
-        vis_img_bottom_200 = cv2.resize(vis_img_bottom, (200, 200))
+    # Beide Vorschauen in einem Durchlauf (gemeinsames Ranking, Min/Max, Overlay-Resize);
+    # das Channel-Ranking bleibt je Snapshot/Modell/Layer gecacht, Slider-Bewegungen rechnen es nicht neu
+    preview_images = viz_engine.visualize_many(
+        activation=act,
+        presets=preview_presets,
+        original=snapshot if st_data["overlay"] else None,
+        cache_key=(
+            compute_snapshot_hash(snapshot),
+            model_cache_key(cfg.model),
+            st_data["model_layer_id"],
+            st_data.get("input_size"),
+        ),
+    )
 
-    vis_img_top_200 = cv2.resize(vis_img_top, (200, 200))
+    vis_img_top_200 = cv2.resize(preview_images[0], (200, 200))
+    vis_img_bottom_200 = cv2.resize(preview_images[1], (200, 200)) if has_combined_preview else None
 
     with left_col:
         st.image(
@@ -485,10 +639,13 @@ def render() -> None:
             "channels": ("topk" if st_data["mode"] == "Top-K" else st_data["channels"]),
             "k": (int(st_data["k"]) if st_data["mode"] == "Top-K" else None),
             "blend_mode": st_data["blend_mode"],
+            "weights": (st_data.get("weights") if st_data["blend_mode"] == "weighted" else None),
+            "rank_by": st_data.get("rank_by", DEFAULT_RANK_BY),
             "cmap": st_data["cmap"],
             "overlay": bool(st_data["overlay"]),
             "alpha": float(st_data["alpha"]),
             "model_layer_id": st_data.get("model_layer_id", "conv1"),
+            "input_size": st_data.get("input_size"),
         }
 
     c1, c2 = st.columns(2)
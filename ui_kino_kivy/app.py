@@ -1,7 +1,9 @@
 # ui_kino_kivy/app.py
 import sys
 import logging
+import threading
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import numpy as np
 
@@ -20,16 +22,43 @@ from config.service import (
     load_config,
     get_model_layer_content,
     get_selected_kivy_favorites,
+    get_required_model_layers,
 )
 from config.models import ModelConfig, ModelLayerContent, VizPreset
-from core.model_engine import ModelEngine
+from core.backbones import get_backbone
+from core.inference_server import InferenceClient, get_engine_or_client
 from core.viz_engine import VizEngine
+from core.live_pipeline import LivePipeline
+from core.scene_gate import SceneChangeGate
 from core import camera_service
 
+if TYPE_CHECKING:
+    # torch wird erst im Lade-Thread importiert, damit das Fenster sofort erscheint
+    from core.model_engine import ModelEngine
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 LIVE_UPDATE_INTERVAL = 1/30  # echtes Livebild anstreben (~30 FPS)
+LIVE_STATS_INTERVAL = 1.0    # Aktualisierung der Pipeline-Statistik im Statuslabel (s)
+IDLE_STATUS_TEXT = "Wähle einen Favoriten, um Live zu starten."
+LOADING_STATUS_TEXT = "Modell wird geladen …"
+
+
+def _viz_preset_from_favorite(preset_dict: dict, favorite_name: str, layer_id: str) -> VizPreset:
+    """VizPreset aus dem gespeicherten Favoriten-Preset (Live-Modus und Aufwärmen)."""
+    return VizPreset(
+        id=preset_dict.get("id", f"fav_{favorite_name}"),
+        layer_id=layer_id,
+        channels=preset_dict.get("channels", "topk"),
+        k=preset_dict.get("k"),
+        blend_mode=preset_dict.get("blend_mode", "mean"),
+        overlay=preset_dict.get("overlay", False),
+        alpha=preset_dict.get("alpha", 0.5),
+        cmap=preset_dict.get("cmap", "viridis"),
+        weights=preset_dict.get("weights"),
+        rank_by=preset_dict.get("rank_by", "variance"),
+    )
 
 
 class ExhibitRoot(BoxLayout):
@@ -41,7 +70,7 @@ class ExhibitRoot(BoxLayout):
         self.active_page_id: str | None = None  # "global" oder model_layer_id
 
         # Live-/Model-/Viz-State
-        self.model_engine: ModelEngine | None = None
+        self.model_engine: ModelEngine | InferenceClient | None = None
         self.viz_engine: VizEngine | None = None
         self.live_cam_id: int | None = None
         self.live_active_favorite: dict | None = None
@@ -50,6 +79,13 @@ class ExhibitRoot(BoxLayout):
         self.vis_image: Image | None = None
         self.vis_status_label: Label | None = None
         self.camera_stream: camera_service.CameraStream | None = None
+        self.live_pipeline: LivePipeline | None = None
+        self.live_favorite_name: str | None = None
+        self._live_stats_elapsed = 0.0
+        # Engine wird im Hintergrund geladen und aufgewärmt; bis dahin sind
+        # die Favoriten-Buttons deaktiviert
+        self.engine_ready = False
+        self.engine_status_text = LOADING_STATUS_TEXT
 
         # Config laden mit Fehlerbehandlung
         try:
@@ -72,14 +108,8 @@ class ExhibitRoot(BoxLayout):
             self._show_error_ui("Keine Modell-Layer konfiguriert. Bitte Admin-View prüfen.")
             return
 
-        # Model- und Viz-Engine initialisieren
-        try:
-            self.model_engine = ModelEngine(self.cfg.model)
-            self.viz_engine = VizEngine()
-        except Exception as e:
-            logger.error(f"Fehler beim Initialisieren von Model/VizEngine: {e}")
-            self._show_error_ui(f"Fehler beim Initialisieren der Modell-/Visualisierungs-Engine:\n{e}")
-            return
+        # Viz-Engine ist leichtgewichtig; die Model-Engine lädt im Hintergrund
+        self.viz_engine = VizEngine(self.cfg.colormaps)
 
         try:
             self._build_titlebar()
@@ -90,6 +120,9 @@ class ExhibitRoot(BoxLayout):
         except Exception as e:
             logger.error(f"Fehler beim Aufbau der UI: {e}")
             self._show_error_ui(f"Fehler beim Aufbau der Oberfläche:\n{e}")
+            return
+
+        self._start_engine_loading()
 
     # ----------------------------------------------------
     # Hilfsfunktionen
@@ -108,9 +141,106 @@ class ExhibitRoot(BoxLayout):
         self.add_widget(error_label)
 
     def _get_model_layer_ids(self, cfg_model: ModelConfig) -> list[str]:
-        """Bestimmt aktive Modell-Layer analog zur Feature-View über ModelEngine."""
-        engine = ModelEngine(cfg_model)
-        return engine.get_active_layers()
+        """
+        Bestimmt die Modell-Layer-Seiten ohne die Engine zu laden: Die geteilte
+        Engine (bzw. der Inferenz-Server) hookt standardmäßig genau die
+        Default-Layer des Backbones – derselbe Vertrag wie in der Feature-View.
+        """
+        return list(get_backbone(cfg_model.name).default_layers)
+
+    def _apply_required_layers(self, engine) -> list[str]:
+        """
+        Hookt in der lokalen Engine nur die Layer, die ein ausgewählter
+        Kino-Favorit anzeigt; der Early-Exit endet dann an der tiefsten davon.
+        Die Seitenliste (self.model_layer_ids) bleibt unverändert.
+        Gibt die Layer zurück, die der Live-Modus anfragen wird.
+        """
+        from core.model_engine import ModelEngine
+
+        required = get_required_model_layers(self.cfg)
+        if not isinstance(engine, ModelEngine):
+            # Inferenz-Server: Layer werden pro Anfrage ausgewählt, aber nur
+            # die dort gehookten sind erlaubt
+            active = set(engine.get_active_layers())
+            skipped = [layer_id for layer_id in required if layer_id not in active]
+            if skipped:
+                logger.warning(f"Inferenz-Server hookt diese Favoriten-Layer nicht: {skipped}")
+            return [layer_id for layer_id in required if layer_id in active]
+
+        available = set(engine.get_available_layers())
+        required = [layer_id for layer_id in required if layer_id in available]
+        if required:
+            engine.set_active_layers(required)
+        return required
+
+    def _warmup_input_sizes(self) -> list[int | None]:
+        """Eingabegrößen der ausgewählten Favoriten (None = Config-Default)."""
+        sizes: list[int | None] = [None]
+        for model_layer_id in self.cfg.ui.kivy_favorites:
+            for fav in get_selected_kivy_favorites(self.cfg, model_layer_id):
+                size = (fav.get("preset") or {}).get("input_size")
+                if size not in sizes:
+                    sizes.append(size)
+        return sizes
+
+    def _warmup_presets(self, layer_ids: list[str]) -> list[VizPreset]:
+        """VizPresets der ausgewählten Favoriten, deren Layer aufgewärmt werden."""
+        presets: list[VizPreset] = []
+        for model_layer_id in self.cfg.ui.kivy_favorites:
+            for fav in get_selected_kivy_favorites(self.cfg, model_layer_id):
+                preset_dict = fav.get("preset") or {}
+                layer_id = preset_dict.get("model_layer_id", model_layer_id)
+                if layer_id not in layer_ids:
+                    continue
+                try:
+                    presets.append(_viz_preset_from_favorite(preset_dict, fav.get("name", ""), layer_id))
+                except Exception as e:  # noqa: BLE001
+                    logger.warning(f"Favorit '{fav.get('name')}' wird nicht aufgewärmt: {e}")
+        return presets
+
+    # ----------------------------------------------------
+    # Engine im Hintergrund laden (Splash)
+    # ----------------------------------------------------
+
+    def _start_engine_loading(self) -> None:
+        """Lädt Model-Engine und Aufwärm-Durchläufe in einem Hintergrund-Thread."""
+        self._set_engine_status(LOADING_STATUS_TEXT)
+        threading.Thread(target=self._load_engine_worker, name="engine-loader", daemon=True).start()
+
+    def _load_engine_worker(self) -> None:
+        try:
+            # Lokaler Inferenz-Server, falls gestartet – sonst geteilte lokale Engine
+            engine = get_engine_or_client(self.cfg.model)
+            layer_ids = self._apply_required_layers(engine)
+
+            Clock.schedule_once(lambda dt: self._set_engine_status("Modell wird aufgewärmt …"))
+            # Genau die Layer/Größen aufwärmen, die die Favoriten später anfragen
+            # (inkl. des fusionierten Pfads, den der Live-Modus mit diesen Presets aufruft)
+            engine.warmup(
+                layer_ids=layer_ids or None,
+                input_sizes=self._warmup_input_sizes(),
+                presets=self._warmup_presets(layer_ids) if layer_ids else None,
+            )
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Fehler beim Initialisieren der Model-Engine: {e}")
+            message = f"Fehler beim Initialisieren der Modell-Engine:\n{e}"
+            Clock.schedule_once(lambda dt: self._set_engine_status(message))
+            return
+
+        Clock.schedule_once(lambda dt: self._on_engine_ready(engine))
+
+    def _on_engine_ready(self, engine) -> None:
+        """Läuft im UI-Thread: Engine übernehmen und Favoriten freischalten."""
+        self.model_engine = engine
+        self.engine_ready = True
+        self._set_engine_status(IDLE_STATUS_TEXT)
+        if self.live_clock_event is None and self.active_page_id is not None:
+            self.switch_to_page(self.active_page_id)
+
+    def _set_engine_status(self, text: str) -> None:
+        self.engine_status_text = text
+        if self.vis_status_label is not None and self.live_clock_event is None:
+            self.vis_status_label.text = text
 
     # ----------------------------------------------------
     # UI-Bau
@@ -141,7 +271,7 @@ class ExhibitRoot(BoxLayout):
 
         self.vis_image = Image()
         self.vis_status_label = Label(
-            text="Wähle einen Favoriten, um Live zu starten.",
+            text=self.engine_status_text,
             halign="center",
             valign="middle",
             size_hint_y=0.2,
@@ -231,7 +361,7 @@ class ExhibitRoot(BoxLayout):
     def _render_global_page(self) -> None:
         """Setzt UI-Inhalte für die Globalseite."""
         if self.vis_status_label is not None:
-            self.vis_status_label.text = "Wähle einen Favoriten, um Live zu starten."
+            self.vis_status_label.text = self.engine_status_text
         self.subtitle_label.text = ""
         self.desc_label.text = "Willkommen in der Ausstellung. Wähle unten einen Layer, um Details zu sehen."
         self._render_favorites(None)
@@ -240,7 +370,7 @@ class ExhibitRoot(BoxLayout):
         """Setzt UI-Inhalte für eine Modell-Layer-Seite inkl. Subtitle und Favoriten."""
         content: ModelLayerContent = get_model_layer_content(self.cfg, model_layer_id)
         if self.vis_status_label is not None:
-            self.vis_status_label.text = "Wähle einen Favoriten, um Live zu starten."
+            self.vis_status_label.text = self.engine_status_text
         self.subtitle_label.text = content.subtitle or ""
         self.desc_label.text = content.description
         self._render_favorites(model_layer_id)
@@ -282,6 +412,7 @@ class ExhibitRoot(BoxLayout):
             select_btn = Button(
                 text=name,
                 on_press=make_select_handler(model_layer_id, name, fav),
+                disabled=not self.engine_ready,
             )
             remove_btn = Button(
                 text="X",
@@ -298,6 +429,9 @@ class ExhibitRoot(BoxLayout):
             f"Favorite ausgewählt: model_layer_id={model_layer_id}, name={favorite_name}, preset={favorite.get('preset')}"
         )
 
+        if not self.engine_ready:
+            return
+
         # Falls bereits ein Live-Modus läuft, zuerst stoppen
         if self.live_clock_event is not None:
             self.stop_live()
@@ -324,36 +458,54 @@ class ExhibitRoot(BoxLayout):
                 self.vis_status_label.text = f"Kamera-Stream-Fehler: {e}"
             return
 
-        # Model-Layer-ID bestimmen (im einfachsten Fall entspricht sie direkt model_layer_id)
-        self.live_active_layer_id = model_layer_id
-
         # VizPreset aus dem Favoriten-Preset bauen
         preset_dict = favorite.get("preset") or {}
+
+        # Model-Layer-ID aus dem Preset – dieselbe, die _apply_required_layers hookt
+        # (Fallback: ID der Seite)
+        self.live_active_layer_id = preset_dict.get("model_layer_id", model_layer_id)
         try:
-            viz_preset = VizPreset(
-                id=preset_dict.get("id", f"fav_{favorite_name}"),
-                layer_id=preset_dict.get("model_layer_id", model_layer_id),
-                channels=preset_dict.get("channels", "topk"),
-                k=preset_dict.get("k"),
-                blend_mode=preset_dict.get("blend_mode", "mean"),
-                overlay=preset_dict.get("overlay", False),
-                alpha=preset_dict.get("alpha", 0.5),
-                cmap=preset_dict.get("cmap", "viridis"),
-            )
+            viz_preset = _viz_preset_from_favorite(preset_dict, favorite_name, self.live_active_layer_id)
         except Exception as e:
             logger.error(f"Fehler beim Erzeugen des VizPreset aus Favorite: {e}")
             if self.vis_status_label is not None:
                 self.vis_status_label.text = f"Fehler im Preset des Favoriten: {e}"
             return
 
+        # Preset einmal in einen Render-Plan übersetzen (bindet sich beim ersten Frame an die Map-Größe)
+        render_plan = self.viz_engine.compile(viz_preset)
+
+        # Zustand für die zeitliche Glättung gehört zu genau diesem Favoriten
+        from core.live_smoothing import LiveHeatmapSmoother
+
+        smoother = LiveHeatmapSmoother.from_config(viz_preset, self.cfg.live)
+
         self.live_active_favorite = favorite
+        self.live_favorite_name = favorite_name
 
         if self.vis_status_label is not None:
             self.vis_status_label.text = f"Live-Modus aktiv für Favorit: {favorite_name}"
 
-        # Live-Timer starten
+        # Kamera- und Compute-Worker starten; der UI-Thread blittet nur noch
+        self.live_pipeline = LivePipeline(
+            camera_stream=self.camera_stream,
+            model_engine=self.model_engine,
+            viz_engine=self.viz_engine,
+            viz_preset=viz_preset,
+            layer_id=self.live_active_layer_id,
+            scene_gate=SceneChangeGate.from_config(self.cfg.live),
+            input_size=preset_dict.get("input_size"),
+            render_plan=render_plan,
+            smoother=smoother,
+            output_size=self._live_output_size(),
+            interpolation=self.cfg.live.display_interpolation,
+        )
+        self.live_pipeline.start()
+        self._live_stats_elapsed = 0.0
+
+        # Anzeige-Timer starten (~30 FPS, unabhängig von der Inferenz-Rate)
         self.live_clock_event = Clock.schedule_interval(
-            lambda dt: self.update_live_frame(dt, viz_preset),
+            self.update_live_frame,
             LIVE_UPDATE_INTERVAL,
         )
 
@@ -380,6 +532,20 @@ class ExhibitRoot(BoxLayout):
                 pass
             self.live_clock_event = None
 
+        # Worker zuerst beenden, damit niemand mehr vom Stream liest
+        if self.live_pipeline is not None:
+            stats = self.live_pipeline.stats
+            logger.info(
+                f"Live-Pipeline beendet: erfasst={stats.captured}, verarbeitet={stats.processed}, "
+                f"angezeigt={stats.displayed}, verworfen={stats.dropped}, "
+                f"übersprungen={stats.skipped}, verspätet={stats.late}, "
+                f"ohne Szenenwechsel={stats.gated} ({stats.gate_skip_ratio:.0%})"
+            )
+            # Die Pipeline gibt die Kamera erst frei, wenn ihre Worker beendet sind
+            self.live_pipeline.stop(release_camera=True)
+            self.live_pipeline = None
+            self.camera_stream = None
+
         # Kamera-Stream schließen
         if self.camera_stream is not None:
             self.camera_stream.release()
@@ -387,60 +553,49 @@ class ExhibitRoot(BoxLayout):
 
         self.live_active_favorite = None
         self.live_active_layer_id = None
+        self.live_favorite_name = None
 
         if self.vis_status_label is not None:
             self.vis_status_label.text = "Live-Modus gestoppt"
 
-    def update_live_frame(self, dt: float, viz_preset: VizPreset) -> None:
-        """Holt einen Snapshot, führt Inferenz und Visualisierung aus und aktualisiert das Kivy-Image."""
-        if self.camera_stream is None or self.model_engine is None or self.viz_engine is None:
-            return
-
-        # 1. Frame aus offenem Stream holen
-        img, err = self.camera_stream.read()
-        if img is None:
-            logger.error(f"Kamera-Fehler im Live-Modus (Stream): {err}")
-            if self.vis_status_label is not None:
-                self.vis_status_label.text = f"Kamera-Fehler: {err}"
-            self.stop_live()
+    def update_live_frame(self, dt: float) -> None:
+        """Blittet das neueste fertige Bild der Live-Pipeline (läuft im UI-Thread)."""
+        pipeline = self.live_pipeline
+        if pipeline is None:
             return
 
-        # 2. Inferenz
-        try:
-            acts = self.model_engine.run_inference(img)
-        except Exception as e:
-            logger.error(f"Fehler bei Modell-Inferenz im Live-Modus: {e}")
-            if self.vis_status_label is not None:
-                self.vis_status_label.text = f"Fehler bei Modell-Inferenz: {e}"
+        # Fehler aus Kamera- oder Compute-Worker anzeigen
+        if pipeline.error is not None:
+            error = pipeline.error
             self.stop_live()
-            return
-
-        layer_id = self.live_active_layer_id
-        if layer_id is None or layer_id not in acts:
-            logger.error(f"Layer nicht gefunden in Aktivierungen: {layer_id}")
             if self.vis_status_label is not None:
-                self.vis_status_label.text = f"Layer nicht gefunden: {layer_id}"
-            self.stop_live()
+                self.vis_status_label.text = error
             return
 
-        activation = acts[layer_id]
-
-        # 3. Visualisierung
-        try:
-            vis_img = self.viz_engine.visualize(
-                activation,
-                viz_preset,
-                original=img if viz_preset.overlay else None,
+        # Fenstergröße kann sich ändern → der Compute-Worker rendert in der aktuellen Größe
+        pipeline.output_size = self._live_output_size()
+
+        frame = pipeline.take_latest()
+        if frame is not None:
+            self._update_kivy_texture_from_numpy(frame.image)
+
+        # Statistik regelmäßig im Statuslabel zeigen
+        self._live_stats_elapsed += dt
+        if self._live_stats_elapsed >= LIVE_STATS_INTERVAL and self.vis_status_label is not None:
+            self._live_stats_elapsed = 0.0
+            stats = pipeline.stats
+            self.vis_status_label.text = (
+                f"Live-Modus aktiv für Favorit: {self.live_favorite_name}\n"
+                f"Inferenz: {stats.inference_fps:.1f} FPS · verworfen: {stats.dropped} · "
+                f"verspätet: {stats.late} · ohne Inferenz: {stats.gate_skip_ratio:.0%}"
             )
-        except Exception as e:
-            logger.error(f"Fehler bei Visualisierung im Live-Modus: {e}")
-            if self.vis_status_label is not None:
-                self.vis_status_label.text = f"Fehler bei Visualisierung: {e}"
-            self.stop_live()
-            return
 
-        # 4. Kivy-Texture aktualisieren
-        self._update_kivy_texture_from_numpy(vis_img)
+    def _live_output_size(self) -> tuple[int, int] | None:
+        """Pixelgröße des Anzeige-Widgets (Breite, Höhe); None vor dem ersten Layout."""
+        if self.vis_image is None:
+            return None
+        w, h = (int(v) for v in self.vis_image.size)
+        return (w, h) if w > 0 and h > 0 else None
 
     def _update_kivy_texture_from_numpy(self, img: np.ndarray) -> None:
         """Aktualisiert die Texture von `self.vis_image` aus einem RGB-NumPy-Array."""